@@ -13,6 +13,7 @@ from langchain.schema import HumanMessage, SystemMessage, AIMessage, FunctionMes
 from langchain.tools.render import format_tool_to_openai_function
 from langchain.chat_models import ChatOpenAI
 
+from telemetry.telemetry import span
 
 
 
@@ -30,7 +31,8 @@ class MyLlm(BaseLlm):
         max_tokens = llm_request.config.max_output_tokens if llm_request.config else 512
 
         try:
-            text = await self._call_my_model(prompt, temperature, max_tokens)
+            with span("llm_total", model=self.model):
+                text = await self._call_my_model(prompt, temperature, max_tokens)
 
             content = types.Content(
                 role="model",  # Optional, could also be "assistant"
@@ -150,7 +152,8 @@ class MyLlm(BaseLlm):
         #     yield LlmResponse(content=content, partial=False, turn_complete=True)
 
         # 4. Call backend LLM - OpenaAI Standard
-        response = await self._call_my_llm_api(llm_request)
+        with span("llm_total", model=self.model):
+            response = await self._call_my_llm_api(llm_request)
 
         if "tool_call" in response:
             yield LlmResponse(
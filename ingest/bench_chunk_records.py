@@ -0,0 +1,98 @@
+# bench_chunk_records.py
+"""Memory of chunk Documents versus ChunkBatch records for the same corpus.
+
+    python -m ingest.bench_chunk_records --docs example_docs --chunk-size 500
+
+Splits every file with the token chunker and holds all chunks at once, as
+the ingest path does for a batch, in three representations. These are
+langchain Documents (when langchain is installed), TextChunks each with its
+own metadata dict (the same per-chunk allocations without pydantic), and
+ChunkBatch records. For each it reports the memory still held once built,
+the peak while building, the object count and the build time. Without
+--docs a synthetic corpus is generated.
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from ingest.bench_splitter import synthetic_corpus
+from ingest.chunk_records import ChunkBatch
+from ingest.text_splitter import TextChunk, TokenTextChunker
+
+
+def measure(name, build):
+    gc.collect()
+    baseline = len(gc.get_objects())
+    tracemalloc.start()
+    start = time.perf_counter()
+    held = build()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    objects = len(gc.get_objects()) - baseline
+    del held
+    return name, current, peak, objects, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", help="directory of .txt/.md files (default: synthetic)")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--tokenizer", default="regex")
+    parser.add_argument("--files", type=int, default=8)
+    args = parser.parse_args()
+
+    chunker = TokenTextChunker(args.chunk_size, args.chunk_overlap, tokenizer=args.tokenizer)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.docs:
+            paths = sorted(os.path.join(d, n) for d, _, names in os.walk(args.docs)
+                           for n in names if n.endswith((".txt", ".md")))
+        else:
+            paths = synthetic_corpus(tmp, files=args.files, words=100_000)
+        # Boundaries are computed once, outside the measurements; each
+        # representation then slices its chunk texts from the source itself.
+        sources = {}
+        for path in paths:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                sources[path] = f.read()
+        spans = {path: [(chunk.start, chunk.end) for chunk in chunker.split_file(path)] for path in paths}
+
+        def text_chunks():
+            return [(TextChunk(text[start:end], start, end), {"source": path, "start_index": start})
+                    for path, text in sources.items() for start, end in spans[path]]
+
+        def records():
+            batches = []
+            for path, text in sources.items():
+                batch = ChunkBatch(path)
+                for start, end in spans[path]:
+                    batch.append(text[start:end], start)
+                batches.append(batch)
+            return batches
+
+        def documents():
+            from langchain.schema import Document
+            return [Document(page_content=text[start:end], metadata={"source": path, "start_index": start})
+                    for path, text in sources.items() for start, end in spans[path]]
+
+        runs = [("TextChunk+dict", text_chunks), ("ChunkBatch", records)]
+        try:
+            import langchain.schema  # noqa: F401
+            runs.insert(0, ("Document", documents))
+        except ImportError:
+            print("langchain not installed; skipping the Document row")
+
+        total = sum(len(chunk_spans) for chunk_spans in spans.values())
+        print(f"{len(paths)} files, {total} chunks (chunk_size={args.chunk_size}, overlap={args.chunk_overlap})")
+        print(f"{'representation':<16}{'held MB':>10}{'peak MB':>10}{'bytes/chunk':>13}{'gc objects':>12}{'build s':>9}")
+        for name, current, peak, objects, elapsed in (measure(name, build) for name, build in runs):
+            print(f"{name:<16}{current / 2**20:>10.1f}{peak / 2**20:>10.1f}{current / max(total, 1):>13.0f}"
+                  f"{objects:>12}{elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
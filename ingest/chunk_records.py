@@ -0,0 +1,199 @@
+# chunk_records.py
+"""Compact chunk storage for the ingest hot path.
+
+A ``ChunkBatch`` holds the chunks of one source as a single text buffer plus
+three integer arrays: where each chunk starts and ends in the buffer, and its
+character offset in the source. Neighbouring chunks that overlap share their
+overlap in the buffer instead of each carrying a copy, and the source name is
+interned, so a batch costs about one copy of the text it covers plus 24
+bytes per chunk. Compare that with a langchain ``Document`` and a metadata
+dict per chunk.
+
+Chunk text is sliced out on demand (``texts()``) for hashing and embedding.
+``Document`` objects are built only at the langchain boundary, with
+``to_documents()``, and only for the chunks actually written.
+"""
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+
+class ChunkRecord:
+    """View of one chunk in a ``ChunkBatch``; no text is copied until asked for."""
+
+    __slots__ = ("batch", "index")
+
+    def __init__(self, batch: "ChunkBatch", index: int):
+        self.batch = batch
+        self.index = index
+
+    @property
+    def source(self) -> str:
+        return self.batch.source
+
+    @property
+    def start_index(self) -> int:
+        """Character offset in the source, or -1 when unknown."""
+        return self.batch.offsets[self.index]
+
+    @property
+    def text(self) -> str:
+        return self.batch.text(self.index)
+
+    def to_document(self, **metadata):
+        return self.batch.to_documents([self.index], [metadata])[0]
+
+
+class ChunkBatch:
+    __slots__ = ("source", "starts", "ends", "offsets", "_parts", "_length", "_buffer", "_tail_offset", "_last")
+
+    def __init__(self, source: str):
+        self.source = sys.intern(source)
+        self.starts = array("q")
+        self.ends = array("q")
+        self.offsets = array("q")
+        self._parts: List[str] = []
+        self._length = 0
+        self._buffer: Optional[str] = None
+        # Source offset that the end of the buffer corresponds to, while the
+        # buffer is a contiguous stretch of the source (-1 otherwise).
+        self._tail_offset = -1
+        self._last = ""  # text of the previous chunk
+
+    @classmethod
+    def from_chunks(cls, source: str, chunks: Iterable) -> "ChunkBatch":
+        """From ``TextChunk``s (``text``, ``start``) in source order."""
+        batch = cls(source)
+        for chunk in chunks:
+            batch.append(chunk.text, chunk.start)
+        return batch
+
+    @classmethod
+    def from_documents(cls, source: str, documents: Iterable) -> "ChunkBatch":
+        """From split Documents; ``start_index`` metadata is used when present."""
+        batch = cls(source)
+        for document in documents:
+            batch.append(document.page_content, document.metadata.get("start_index", -1))
+        return batch
+
+    def append(self, text: str, offset: int = -1):
+        tail = self._tail_offset
+        if self._shares_overlap(text, offset):
+            # Overlaps the previous chunk: only the new suffix goes into the buffer.
+            self._add_part(text[tail - offset:])
+            start = self._length - len(text)
+        else:
+            start = self._length
+            self._add_part(text)
+        self.starts.append(start)
+        self.ends.append(start + len(text))
+        self.offsets.append(offset)
+        self._tail_offset = offset + len(text) if offset >= 0 else -1
+        self._last = text
+
+    def _shares_overlap(self, text: str, offset: int) -> bool:
+        """Whether ``text`` continues the previous chunk in the same source text.
+
+        Offsets alone are not enough: chunks of separately loaded pages each
+        count from 0, so the overlapping text itself must match.
+        """
+        tail = self._tail_offset
+        if not self.offsets or offset < self.offsets[-1] or not 0 <= offset <= tail:
+            return False
+        overlap = tail - offset
+        if overlap > len(text):
+            return False
+        return self._last[len(self._last) - overlap:] == text[:overlap]
+
+    def _add_part(self, text: str):
+        if text:
+            if self._buffer is not None:
+                self._parts = [self._buffer]
+                self._buffer = None
+            self._parts.append(text)
+            self._length += len(text)
+
+    @property
+    def buffer(self) -> str:
+        if self._buffer is None:
+            self._buffer = "".join(self._parts)
+            self._parts = []
+        return self._buffer
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> ChunkRecord:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return ChunkRecord(self, index)
+
+    def __iter__(self) -> Iterator[ChunkRecord]:
+        return (ChunkRecord(self, i) for i in range(len(self)))
+
+    def text(self, index: int) -> str:
+        return self.buffer[self.starts[index]:self.ends[index]]
+
+    def texts(self, indices: Optional[Sequence[int]] = None) -> List[str]:
+        buffer, starts, ends = self.buffer, self.starts, self.ends
+        if indices is None:
+            indices = range(len(self))
+        return [buffer[starts[i]:ends[i]] for i in indices]
+
+    def to_documents(self, indices: Optional[Sequence[int]] = None,
+                     metadatas: Optional[Sequence[Dict]] = None, base_metadata: Optional[Dict] = None) -> List:
+        """langchain Documents for ``indices`` (all chunks by default).
+
+        Metadata is ``base_metadata`` (default ``{"source": ...}``), then
+        ``start_index`` when the offset is known, then the chunk's entry in
+        ``metadatas``.
+        """
+        from langchain.schema import Document
+
+        if indices is None:
+            indices = range(len(self))
+        base = {"source": self.source} if base_metadata is None else base_metadata
+        documents = []
+        for n, i in enumerate(indices):
+            metadata = dict(base)
+            if self.offsets[i] >= 0:
+                metadata["start_index"] = self.offsets[i]
+            if metadatas is not None:
+                metadata.update(metadatas[n])
+            documents.append(Document(page_content=self.text(i), metadata=metadata))
+        return documents
+
+
+class DocumentChunks:
+    """``ChunkBatch``-compatible view over Documents a splitter has already built.
+
+    For splitters that return langchain Documents anyway (the recursive
+    splitter); wrapping them avoids copying text into a buffer only to build
+    a second set of Documents from it.
+    """
+
+    __slots__ = ("documents",)
+
+    def __init__(self, documents: List):
+        self.documents = documents
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def texts(self, indices: Optional[Sequence[int]] = None) -> List[str]:
+        if indices is None:
+            return [document.page_content for document in self.documents]
+        return [self.documents[i].page_content for i in indices]
+
+    def to_documents(self, indices: Optional[Sequence[int]] = None,
+                     metadatas: Optional[Sequence[Dict]] = None, base_metadata: Optional[Dict] = None) -> List:
+        """The wrapped Documents, with ``metadatas`` merged into them in place."""
+        if indices is None:
+            indices = range(len(self.documents))
+        documents = [self.documents[i] for i in indices]
+        if metadatas is not None:
+            for document, metadata in zip(documents, metadatas):
+                document.metadata.update(metadata)
+        return documents
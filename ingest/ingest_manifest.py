@@ -0,0 +1,211 @@
+# ingest_manifest.py
+"""Persistent record of what has been ingested, so re-syncs only do new work.
+
+Each file maps to its size, mtime, content hash, the chunker and embedding
+model that produced its chunks, and the chunk IDs written to the vector store.
+
+* Size, mtime and config all match: the file is skipped after a single
+  primary-key lookup and a ``stat``; nothing is read.
+* Only mtime differs but the content hash matches: the mtime is refreshed
+  and the file is still skipped.
+* Content changed: the file is re-split and its chunk IDs are diffed against
+  the previous ones. Only chunks with new IDs are embedded; IDs that
+  disappeared are deleted from the store.
+* Chunker or embedding model changed: every chunk is re-embedded.
+
+Chunk IDs are content addressed (path + chunk text + occurrence), so an
+unchanged paragraph keeps its ID even when text around it moves.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass
+class ManifestEntry:
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+    chunker: str
+    embedding_model: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class FileCheck:
+    status: str  # "unchanged", "changed" or "new"
+    size: int
+    mtime_ns: int
+    content_hash: Optional[str] = None
+    entry: Optional[ManifestEntry] = None
+    config_changed: bool = False
+
+
+@dataclass
+class PendingRecord:
+    """A manifest write held back until the index it describes has been saved."""
+    path: str
+    check: FileCheck
+    chunker: str
+    embedding_model: str
+    chunk_ids: List[str]
+
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_ids(path: str, texts: List[str], seen: Optional[Dict[str, int]] = None) -> List[str]:
+    """Deterministic IDs; repeated identical chunks get distinct occurrence numbers.
+
+    Pass the same ``seen`` dict for consecutive batches of one file to get the
+    IDs the whole file would get in a single call.
+    """
+    seen = {} if seen is None else seen
+    ids = []
+    for text in texts:
+        # Keyed by a digest of the text so ``seen`` stays small across batches.
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        digest = hashlib.sha256(f"{path}\0{occurrence}\0{text}".encode("utf-8")).hexdigest()
+        ids.append(digest[:32])
+    return ids
+
+
+def diff_chunks(entry: Optional[ManifestEntry], new_ids: List[str],
+                reembed_all: bool = False) -> Tuple[List[int], List[str]]:
+    """Returns (positions in ``new_ids`` to embed, old IDs to delete)."""
+    old_ids = entry.chunk_ids if entry else []
+    if reembed_all:
+        return list(range(len(new_ids))), list(old_ids)
+    old = set(old_ids)
+    new = set(new_ids)
+    return [i for i, cid in enumerate(new_ids) if cid not in old], [cid for cid in old_ids if cid not in new]
+
+
+class IncrementalDiff:
+    """``diff_chunks`` for a file whose chunks arrive in batches.
+
+    Delete ``stale_before()`` first, call ``add(texts)`` per batch to get the
+    batch's IDs and the positions to embed, then delete ``stale_after()``.
+    """
+
+    def __init__(self, path: str, entry: Optional[ManifestEntry], reembed_all: bool = False):
+        self.path = path
+        self.old_ids = entry.chunk_ids if entry else []
+        self.reembed_all = reembed_all
+        self._old = set() if reembed_all else set(self.old_ids)
+        self._seen: Dict[str, int] = {}
+        self.ids: List[str] = []
+
+    def stale_before(self) -> List[str]:
+        return list(self.old_ids) if self.reembed_all else []
+
+    def add(self, texts: List[str]) -> Tuple[List[str], List[int]]:
+        ids = chunk_ids(self.path, texts, self._seen)
+        self.ids.extend(ids)
+        return ids, [i for i, cid in enumerate(ids) if cid not in self._old]
+
+    def stale_after(self) -> List[str]:
+        if self.reembed_all:
+            return []
+        new = set(self.ids)
+        return [cid for cid in self.old_ids if cid not in new]
+
+
+class IngestManifest:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                chunker TEXT NOT NULL,
+                embedding_model TEXT NOT NULL,
+                chunk_ids TEXT NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def lookup(self, path: str) -> Optional[ManifestEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, size, mtime_ns, content_hash, chunker, embedding_model, chunk_ids "
+                "FROM files WHERE path = ?", (path,)
+            ).fetchone()
+        if row is None:
+            return None
+        return ManifestEntry(*row[:6], chunk_ids=json.loads(row[6]))
+
+    def check(self, path: str, chunker: str, embedding_model: str) -> FileCheck:
+        stat = os.stat(path)
+        entry = self.lookup(path)
+        if entry is None:
+            # Hashed now, before the file is loaded: if it changes while it is
+            # being ingested, the recorded size/mtime/hash all predate the
+            # change, so the next check sees it as changed.
+            return FileCheck("new", stat.st_size, stat.st_mtime_ns, file_hash(path))
+
+        config_changed = (entry.chunker, entry.embedding_model) != (chunker, embedding_model)
+        if not config_changed and (entry.size, entry.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            return FileCheck("unchanged", stat.st_size, stat.st_mtime_ns, entry.content_hash, entry)
+
+        content_hash = file_hash(path)
+        if not config_changed and content_hash == entry.content_hash:
+            # Touched but not modified: remember the new mtime so the next run is O(1) again.
+            with self._lock:
+                self._conn.execute("UPDATE files SET mtime_ns = ? WHERE path = ?", (stat.st_mtime_ns, path))
+                self._conn.commit()
+            return FileCheck("unchanged", stat.st_size, stat.st_mtime_ns, content_hash, entry)
+
+        return FileCheck("changed", stat.st_size, stat.st_mtime_ns, content_hash, entry, config_changed)
+
+    def record(self, path: str, check: FileCheck, chunker: str, embedding_model: str, ids: List[str]):
+        self.commit([PendingRecord(path, check, chunker, embedding_model, ids)])
+
+    def forget(self, path: str) -> List[str]:
+        """Drops a deleted file; returns its chunk IDs so they can be removed."""
+        entry = self.lookup(path)
+        self.commit(forgotten=[path])
+        return entry.chunk_ids if entry else []
+
+    def commit(self, records: Iterable[PendingRecord] = (), forgotten: Iterable[str] = ()):
+        """Writes ``records`` and drops ``forgotten`` paths in one transaction.
+
+        Callers that persist the vector store themselves collect their
+        updates and commit them only after the store is saved, so a crash in
+        between never marks a file as ingested when its chunks are not.
+        """
+        # Only values observed by check() are written; the file is not read again.
+        rows = [(r.path, r.check.size, r.check.mtime_ns, r.check.content_hash,
+                 r.chunker, r.embedding_model, json.dumps(r.chunk_ids)) for r in records]
+        with self._lock:
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self._conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in forgotten])
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def paths(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT path FROM files")]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,125 @@
+# loader_registry.py
+"""Per-file type detection and the loaders registered for each type.
+
+``detect_file_type`` trusts magic bytes for binary formats (a PDF saved as
+``.txt`` is still a PDF), then the extension, then sniffs the first block for
+HTML or plain text. Loaders register for one or more types with a
+``max_concurrency`` that caps how many files of that type are parsed at once;
+unstructured's HTML/DOCX parsing is far heavier than reading text.
+"""
+import os
+import zipfile
+from typing import Dict, Iterator, List, Optional
+
+from ingest.streaming_loaders import iter_csv_rows, iter_loader_batches, iter_pdf_pages
+
+SNIFF_BYTES = 4096
+
+EXTENSIONS = {
+    "pdf": "pdf",
+    "txt": "txt", "text": "txt", "log": "txt",
+    "md": "md", "markdown": "md",
+    "csv": "csv",
+    "docx": "docx",
+    "html": "html", "htm": "html",
+}
+
+
+def detect_file_type(path: str) -> Optional[str]:
+    """Returns a registered file type for ``path``, or None if it is not supported."""
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(path) as archive:
+                if "word/document.xml" in archive.namelist():
+                    return "docx"
+        except zipfile.BadZipFile:
+            pass
+        return None
+
+    ext = os.path.splitext(path)[-1][1:].lower()
+    if ext in EXTENSIONS:
+        return EXTENSIONS[ext]
+
+    sniff = head.lstrip().lower()
+    if sniff.startswith((b"<!doctype html", b"<html")):
+        return "html"
+    if b"\0" not in head:
+        try:
+            head.decode("utf-8")
+        except UnicodeDecodeError as e:
+            # A multi-byte character cut off at the end of the sniffed block is fine.
+            if e.start < len(head) - 3:
+                return None
+        return "txt"
+    return None
+
+
+class LoaderRegistry:
+    _strategies = {}
+
+    @classmethod
+    def register(cls, *file_types, max_concurrency: int = 4):
+        def decorator(strategy_cls):
+            strategy = strategy_cls()
+            strategy.max_concurrency = max_concurrency
+            for file_type in file_types:
+                cls._strategies[file_type] = strategy
+            return strategy_cls
+        return decorator
+
+    @classmethod
+    def get(cls, file_type: str):
+        if file_type not in cls._strategies:
+            raise ValueError(f"Unsupported file type: {file_type}")
+        return cls._strategies[file_type]
+
+    @classmethod
+    def file_types(cls) -> List[str]:
+        return sorted(cls._strategies)
+
+    @classmethod
+    def concurrency_limits(cls, overrides: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        limits = {file_type: strategy.max_concurrency for file_type, strategy in cls._strategies.items()}
+        limits.update(overrides or {})
+        return limits
+
+
+# Strategies take the RAGConfig-like ``options`` (load_batch_size, csv_batch_rows,
+# load_workers) and yield lists of Documents.
+
+@LoaderRegistry.register("pdf", max_concurrency=2)
+class PDFStrategy:
+    def batches(self, path: str, options) -> Iterator[List]:
+        return iter_pdf_pages(path, getattr(options, "load_batch_size", 32), getattr(options, "load_workers", 1))
+
+
+@LoaderRegistry.register("csv", max_concurrency=4)
+class CSVStrategy:
+    def batches(self, path: str, options) -> Iterator[List]:
+        return iter_csv_rows(path, getattr(options, "csv_batch_rows", 1000))
+
+
+@LoaderRegistry.register("txt", "md", max_concurrency=8)
+class TextStrategy:
+    def batches(self, path: str, options) -> Iterator[List]:
+        from langchain.document_loaders import TextLoader
+        return iter_loader_batches(TextLoader(path, autodetect_encoding=True), getattr(options, "load_batch_size", 32))
+
+
+@LoaderRegistry.register("docx", max_concurrency=1)
+class DocxStrategy:
+    def batches(self, path: str, options) -> Iterator[List]:
+        from langchain.document_loaders import UnstructuredWordDocumentLoader
+        return iter_loader_batches(UnstructuredWordDocumentLoader(path), getattr(options, "load_batch_size", 32))
+
+
+@LoaderRegistry.register("html", max_concurrency=1)
+class HTMLStrategy:
+    def batches(self, path: str, options) -> Iterator[List]:
+        from langchain.document_loaders import UnstructuredHTMLLoader
+        return iter_loader_batches(UnstructuredHTMLLoader(path), getattr(options, "load_batch_size", 32))
@@ -0,0 +1,83 @@
+# streaming_loaders.py
+"""Loaders that yield documents in bounded batches instead of a full list.
+
+``load()`` on langchain's PDF/CSV loaders builds a Document per page or row
+for the whole file before anything is split. These generators read one batch
+of pages or rows at a time, so peak memory is set by the batch size:
+
+* PDF: pages are extracted with pypdf (text layer only, no OCR) in page
+  ranges. With ``workers > 1`` ranges are extracted in parallel processes,
+  at most ``2 * workers`` ranges in flight, and yielded in page order.
+* CSV: rows are read with the stdlib csv module and formatted like
+  langchain's CSVLoader (``column: value`` lines).
+* Anything else: the loader's own ``lazy_load()`` grouped into batches.
+"""
+import csv
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List
+
+
+def _document(text: str, metadata: dict):
+    from langchain.schema import Document
+    return Document(page_content=text, metadata=metadata)
+
+
+def _extract_pages(args) -> List[tuple]:
+    path, start, stop = args
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    return [(i, reader.pages[i].extract_text() or "") for i in range(start, stop)]
+
+
+def pdf_page_count(path: str) -> int:
+    from pypdf import PdfReader
+    return len(PdfReader(path).pages)
+
+
+def iter_pdf_pages(path: str, batch_pages: int = 32, workers: int = 1) -> Iterator[List]:
+    total = pdf_page_count(path)
+    ranges = [(path, start, min(start + batch_pages, total)) for start in range(0, total, batch_pages)]
+
+    def to_documents(pages):
+        return [_document(text, {"source": path, "page": i}) for i, text in pages]
+
+    if workers <= 1 or len(ranges) <= 1:
+        for page_range in ranges:
+            yield to_documents(_extract_pages(page_range))
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for page_range in ranges:
+            pending.append(pool.submit(_extract_pages, page_range))
+            if len(pending) >= 2 * workers:
+                yield to_documents(pending.popleft().result())
+        while pending:
+            yield to_documents(pending.popleft().result())
+
+
+def iter_csv_rows(path: str, batch_rows: int = 1000, encoding: str = "utf-8") -> Iterator[List]:
+    batch = []
+    with open(path, newline="", encoding=encoding) as f:
+        for row_number, row in enumerate(csv.DictReader(f)):
+            text = "\n".join(f"{key.strip() if key else key}: {(value or '').strip()}"
+                             for key, value in row.items())
+            batch.append(_document(text, {"source": path, "row": row_number}))
+            if len(batch) >= batch_rows:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def iter_loader_batches(loader, batch_size: int = 32) -> Iterator[List]:
+    batch = []
+    for document in loader.lazy_load():
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
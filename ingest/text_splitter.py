@@ -0,0 +1,295 @@
+# text_splitter.py
+"""Token-aware, streaming text splitter.
+
+``TokenTextChunker`` cuts text into windows of ``chunk_size`` tokens with
+``chunk_overlap`` tokens shared between neighbours, measured with the same
+tokenizer the LLM/embedding budget is expressed in (tiktoken when available,
+or a dependency-free whitespace tokenizer).
+
+Text is consumed as a stream of fixed-size character blocks. Blocks are cut
+just before a whitespace run so a word is never tokenized across two blocks,
+which keeps memory bounded by ``block_chars`` + one chunk regardless of file
+size. Boundaries depend only on the text and the chunker settings, so a rerun
+produces identical chunks (and identical chunk IDs / cached embeddings).
+
+When a window is full, the cut moves back to the last token ending a sentence
+or line within ``boundary_lookback`` tokens, so chunks rarely end mid-sentence.
+"""
+import io
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+
+_WORD_RE = re.compile(r"\s*\S+|\s+$")
+
+
+class RegexTokenizer:
+    """Whitespace-delimited words (with their leading whitespace) as tokens."""
+
+    name = "regex"
+
+    def pieces(self, text: str) -> List[str]:
+        return _WORD_RE.findall(text)
+
+
+class TiktokenTokenizer:
+    def __init__(self, encoding: str):
+        import tiktoken
+
+        self.name = f"tiktoken:{encoding}"
+        self._encoding = tiktoken.get_encoding(encoding)
+
+    def pieces(self, text: str) -> List[str]:
+        """Surface text of each token; lossless, so offsets stay exact."""
+        tokens = self._encoding.encode(text, disallowed_special=())
+        raw = [self._encoding.decode_single_token_bytes(t) for t in tokens]
+        pieces, pending = [], b""
+        for chunk in raw:
+            # Multi-byte characters can span tokens; attach them to the last one.
+            pending += chunk
+            try:
+                pieces.append(pending.decode("utf-8"))
+                pending = b""
+            except UnicodeDecodeError:
+                pieces.append("")
+        if pending:
+            pieces[-1] = pending.decode("utf-8", errors="replace")
+        return pieces
+
+
+def get_tokenizer(name: str = "cl100k_base"):
+    if name == "regex":
+        return RegexTokenizer()
+    try:
+        return TiktokenTokenizer(name)
+    except ImportError:
+        # Boundaries differ from tiktoken's; the tokenizer name is part of
+        # chunker_key() so cached chunks are not mixed up.
+        return RegexTokenizer()
+
+
+@dataclass
+class TextChunk:
+    text: str
+    start: int  # character offset into the source text
+    end: int
+
+
+def iter_blocks(stream, block_chars: int) -> Iterator[str]:
+    """Reads ``stream`` in blocks that end right before a whitespace run."""
+    carry = ""
+    while True:
+        data = stream.read(block_chars)
+        if not data:
+            if carry:
+                yield carry
+            return
+        data = carry + data
+        cut = _last_whitespace_run(data)
+        if cut <= 0:
+            carry = data
+            continue
+        yield data[:cut]
+        carry = data[cut:]
+
+
+def _last_whitespace_run(text: str) -> int:
+    """Start of the last whitespace run in ``text``, or -1 if there is none."""
+    i = len(text) - 1
+    while i >= 0 and not text[i].isspace():
+        i -= 1
+    while i > 0 and text[i - 1].isspace():
+        i -= 1
+    return i
+
+
+class TokenTextChunker:
+    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50,
+                 tokenizer: str = "cl100k_base", block_chars: int = 1 << 16,
+                 boundary_lookback: Optional[int] = None, workers: int = 1):
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.tokenizer_name = tokenizer
+        self.tokenizer = get_tokenizer(tokenizer)
+        self.block_chars = block_chars
+        self.boundary_lookback = chunk_size // 10 if boundary_lookback is None else boundary_lookback
+        self.workers = workers
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        """The chunker's worker processes, started on first use and then reused.
+
+        Streaming ingest splits one load batch at a time; starting workers
+        (and re-importing the tokenizer) per batch would cost more than the
+        split itself. Each worker builds its chunker once, in the initializer.
+        """
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                                 initargs=(self._settings(),))
+            return self._pool
+
+    def close(self):
+        """Stops the worker processes, if any were started."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def chunker_key(self) -> str:
+        return f"token:{self.tokenizer.name}:{self.chunk_size}:{self.chunk_overlap}:{self.block_chars}"
+
+    def _cut(self, window: List[str]) -> int:
+        """Number of window tokens to emit, preferring a sentence or line end."""
+        for i in range(len(window) - 2, len(window) - 2 - self.boundary_lookback, -1):
+            if i <= self.chunk_overlap:
+                break
+            if window[i].rstrip(" \t").endswith((".", "!", "?", "\n")) or window[i + 1][:1] == "\n":
+                return i + 1
+        return len(window)
+
+    def split_stream(self, stream) -> Iterator[TextChunk]:
+        window: List[str] = []  # surface text of the buffered tokens
+        offset = 0  # character offset of window[0]
+
+        size = self.chunk_size
+        for block in iter_blocks(stream, self.block_chars):
+            window.extend(self.tokenizer.pieces(block))
+            start = 0
+            while len(window) - start >= size:
+                view = window[start:start + size]
+                count = self._cut(view)
+                text = "".join(view[:count])
+                if text.strip():
+                    yield TextChunk(text, offset, offset + len(text))
+                drop = count - min(self.chunk_overlap, count - 1)
+                offset += sum(map(len, view[:drop]))
+                start += drop
+            del window[:start]
+
+        # The tail, unless it is only the overlap already sent with the last chunk.
+        if len(window) > self.chunk_overlap or (window and offset == 0):
+            text = "".join(window)
+            if text.strip():
+                yield TextChunk(text, offset, offset + len(text))
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk.text for chunk in self.split_stream(io.StringIO(text))]
+
+    def split_file(self, path: str, encoding: str = "utf-8") -> Iterator[TextChunk]:
+        with open(path, encoding=encoding, errors="replace") as f:
+            yield from self.split_stream(f)
+
+    def split_file_records(self, path: str):
+        """A plain-text file's chunks as one ``ChunkBatch`` (see chunk_records.py)."""
+        from ingest.chunk_records import ChunkBatch
+        return ChunkBatch.from_chunks(path, self.split_file(path))
+
+    def iter_file_record_batches(self, path: str, batch_size: int = 256) -> Iterator:
+        """Streams a plain-text file as ``ChunkBatch``es of up to ``batch_size`` chunks."""
+        from ingest.chunk_records import ChunkBatch
+
+        batch = ChunkBatch(path)
+        for chunk in self.split_file(path):
+            batch.append(chunk.text, chunk.start)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = ChunkBatch(path)
+        if len(batch):
+            yield batch
+
+    def split_file_documents(self, path: str) -> List:
+        """Streams a plain-text file straight into chunk Documents (no loader)."""
+        return self.split_file_records(path).to_documents()
+
+    def iter_file_document_batches(self, path: str, batch_size: int = 256) -> Iterator[List]:
+        for batch in self.iter_file_record_batches(path, batch_size):
+            yield batch.to_documents()
+
+    def split_document_records(self, documents: Iterable) -> List:
+        """One ``ChunkBatch`` per loaded document, sourced from its ``source`` metadata."""
+        from ingest.chunk_records import ChunkBatch
+
+        documents = list(documents)
+        if self.workers > 1 and len(documents) > 1:
+            split = list(self._executor().map(_split_text_chunks, [d.page_content for d in documents]))
+        else:
+            split = [list(self.split_stream(io.StringIO(d.page_content))) for d in documents]
+        return [ChunkBatch.from_chunks(str(doc.metadata.get("source", "")), chunks)
+                for doc, chunks in zip(documents, split)]
+
+    def split_documents(self, documents: Iterable) -> List:
+        """langchain-compatible: returns Documents with ``start_index`` metadata."""
+        documents = list(documents)
+        return [
+            document
+            for doc, batch in zip(documents, self.split_document_records(documents))
+            for document in batch.to_documents(base_metadata=doc.metadata)
+        ]
+
+    def split_files(self, paths: List[str]) -> Iterator[tuple]:
+        """Yields ``(path, chunks)`` per file, splitting files in parallel processes."""
+        if self.workers <= 1:
+            for path in paths:
+                yield path, list(self.split_file(path))
+            return
+        yield from zip(paths, self._executor().map(_split_file_chunks, paths))
+
+    def _settings(self) -> dict:
+        return {
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "tokenizer": self.tokenizer_name,
+            "block_chars": self.block_chars,
+            "boundary_lookback": self.boundary_lookback,
+        }
+
+
+# Process-pool entry points (module level so they pickle).
+_worker_chunker = None
+
+
+def _init_worker(settings: dict):
+    global _worker_chunker
+    _worker_chunker = TokenTextChunker(**settings)
+
+
+def _split_text_chunks(text: str) -> List[TextChunk]:
+    return list(_worker_chunker.split_stream(io.StringIO(text)))
+
+
+def _split_file_chunks(path: str) -> List[TextChunk]:
+    return list(_worker_chunker.split_file(path))
+
+
+def get_text_splitter(engine: str, chunk_size: int, chunk_overlap: int,
+                      tokenizer: str = "cl100k_base", workers: int = 1):
+    """Returns an object with ``split_documents``; ``engine`` is recursive or token."""
+    if engine == "token":
+        return TokenTextChunker(chunk_size, chunk_overlap, tokenizer=tokenizer, workers=workers)
+    if engine == "recursive":
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    raise ValueError(f"Unsupported splitter engine: {engine}")
+
+
+def chunker_key(engine: str, chunk_size: int, chunk_overlap: int, tokenizer: str = "cl100k_base") -> str:
+    if engine == "token":
+        return TokenTextChunker(chunk_size, chunk_overlap, tokenizer=tokenizer).chunker_key()
+    return f"{engine}:{chunk_size}:{chunk_overlap}"
+
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 2) - 1)
@@ -0,0 +1,152 @@
+# work_queue.py
+"""Leased work queue on SQLite, shared by an ingest coordinator and its workers.
+
+A unit is claimed with a lease. The worker renews the lease with
+``heartbeat`` while it works and reports back with ``complete`` or ``fail``.
+If a worker dies, its lease expires and another worker claims the unit
+again, up to ``max_attempts`` times.
+
+``complete`` and ``fail`` only count if the caller still holds the lease, so
+a worker that stalled past its lease cannot overwrite the result of the
+worker that took over. Units are keyed by a caller-chosen ID and enqueued
+with INSERT OR IGNORE, so re-running the coordinator does not duplicate
+work.
+
+SQLite is the local stand-in: point every node at the same file on a shared
+disk, or replace this class with a broker that offers the same methods.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+STATES = ("pending", "leased", "done", "failed")
+
+
+@dataclass
+class WorkUnit:
+    job: str
+    unit_id: str
+    payload: Dict
+    attempt: int
+
+
+class WorkQueue:
+    def __init__(self, db_path: str, max_attempts: int = 3):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # Autocommit; claims take their own IMMEDIATE transaction.
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS units ("
+            " job TEXT NOT NULL, unit_id TEXT NOT NULL, payload TEXT NOT NULL,"
+            " state TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0,"
+            " owner TEXT, lease_expires REAL, result TEXT, error TEXT,"
+            " PRIMARY KEY (job, unit_id))"
+        )
+
+    def enqueue(self, job: str, units: Iterable[Tuple[str, Dict]]) -> int:
+        """Adds units not already queued for ``job``; returns how many were new."""
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO units (job, unit_id, payload) VALUES (?, ?, ?)",
+                ((job, unit_id, json.dumps(payload)) for unit_id, payload in units),
+            )
+            self._conn.execute("COMMIT")
+            return self._conn.total_changes - before
+
+    def claim(self, job: str, worker: str, lease_seconds: float = 300.0) -> Optional[WorkUnit]:
+        """Leases the next pending unit, or one whose lease has expired."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A worker that died on the last attempt leaves nothing to retry.
+                self._conn.execute(
+                    "UPDATE units SET state = 'failed', error = COALESCE(error, 'lease expired')"
+                    " WHERE job = ? AND state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (job, now, self.max_attempts),
+                )
+                row = self._conn.execute(
+                    "SELECT unit_id, payload, attempts FROM units WHERE job = ? AND attempts < ?"
+                    " AND (state = 'pending' OR (state = 'leased' AND lease_expires < ?))"
+                    " ORDER BY unit_id LIMIT 1",
+                    (job, self.max_attempts, now),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                unit_id, payload, attempts = row
+                self._conn.execute(
+                    "UPDATE units SET state = 'leased', attempts = ?, owner = ?, lease_expires = ?"
+                    " WHERE job = ? AND unit_id = ?",
+                    (attempts + 1, worker, now + lease_seconds, job, unit_id),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return WorkUnit(job, unit_id, json.loads(payload), attempts + 1)
+
+    def _owned_update(self, unit: WorkUnit, worker: str, assignments: str, params: tuple) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE units SET {assignments} WHERE job = ? AND unit_id = ?"
+                " AND state = 'leased' AND owner = ? AND attempts = ?",
+                params + (unit.job, unit.unit_id, worker, unit.attempt),
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, unit: WorkUnit, worker: str, lease_seconds: float = 300.0) -> bool:
+        """Extends the lease; False means it was lost and the work should stop."""
+        return self._owned_update(unit, worker, "lease_expires = ?", (time.time() + lease_seconds,))
+
+    def complete(self, unit: WorkUnit, worker: str, result: Dict) -> bool:
+        return self._owned_update(unit, worker, "state = 'done', lease_expires = NULL, result = ?, error = NULL",
+                                  (json.dumps(result),))
+
+    def fail(self, unit: WorkUnit, worker: str, error: str) -> bool:
+        """Returns the unit to the queue, or marks it failed after max_attempts."""
+        state = "failed" if unit.attempt >= self.max_attempts else "pending"
+        return self._owned_update(unit, worker, "state = ?, lease_expires = NULL, error = ?", (state, error))
+
+    def counts(self, job: str) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM units WHERE job = ? GROUP BY state", (job,)).fetchall()
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(rows)
+        return counts
+
+    def results(self, job: str) -> List[Tuple[str, Dict]]:
+        """``(unit_id, result)`` of every completed unit, in unit order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT unit_id, result FROM units WHERE job = ? AND state = 'done' ORDER BY unit_id",
+                (job,)).fetchall()
+        return [(unit_id, json.loads(result)) for unit_id, result in rows]
+
+    def errors(self, job: str) -> List[Tuple[str, str, int]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT unit_id, error, attempts FROM units WHERE job = ? AND error IS NOT NULL"
+                " AND state != 'done' ORDER BY unit_id", (job,)).fetchall()
+
+    def retry_failed(self, job: str) -> int:
+        """Gives failed units a fresh set of attempts."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE units SET state = 'pending', attempts = 0 WHERE job = ? AND state = 'failed'",
+                (job,)).rowcount
+
+    def close(self):
+        self._conn.close()
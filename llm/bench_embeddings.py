@@ -0,0 +1,60 @@
+# bench_embeddings.py
+"""CPU embedding throughput: HuggingFaceEmbeddings (PyTorch) vs local_onnx.
+
+    python -m llm.bench_embeddings --onnx-model-dir models/all-MiniLM-L6-v2-onnx --texts 2000
+
+Both paths embed the same texts; tokens are counted once with the ONNX
+model's tokenizer so tokens/s is comparable. --hf-model should name the
+checkpoint the ONNX model was exported from.
+"""
+import argparse
+import random
+import time
+
+
+def sample_texts(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    words = ("payment terms invoice net thirty days party agreement shall within notice "
+             "termination clause liability warranty delivery schedule").split()
+    # Mixed lengths, like real chunks, so dynamic padding has something to do.
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(8, 200))) for _ in range(count)]
+
+
+def bench(name, embeddings, texts, tokens, warmup=8):
+    embeddings.embed_documents(texts[:warmup])
+    start = time.perf_counter()
+    vectors = embeddings.embed_documents(texts)
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<28} {elapsed:7.2f}s  {len(texts) / elapsed:8.1f} texts/s  "
+          f"{tokens / elapsed:10.0f} tokens/s  dim={len(vectors[0])}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--onnx-model-dir", required=True)
+    parser.add_argument("--hf-model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    from llm.onnx_embeddings import OnnxEmbeddings
+
+    texts = sample_texts(args.texts)
+    onnx = OnnxEmbeddings(args.onnx_model_dir, batch_size=args.batch_size, workers=args.workers)
+    tokens = sum(len(e.ids) for e in onnx.tokenizer.encode_batch(texts))
+    print(f"{len(texts)} texts, {tokens} tokens")
+
+    try:
+        from langchain.embeddings import HuggingFaceEmbeddings
+    except ImportError:
+        print("  langchain/sentence-transformers not installed; skipping huggingface")
+    else:
+        bench(f"huggingface ({args.hf_model.split('/')[-1]})",
+              HuggingFaceEmbeddings(model_name=args.hf_model), texts, tokens)
+
+    bench(f"local_onnx ({onnx.workers} workers)", onnx, texts, tokens)
+
+
+if __name__ == "__main__":
+    main()
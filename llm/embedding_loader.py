@@ -0,0 +1,59 @@
+# embedding_loader.py
+import threading
+from typing import Dict
+
+# Like llm_loader: SDKs are imported lazily and each configuration gets one
+# process-wide client (the ONNX session and its thread pool are expensive).
+
+EMBEDDING_MODELS = ("openai", "huggingface", "local_onnx")
+
+_embedding_pool: Dict[tuple, object] = {}
+_embedding_pool_lock = threading.Lock()
+
+
+def _embedding_key(embedding_config: Dict) -> tuple:
+    return tuple(sorted(embedding_config.items()))
+
+
+def _create_embeddings(embedding_config: Dict):
+    from telemetry.langchain_telemetry import InstrumentedEmbeddings
+
+    name = embedding_config.get("embedding_model", "openai")
+    if name == "openai":
+        from langchain.embeddings import OpenAIEmbeddings
+        kwargs = {}
+        if embedding_config.get("openai_api_key"):
+            kwargs["openai_api_key"] = embedding_config["openai_api_key"]
+        if embedding_config.get("embedding_base_url"):
+            kwargs["openai_api_base"] = embedding_config["embedding_base_url"]
+        return InstrumentedEmbeddings(OpenAIEmbeddings(**kwargs), "openai")
+    elif name == "huggingface":
+        from langchain.embeddings import HuggingFaceEmbeddings
+        return InstrumentedEmbeddings(HuggingFaceEmbeddings(), "huggingface")
+    elif name == "local_onnx":
+        from llm.onnx_embeddings import OnnxEmbeddings
+        embeddings = OnnxEmbeddings(
+            embedding_config["onnx_model_dir"],
+            max_length=embedding_config.get("embedding_max_length", 256),
+            batch_size=embedding_config.get("embedding_batch_size", 32),
+            workers=embedding_config.get("embedding_workers"),
+        )
+        return InstrumentedEmbeddings(embeddings, embeddings.model)
+    raise ValueError(f"Unsupported embedding model: {name}. Use one of {EMBEDDING_MODELS}")
+
+
+def load_embeddings(embedding_config: Dict):
+    """Returns the process-wide embedding client for this configuration.
+
+    Keys: embedding_model (openai, huggingface, local_onnx), openai_api_key,
+    embedding_base_url, onnx_model_dir, embedding_max_length,
+    embedding_batch_size, embedding_workers.
+    """
+    key = _embedding_key(embedding_config)
+    embeddings = _embedding_pool.get(key)
+    if embeddings is None:
+        with _embedding_pool_lock:
+            embeddings = _embedding_pool.get(key)
+            if embeddings is None:
+                embeddings = _embedding_pool[key] = _create_embeddings(embedding_config)
+    return embeddings
@@ -1,20 +1,341 @@
 # llm_loader.py
-from langchain.llms import OpenAI, Cohere, HuggingFaceHub
-from langchain.chat_models import ChatAnthropic
-from typing import Dict
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, Optional
 
-def load_llm(llm_config: Dict):
+# Provider SDKs are imported lazily: loading an OpenAI model should not pull in
+# the Anthropic, Cohere or HuggingFace clients.
+
+PRIORITIES = {"interactive": 0, "batch": 10}
+
+_client_pool: Dict[tuple, object] = {}
+_client_pool_lock = threading.Lock()
+
+
+def _client_key(llm_config: Dict) -> tuple:
+    return (
+        llm_config.get("provider", "openai").lower(),
+        llm_config.get("model_name"),
+        llm_config.get("temperature", 0.3),
+        llm_config.get("base_url"),
+        llm_config.get("request_timeout"),
+    )
+
+
+def _lane_key(llm_config: Dict) -> tuple:
+    """Provider limits apply per model and endpoint, whatever the client settings."""
+    return (
+        llm_config.get("provider", "openai").lower(),
+        llm_config.get("model_name"),
+        llm_config.get("base_url"),
+    )
+
+
+def _has_field(model_class, name: str) -> bool:
+    # Older langchain releases would pass an unknown kwarg through to the API.
+    fields = getattr(model_class, "model_fields", None) or getattr(model_class, "__fields__", {})
+    return name in fields
+
+
+def _create_llm(llm_config: Dict):
     provider = llm_config.get("provider", "openai").lower()
     model_name = llm_config.get("model_name")
     temperature = llm_config.get("temperature", 0.3)
 
     if provider == "openai":
+        from langchain.llms import OpenAI
         return OpenAI(model_name=model_name, temperature=temperature)
+    elif provider == "openai_chat":
+        from langchain.chat_models import ChatOpenAI
+        kwargs = {"model": model_name, "temperature": temperature}
+        if llm_config.get("base_url"):
+            kwargs["openai_api_base"] = llm_config["base_url"]
+        if llm_config.get("request_timeout"):
+            kwargs["request_timeout"] = llm_config["request_timeout"]
+        if _has_field(ChatOpenAI, "include_response_headers"):
+            # Rate-limit headers in response_metadata drive the gateway's AIMD.
+            kwargs["include_response_headers"] = True
+        return ChatOpenAI(**kwargs)
     elif provider == "anthropic":
+        from langchain.chat_models import ChatAnthropic
         return ChatAnthropic(model=model_name, temperature=temperature)
     elif provider == "cohere":
+        from langchain.llms import Cohere
         return Cohere(model=llm_config.get("model_name"), temperature=temperature)
     elif provider == "hf":
+        from langchain.llms import HuggingFaceHub
         return HuggingFaceHub(repo_id=model_name, model_kwargs={"temperature": temperature})
     else:
         raise ValueError(f"Unsupported LLM provider: {provider}")
+
+
+def load_llm(llm_config: Dict):
+    """Returns the process-wide client for this provider/model configuration."""
+    key = _client_key(llm_config)
+    client = _client_pool.get(key)
+    if client is None:
+        with _client_pool_lock:
+            client = _client_pool.get(key)
+            if client is None:
+                client = _client_pool[key] = _create_llm(llm_config)
+    return client
+
+
+class RateLimitError(Exception):
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units per minute, bursting up to one minute's worth."""
+
+    def __init__(self, per_minute: Optional[float]):
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        if not self.capacity:
+            return
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) * 60 / self.capacity)
+
+    def drain(self):
+        """Empties the bucket after the provider reports we are over the limit."""
+        if self.capacity:
+            self._refill()
+            self.tokens = 0
+
+
+class _Lane:
+    """Rate limits, priority queue and adaptive concurrency for one (provider, model, endpoint)."""
+
+    def __init__(self, llm_config: Dict):
+        self.requests = TokenBucket(llm_config.get("requests_per_minute"))
+        self.tokens = TokenBucket(llm_config.get("tokens_per_minute"))
+        self.max_limit = float(llm_config.get("max_concurrency", 32))
+        self.min_limit = 1.0
+        self.limit = self.max_limit
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self._waiters = []
+        self._seq = itertools.count()
+
+    async def admit(self, prompt, llm_config: Dict, priority: int):
+        """Takes a request and its estimated tokens from the budgets, then a slot."""
+        await self.requests.acquire(1)
+        await self.tokens.acquire(len(str(prompt)) // 4 + llm_config.get("max_tokens", 256))
+        await self.acquire(priority)
+
+    async def wait_unblocked(self):
+        delay = self.blocked_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def acquire(self, priority: int):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    def on_success(self, headers: Dict):
+        remaining = _header_float(headers, "x-ratelimit-remaining-requests",
+                                  "anthropic-ratelimit-requests-remaining")
+        if remaining is not None and remaining <= self.in_flight:
+            # Close to the provider's window: back off before it returns 429s.
+            self.limit = max(self.min_limit, self.limit * 0.75)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def on_rate_limited(self, retry_after: Optional[float]):
+        self.limit = max(self.min_limit, self.limit / 2)
+        self.requests.drain()
+        self.blocked_until = max(self.blocked_until, time.monotonic() + (retry_after or 1.0))
+
+
+def _header_float(headers: Dict, *names) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+
+def _response_headers(message) -> Dict:
+    """Lowercased HTTP headers a langchain response or chunk carries, if any."""
+    headers = (getattr(message, "response_metadata", None) or {}).get("headers") or {}
+    return {key.lower(): value for key, value in headers.items()}
+
+
+def _rate_limit_from_error(error: Exception) -> Optional[RateLimitError]:
+    """A ``RateLimitError`` for a provider 429, by status code or exception type."""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    # openai.RateLimitError and anthropic.RateLimitError carry the status, but
+    # older SDKs and some wrappers only keep the exception type.
+    if status != 429 and not any(cls.__name__ == "RateLimitError" for cls in type(error).__mro__):
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    return RateLimitError(str(error), _header_float(headers, "retry-after"))
+
+
+class LLMGateway:
+    """Schedules async LLM calls over pooled clients.
+
+    Per (provider, model, endpoint) it enforces request and token per-minute budgets,
+    serves interactive work ahead of batch work, and adapts concurrency
+    (AIMD) from rate-limit headers and 429s. With a ``fallback`` config,
+    a request that fails, or is still running after ``hedge_after``
+    seconds, is also sent to the fallback; the first answer wins.
+
+    llm_config keys (in addition to load_llm's):
+        requests_per_minute, tokens_per_minute, max_concurrency,
+        max_retries, hedge_after, fallback (another llm_config)
+    """
+
+    def __init__(self):
+        self._lanes: Dict[tuple, _Lane] = {}
+
+    def _lane(self, llm_config: Dict) -> _Lane:
+        key = _lane_key(llm_config)
+        if key not in self._lanes:
+            self._lanes[key] = _Lane(llm_config)
+        return self._lanes[key]
+
+    def reset_lane(self, llm_config: Dict):
+        """Rebuilds the lane from ``llm_config`` (e.g. a new ``max_concurrency``)."""
+        self._lanes[_lane_key(llm_config)] = _Lane(llm_config)
+
+    async def _call(self, prompt, llm_config: Dict, priority: int, **kwargs):
+        lane = self._lane(llm_config)
+        client = load_llm(llm_config)
+
+        for attempt in range(llm_config.get("max_retries", 3) + 1):
+            await lane.admit(prompt, llm_config, priority)
+            try:
+                await lane.wait_unblocked()
+                result = await client.ainvoke(prompt, **kwargs)
+            except Exception as e:
+                rate_limit = _rate_limit_from_error(e)
+                if rate_limit is None:
+                    raise
+                lane.on_rate_limited(rate_limit.retry_after)
+                if attempt == llm_config.get("max_retries", 3):
+                    raise rate_limit from e
+                continue
+            finally:
+                lane.release()
+            lane.on_success(_response_headers(result))
+            return result
+
+    async def ainvoke(self, prompt, llm_config: Dict, priority: str = "interactive", **kwargs):
+        rank = PRIORITIES.get(priority, priority)
+        fallback = llm_config.get("fallback")
+        if not fallback:
+            return await self._call(prompt, llm_config, rank, **kwargs)
+
+        primary = asyncio.ensure_future(self._call(prompt, llm_config, rank, **kwargs))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=llm_config.get("hedge_after"))
+            if done and primary.exception() is None:
+                return primary.result()
+
+            # Primary failed or is slow: race it against the fallback provider.
+            secondary = asyncio.ensure_future(self._call(prompt, fallback, rank, **kwargs))
+            tasks.append(secondary)
+            pending = {secondary} if done else {primary, secondary}
+            error = primary.exception() if done else None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # The loser of the race, or both calls when the caller itself is
+            # cancelled (deadline, client disconnect), must give up its lane slot.
+            for task in tasks:
+                task.cancel()
+
+    async def astream(self, prompt, llm_config: Dict, priority: str = "interactive", **kwargs):
+        """Streams the answer's chunks under the same lane as ``ainvoke``.
+
+        A rate limit is retried only until the first chunk arrives; there is
+        no fallback hedging, since a half-streamed answer cannot be swapped.
+        """
+        rank = PRIORITIES.get(priority, priority)
+        lane = self._lane(llm_config)
+        client = load_llm(llm_config)
+        max_retries = llm_config.get("max_retries", 3)
+
+        for attempt in range(max_retries + 1):
+            await lane.admit(prompt, llm_config, rank)
+            started = False
+            headers = {}
+            try:
+                await lane.wait_unblocked()
+                async for chunk in client.astream(prompt, **kwargs):
+                    started = True
+                    # Providers attach the HTTP headers to the first or last chunk.
+                    headers = _response_headers(chunk) or headers
+                    yield chunk
+            except Exception as e:
+                rate_limit = None if started else _rate_limit_from_error(e)
+                if rate_limit is None:
+                    raise
+                lane.on_rate_limited(rate_limit.retry_after)
+                if attempt == max_retries:
+                    raise rate_limit from e
+                continue
+            finally:
+                lane.release()
+            lane.on_success(headers)
+            return
+
+
+_gateway = None
+
+
+def get_gateway() -> LLMGateway:
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway()
+    return _gateway
@@ -0,0 +1,120 @@
+# onnx_embeddings.py
+"""CPU sentence embeddings from a (quantized) ONNX model, no network calls.
+
+A model directory holds ``model_quantized.onnx`` (or ``model.onnx``) and the
+HuggingFace ``tokenizer.json`` exported with it, e.g. from
+``optimum-cli export onnx --model sentence-transformers/all-MiniLM-L6-v2``
+followed by ``quantize_model``.
+
+Throughput comes from three things the unbatched PyTorch path lacks:
+
+* Texts are sorted by token count and batched, so each batch is padded only
+  to its own longest text (dynamic padding) instead of ``max_length``.
+* Batches run concurrently on a thread pool; onnxruntime releases the GIL,
+  and the cores are split between workers and intra-op threads.
+* int8 dynamic quantization roughly halves matmul cost on CPU.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+MODEL_FILES = ("model_quantized.onnx", "model.onnx")
+
+
+def quantize_model(model_path: str, output_path: str):
+    """Writes an int8 dynamically quantized copy of an fp32 ONNX model."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(model_path, output_path, weight_type=QuantType.QInt8)
+
+
+def length_sorted_batches(lengths: List[int], batch_size: int) -> List[List[int]]:
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def pad_batch(encodings: List[List[int]], pad_id: int = 0):
+    """Pads to the batch's own longest sequence; returns (input_ids, attention_mask)."""
+    width = max(len(ids) for ids in encodings)
+    input_ids = np.full((len(encodings), width), pad_id, dtype=np.int64)
+    mask = np.zeros((len(encodings), width), dtype=np.int64)
+    for row, ids in enumerate(encodings):
+        input_ids[row, :len(ids)] = ids
+        mask[row, :len(ids)] = 1
+    return input_ids, mask
+
+
+def mean_pool(hidden, mask, normalize: bool = True):
+    weights = mask[..., None].astype(np.float32)
+    pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+    if normalize:
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+    return pooled
+
+
+class OnnxEmbeddings(Embeddings):
+    def __init__(self, model_dir: str, max_length: int = 256, batch_size: int = 32,
+                 workers: Optional[int] = None, normalize: bool = True,
+                 session=None, tokenizer=None):
+        self.model_dir = model_dir
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.normalize = normalize
+        cores = os.cpu_count() or 1
+        self.workers = workers or max(1, min(4, cores // 2))
+        self.session = session or self._load_session(model_dir, max(1, cores // self.workers))
+        self.tokenizer = tokenizer or self._load_tokenizer(model_dir, max_length)
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="onnx-embed")
+
+    @property
+    def model(self) -> str:
+        return f"onnx:{os.path.basename(os.path.normpath(self.model_dir))}"
+
+    @staticmethod
+    def _load_session(model_dir: str, intra_op_threads: int):
+        import onnxruntime as ort
+
+        path = next((os.path.join(model_dir, name) for name in MODEL_FILES
+                     if os.path.exists(os.path.join(model_dir, name))), None)
+        if path is None:
+            raise FileNotFoundError(f"No {' or '.join(MODEL_FILES)} in {model_dir}")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    @staticmethod
+    def _load_tokenizer(model_dir: str, max_length: int):
+        from tokenizers import Tokenizer
+
+        tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        tokenizer.enable_truncation(max_length)
+        tokenizer.no_padding()
+        return tokenizer
+
+    def _run(self, encodings: List[List[int]]):
+        input_ids, mask = pad_batch(encodings)
+        feeds = {"input_ids": input_ids, "attention_mask": mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self.session.run(None, feeds)[0]
+        return mean_pool(hidden, mask, self.normalize)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        encodings = [e.ids for e in self.tokenizer.encode_batch(list(texts))]
+        batches = length_sorted_batches([len(ids) for ids in encodings], self.batch_size)
+        results = self._pool.map(lambda batch: self._run([encodings[i] for i in batch]), batches)
+
+        vectors = [None] * len(texts)
+        for batch, embedded in zip(batches, results):
+            for i, vector in zip(batch, embedded):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._run([self.tokenizer.encode(text).ids])[0].tolist()
@@ -0,0 +1,141 @@
+# driver.py
+"""Open-loop load generator: sends requests at a target rate, whatever the
+service's response time.
+
+Requests are scheduled up front (constant spacing or Poisson arrivals) and
+latency is measured from the scheduled send time, not from when the request
+actually left, so a stalled service shows up as latency instead of silently
+lowering the offered load (coordinated omission). When ``max_in_flight``
+requests are outstanding, further requests are counted as shed.
+"""
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from loadtest.report import ScenarioResult
+
+
+@dataclass
+class Scenario:
+    name: str
+    path: str
+    rps: float
+    duration: float = 30.0
+    method: str = "POST"
+    # String values may use {query}; each request takes the next query in turn.
+    body: Optional[Dict] = field(default_factory=lambda: {"query": "{query}"})
+    queries: List[str] = field(default_factory=lambda: ["What are the payment terms?"])
+    headers: Dict[str, str] = field(default_factory=dict)
+    params: Dict[str, str] = field(default_factory=dict)
+    arrival: str = "constant"  # constant | poisson
+    warmup: float = 0.0
+    max_in_flight: int = 1000
+    timeout: float = 60.0
+    # Optional base URL for a scenario aimed at another service (e.g. `adk api_server`).
+    base_url: Optional[str] = None
+
+
+def render(template, query: str):
+    if isinstance(template, str):
+        return template.replace("{query}", query)
+    if isinstance(template, dict):
+        return {key: render(value, query) for key, value in template.items()}
+    if isinstance(template, list):
+        return [render(value, query) for value in template]
+    return template
+
+
+def schedule(rps: float, duration: float, arrival: str = "constant", seed: int = 0) -> List[float]:
+    """Send offsets in seconds from the start of the scenario."""
+    if rps <= 0:
+        return []
+    if arrival == "constant":
+        return [i / rps for i in range(int(rps * duration))]
+    if arrival != "poisson":
+        raise ValueError(f"Unknown arrival process: {arrival}")
+    rng = random.Random(seed)
+    offsets, t = [], rng.expovariate(rps)
+    while t < duration:
+        offsets.append(t)
+        t += rng.expovariate(rps)
+    return offsets
+
+
+async def _send(session, scenario: Scenario, url: str, query: str):
+    kwargs = {"headers": scenario.headers, "params": scenario.params}
+    if scenario.body is not None:
+        kwargs["json"] = render(scenario.body, query)
+    async with session.request(scenario.method, url, **kwargs) as response:
+        # Read the whole body (streamed responses included) before stopping the clock.
+        async for _ in response.content.iter_any():
+            pass
+        return response.status
+
+
+async def _drive(session, scenario: Scenario, url: str, duration: float, result: Optional[ScenarioResult]):
+    loop = asyncio.get_running_loop()
+    offsets = schedule(scenario.rps, duration, scenario.arrival)
+    in_flight = 0
+    tasks = []
+
+    async def one(i: int, scheduled: float):
+        nonlocal in_flight
+        try:
+            status = await _send(session, scenario, url, scenario.queries[i % len(scenario.queries)])
+        except Exception as e:
+            if result is not None:
+                result.record(loop.time() - scheduled, exception=type(e).__name__)
+        else:
+            if result is not None:
+                result.record(loop.time() - scheduled, status=status)
+        finally:
+            in_flight -= 1
+
+    start = loop.time()
+    for i, offset in enumerate(offsets):
+        scheduled = start + offset
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if in_flight >= scenario.max_in_flight:
+            if result is not None:
+                result.shed += 1
+            continue
+        in_flight += 1
+        tasks.append(asyncio.create_task(one(i, scheduled)))
+    await asyncio.gather(*tasks)
+    return loop.time() - start
+
+
+async def run_scenario(scenario: Scenario, base_url: str) -> ScenarioResult:
+    import aiohttp
+
+    url = (scenario.base_url or base_url).rstrip("/") + scenario.path
+    connector = aiohttp.TCPConnector(limit=scenario.max_in_flight)
+    timeout = aiohttp.ClientTimeout(total=scenario.timeout)
+    result = ScenarioResult(scenario.name, scenario.rps)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        if scenario.warmup > 0:
+            await _drive(session, scenario, url, scenario.warmup, None)
+        result.elapsed = await _drive(session, scenario, url, scenario.duration, result)
+    return result
+
+
+def wait_until_ready(url: str, timeout: float = 120.0, interval: float = 0.5):
+    """Polls ``url`` (e.g. the service's /ready) until it answers 200."""
+    import urllib.error
+    import urllib.request
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=interval * 4) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, OSError):
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{url} not ready after {timeout}s")
+        time.sleep(interval)
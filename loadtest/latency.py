@@ -0,0 +1,48 @@
+# latency.py
+"""Latency distributions for the mock servers, written as short specs.
+
+    0.5                    fixed 500 ms
+    uniform:0.1,0.4        uniform between 100 and 400 ms
+    normal:0.3,0.05        mean, standard deviation (clipped at 0)
+    lognormal:0.3,1.2      p50 and p99; the long tail real providers have
+    exp:0.2                exponential with this mean
+
+``parse_latency`` returns a zero-argument callable that draws one sample in
+seconds, which is what ``build_mock_app`` accepts.
+"""
+import math
+import random
+from typing import Callable, Optional
+
+# z-score of the 99th percentile of a standard normal.
+Z99 = 2.3263
+
+
+def parse_latency(spec, seed: Optional[int] = None) -> Callable[[], float]:
+    rng = random.Random(seed)
+    if isinstance(spec, (int, float)):
+        value = float(spec)
+        return lambda: value
+
+    kind, _, args = str(spec).partition(":")
+    if not args:
+        value = float(kind)
+        return lambda: value
+    params = [float(a) for a in args.split(",")]
+
+    if kind == "uniform":
+        low, high = params
+        return lambda: rng.uniform(low, high)
+    if kind == "normal":
+        mean, stdev = params
+        return lambda: max(0.0, rng.gauss(mean, stdev))
+    if kind == "lognormal":
+        p50, p99 = params
+        if not 0 < p50 <= p99:
+            raise ValueError(f"lognormal needs 0 < p50 <= p99, got {spec}")
+        mu, sigma = math.log(p50), (math.log(p99) - math.log(p50)) / Z99
+        return lambda: rng.lognormvariate(mu, sigma)
+    if kind == "exp":
+        (mean,) = params
+        return lambda: rng.expovariate(1.0 / mean)
+    raise ValueError(f"Unknown latency distribution: {spec}")
@@ -0,0 +1,90 @@
+# profiling.py
+"""Per-scenario profiles of a service process started by the harness.
+
+Flamegraphs come from py-spy, which samples the service from outside and
+needs no changes to it (``pip install py-spy``; on Linux it may need
+``--cap-add SYS_PTRACE`` or root). Allocation snapshots come from
+tracemalloc inside the service: ``loadtest.serve --tracemalloc-dir`` starts
+tracing and writes a snapshot whenever it receives SIGUSR1.
+"""
+import glob
+import os
+import shutil
+import signal
+import subprocess
+import time
+import tracemalloc
+from typing import List, Optional
+
+
+class PySpyRecorder:
+    def __init__(self, pid: int, output: str, rate: int = 100):
+        self.pid = pid
+        self.output = output
+        self.rate = rate
+        self._process = None
+
+    @staticmethod
+    def available() -> bool:
+        return shutil.which("py-spy") is not None
+
+    def start(self):
+        # --nonblocking: sample without pausing the service, so the profile
+        # does not distort the latencies being measured.
+        self._process = subprocess.Popen(
+            ["py-spy", "record", "--pid", str(self.pid), "--rate", str(self.rate),
+             "--format", "flamegraph", "--output", self.output, "--nonblocking", "--subprocesses"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        return self
+
+    def stop(self, timeout: float = 30.0) -> Optional[str]:
+        if self._process is None:
+            return None
+        # py-spy writes the flamegraph when interrupted.
+        self._process.send_signal(signal.SIGINT)
+        try:
+            self._process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+        return self.output if os.path.exists(self.output) else None
+
+
+def install_snapshot_handler(directory: str, frames: int = 25):
+    """Service side: trace allocations and dump a snapshot on SIGUSR1."""
+    os.makedirs(directory, exist_ok=True)
+    tracemalloc.start(frames)
+    counter = iter(range(1_000_000))
+
+    def dump(signum, frame):
+        path = os.path.join(directory, f"snapshot-{next(counter):04d}.tracemalloc")
+        tracemalloc.take_snapshot().dump(path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    signal.signal(signal.SIGUSR1, dump)
+
+
+def request_snapshot(pid: int, directory: str, name: str, timeout: float = 60.0) -> str:
+    """Harness side: asks the service for a snapshot and stores it as ``<name>.tracemalloc``."""
+    before = set(glob.glob(os.path.join(directory, "snapshot-*.tracemalloc")))
+    os.kill(pid, signal.SIGUSR1)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        new = set(glob.glob(os.path.join(directory, "snapshot-*.tracemalloc"))) - before
+        if new:
+            target = os.path.join(directory, f"{name}.tracemalloc")
+            os.replace(new.pop(), target)
+            return target
+        time.sleep(0.2)
+    raise TimeoutError(f"No tracemalloc snapshot from pid {pid}")
+
+
+def top_allocations(snapshot_path: str, baseline_path: Optional[str] = None, limit: int = 10) -> List[str]:
+    """Largest allocation sites, or the largest growth since ``baseline_path``."""
+    snapshot = tracemalloc.Snapshot.load(snapshot_path).filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)])
+    if baseline_path:
+        stats = snapshot.compare_to(tracemalloc.Snapshot.load(baseline_path), "lineno")
+    else:
+        stats = snapshot.statistics("lineno")
+    return [str(stat) for stat in stats[:limit]]
@@ -0,0 +1,110 @@
+# report.py
+"""Per-scenario results: throughput, latency percentiles and error rates.
+
+Results are written as JSON so a run can be compared against a saved
+baseline (``compare``) before a change ships.
+"""
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    rank = (len(sorted_values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    target_rps: float
+    elapsed: float = 0.0
+    # Seconds from each request's scheduled send time to its last byte.
+    latencies: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    exceptions: Counter = field(default_factory=Counter)
+    # Requests not sent because max_in_flight requests were outstanding.
+    shed: int = 0
+    artifacts: Dict[str, str] = field(default_factory=dict)
+
+    def record(self, latency: float, status: int = None, exception: str = None):
+        if exception is not None:
+            self.exceptions[exception] += 1
+            return
+        self.statuses[status] += 1
+        if 200 <= status < 300:
+            self.latencies.append(latency)
+
+    def summary(self) -> Dict:
+        completed = sum(self.statuses.values())
+        ok = len(self.latencies)
+        sent = completed + sum(self.exceptions.values())
+        errors = sent - ok
+        latencies = sorted(self.latencies)
+        elapsed = self.elapsed or float("nan")
+        summary = {
+            "scenario": self.name,
+            "target_rps": self.target_rps,
+            "achieved_rps": round(sent / elapsed, 2),
+            "throughput": round(ok / elapsed, 2),
+            "requests": sent,
+            "errors": errors,
+            "error_rate": round(errors / sent, 4) if sent else 0.0,
+            "shed": self.shed,
+            "statuses": {str(code): count for code, count in sorted(self.statuses.items())},
+            "exceptions": dict(self.exceptions),
+        }
+        for q in PERCENTILES:
+            summary[f"p{q}"] = round(percentile(latencies, q), 4)
+        summary["max"] = round(latencies[-1], 4) if latencies else float("nan")
+        summary.update(self.artifacts)
+        return summary
+
+
+def format_table(summaries: List[Dict]) -> str:
+    header = (f"{'scenario':<24} {'rps':>7} {'ok/s':>7} {'err%':>6} {'shed':>5} "
+              + " ".join(f"{'p' + str(q):>8}" for q in PERCENTILES) + f" {'max':>8}")
+    lines = [header, "-" * len(header)]
+    for s in summaries:
+        lines.append(
+            f"{s['scenario']:<24} {s['achieved_rps']:>7.1f} {s['throughput']:>7.1f} "
+            f"{s['error_rate'] * 100:>5.1f}% {s['shed']:>5} "
+            + " ".join(f"{s[f'p{q}']:>8.3f}" for q in PERCENTILES) + f" {s['max']:>8.3f}")
+    return "\n".join(lines)
+
+
+def compare(summaries: List[Dict], baseline: List[Dict], tolerance: float = 0.15,
+            error_rate_slack: float = 0.01) -> List[str]:
+    """Regressions of ``summaries`` against ``baseline``, matched by scenario name."""
+    previous = {s["scenario"]: s for s in baseline}
+    regressions = []
+    for s in summaries:
+        base = previous.get(s["scenario"])
+        if base is None:
+            continue
+        for key in ("p50", "p99"):
+            if s[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{s['scenario']}: {key} {base[key]:.3f}s -> {s[key]:.3f}s")
+        if s["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{s['scenario']}: throughput {base['throughput']:.1f} -> {s['throughput']:.1f}/s")
+        if s["error_rate"] > base["error_rate"] + error_rate_slack:
+            regressions.append(f"{s['scenario']}: error rate {base['error_rate']:.2%} -> {s['error_rate']:.2%}")
+    return regressions
+
+
+def save(summaries: List[Dict], path: str):
+    with open(path, "w") as f:
+        json.dump(summaries, f, indent=2)
+
+
+def load(path: str) -> List[Dict]:
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,171 @@
+# run.py
+"""End-to-end load test of rag_mcp_tool/api.py against local stand-ins.
+
+    python -m loadtest.run --start-service --profile --tracemalloc
+    python -m loadtest.run --base-url http://127.0.0.1:8000 --only query_steady
+    python -m loadtest.run --start-service --baseline results/base/report.json
+
+Starts the mock OpenAI-compatible server (chat completions and embeddings,
+latencies drawn from the distributions in scenarios.yaml). With
+--start-service it also starts the API on a copy of its config that points
+llm_base_url and embedding_base_url at the mock, so nothing calls OpenAI.
+The served index must exist and match the mock's vector size (vector_size
+in the config; 1536 by default).
+
+Each scenario is driven at its target RPS and reported with throughput,
+latency percentiles and error rate. The report is saved as JSON under
+--output-dir. With --baseline the run exits non-zero if any scenario
+regressed beyond --tolerance.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from dataclasses import fields
+from urllib.parse import urlparse
+
+import yaml
+
+from loadtest.driver import Scenario, run_scenario, wait_until_ready
+from loadtest.latency import parse_latency
+from loadtest.profiling import PySpyRecorder, request_snapshot, top_allocations
+from loadtest.report import compare, format_table, load, save
+from loadtest.serve import SERVICE_DIR
+
+ROOT = os.path.dirname(SERVICE_DIR)
+MOCK_KEY = "mock-key"
+
+
+def load_scenarios(path: str, only=None):
+    with open(path) as f:
+        spec = yaml.safe_load(f)
+    names = {f.name for f in fields(Scenario)}
+    scenarios = []
+    for entry in spec.get("scenarios", []):
+        unknown = set(entry) - names
+        if unknown:
+            raise ValueError(f"Unknown scenario keys in {entry.get('name')}: {sorted(unknown)}")
+        if not only or entry["name"] in only:
+            scenarios.append(Scenario(**entry))
+    return spec.get("mock", {}), scenarios
+
+
+def start_mock(mock: dict, port: int):
+    # bench_agent's helper runs the mock on a background thread of this process.
+    sys.path.insert(0, SERVICE_DIR)
+    from bench_agent import start_mock_server
+
+    return start_mock_server(
+        parse_latency(mock.get("llm_latency", 0.5), seed=1),
+        port=port,
+        embed_latency=parse_latency(mock.get("embed_latency", 0.02), seed=2),
+        tokens=int(mock.get("tokens", 3)),
+        dim=int(mock.get("dim", 1536)),
+    )
+
+
+def start_service(config_path: str, mock_url: str, port: int, output_dir: str, tracemalloc_dir=None):
+    with open(config_path) as f:
+        config = yaml.safe_load(f)
+    config.update({"llm_base_url": mock_url, "embedding_base_url": mock_url, "openai_api_key": MOCK_KEY})
+    service_config = os.path.join(output_dir, "service_config.yaml")
+    with open(service_config, "w") as f:
+        yaml.safe_dump(config, f)
+
+    env = dict(os.environ, RAG_CONFIG=service_config, OPENAI_API_KEY=MOCK_KEY,
+               PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    command = [sys.executable, "-m", "loadtest.serve", "--port", str(port)]
+    if tracemalloc_dir:
+        command += ["--tracemalloc-dir", tracemalloc_dir]
+    # Relative paths in the config (vector_store_path) resolve as they do in production.
+    process = subprocess.Popen(command, cwd=SERVICE_DIR, env=env)
+    try:
+        wait_until_ready(f"http://127.0.0.1:{port}/ready")
+    except TimeoutError:
+        process.terminate()
+        raise
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", default=os.path.join(os.path.dirname(__file__), "scenarios.yaml"))
+    parser.add_argument("--only", action="append", help="run only this scenario (repeatable)")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--start-service", action="store_true")
+    parser.add_argument("--service-config", default=os.path.join(SERVICE_DIR, "config.yaml"))
+    parser.add_argument("--mock-port", type=int, default=8100)
+    parser.add_argument("--no-mock", action="store_true", help="the service already points at its backends")
+    parser.add_argument("--profile", action="store_true", help="py-spy flamegraph per scenario")
+    parser.add_argument("--tracemalloc", action="store_true", help="allocation snapshot per scenario")
+    parser.add_argument("--output-dir", default=os.path.join("loadtest_results", time.strftime("%Y%m%d-%H%M%S")))
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    mock, scenarios = load_scenarios(args.scenarios, args.only)
+    if not scenarios:
+        parser.error("no scenarios selected")
+    os.makedirs(args.output_dir, exist_ok=True)
+    if (args.profile or args.tracemalloc) and not args.start_service:
+        parser.error("--profile and --tracemalloc need --start-service (the harness must own the process)")
+    if args.profile and not PySpyRecorder.available():
+        parser.error("py-spy is not installed (pip install py-spy)")
+
+    mock_server = None if args.no_mock else start_mock(mock, args.mock_port)
+    service = None
+    tracemalloc_dir = os.path.join(args.output_dir, "tracemalloc") if args.tracemalloc else None
+    if args.start_service:
+        port = urlparse(args.base_url).port or 8000
+        service = start_service(args.service_config, f"http://127.0.0.1:{args.mock_port}/v1",
+                                port, args.output_dir, tracemalloc_dir)
+
+    summaries = []
+    previous_snapshot = None
+    try:
+        if tracemalloc_dir:
+            previous_snapshot = request_snapshot(service.pid, tracemalloc_dir, "baseline")
+        for scenario in scenarios:
+            print(f"running {scenario.name}: {scenario.rps} rps for {scenario.duration}s ...", flush=True)
+            recorder = None
+            if args.profile:
+                recorder = PySpyRecorder(service.pid, os.path.join(args.output_dir, f"{scenario.name}.svg")).start()
+            result = asyncio.run(run_scenario(scenario, args.base_url))
+            if recorder is not None:
+                flamegraph = recorder.stop()
+                if flamegraph:
+                    result.artifacts["flamegraph"] = flamegraph
+            if tracemalloc_dir:
+                snapshot = request_snapshot(service.pid, tracemalloc_dir, scenario.name)
+                result.artifacts["tracemalloc"] = snapshot
+                print("  allocation growth:")
+                for line in top_allocations(snapshot, previous_snapshot, limit=5):
+                    print(f"    {line}")
+                previous_snapshot = snapshot
+            summaries.append(result.summary())
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait(30)
+        if mock_server is not None:
+            mock_server.should_exit = True
+            print(f"mock LLM peak in-flight: {mock_server.config.app.state.peak_in_flight}")
+
+    print()
+    print(format_table(summaries))
+    report_path = os.path.join(args.output_dir, "report.json")
+    save(summaries, report_path)
+    print(f"\nreport: {report_path}")
+
+    if args.baseline:
+        regressions = compare(summaries, load(args.baseline), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# serve.py
+"""Runs rag_mcp_tool/api.py under uvicorn for the load-test harness.
+
+    python -m loadtest.serve --port 8000 [--tracemalloc-dir DIR]
+
+The service reads the config file named by RAG_CONFIG. It runs as a single
+worker process so a profiler attached to it sees every request.
+"""
+import argparse
+import os
+import sys
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rag_mcp_tool")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--tracemalloc-dir")
+    args = parser.parse_args()
+
+    if args.tracemalloc_dir:
+        from loadtest.profiling import install_snapshot_handler
+        install_snapshot_handler(args.tracemalloc_dir)
+
+    # api.py uses flat imports from its own directory.
+    sys.path.insert(0, SERVICE_DIR)
+    import uvicorn
+    from api import app
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,38 @@
 # rag_config.py
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Dict, Optional
 
 @dataclass
 class RAGConfig:
     chunk_size: int = 500
     chunk_overlap: int = 50
-    file_type: str = "pdf"
+    # None detects the type per file (magic bytes, then extension); set it to
+    # force one loader for every file
+    file_type: Optional[str] = None
+    # "recursive" (langchain, chunk sizes in characters) or "token" (ingest.text_splitter,
+    # chunk sizes in tokens of `tokenizer`: a tiktoken encoding or "regex")
+    splitter: str = "recursive"
+    tokenizer: str = "cl100k_base"
+    split_workers: int = 1
+    # Streaming ingest: PDF pages / loader documents per batch, CSV rows per
+    # batch, and processes extracting PDF page ranges in parallel
+    load_batch_size: int = 32
+    csv_batch_rows: int = 1000
+    load_workers: int = 1
+    # Files parsed concurrently per type, overriding the loader registry's
+    # defaults (e.g. {"html": 2}); "txt" and "md" count separately
+    loader_concurrency: Dict[str, int] = field(default_factory=dict)
+    # "similarity", or "mmr" / "dpp" for diverse context selected natively
+    # (vector_db.diversity); these read k, fetch_k and lambda_mult from search_kwargs
+    search_type: str = "similarity"
     search_kwargs: Dict = field(default_factory=lambda: {"k": 5})
     llm_config: Dict = field(default_factory=lambda: {
         "provider": "openai",  # openai, anthropic, cohere, hf
         "model_name": "gpt-3.5-turbo-instruct",
         "temperature": 0.3
     })
+    # query_batch: questions per embed/search round and concurrent LLM calls
+    batch_size: int = 256
+    batch_concurrency: int = 16
+    # Ingest manifest (SQLite); defaults to "<persist_path>.manifest.sqlite"
+    manifest_path: Optional[str] = None
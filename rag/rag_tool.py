@@ -3,55 +3,319 @@ from rag_config import RAGConfig
 from vector_db.vector_db_config import VectorDBConfig
 from vector_db.vector_db_factory import get_vector_db
 from llm.llm_loader import load_llm
+from telemetry.telemetry import span, is_enabled, record_cache
+from ingest.ingest_manifest import IngestManifest, IncrementalDiff, PendingRecord
+from ingest.text_splitter import chunker_key, get_text_splitter
+from ingest.loader_registry import LoaderRegistry, detect_file_type
 
-from langchain.document_loaders import (
-    TextLoader, PyPDFLoader, CSVLoader,
-    UnstructuredHTMLLoader, UnstructuredWordDocumentLoader
-)
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.chains import RetrievalQA
-
+import asyncio
+import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
+# Same wording as langchain's "stuff" QA prompt, so batch answers match query().
+BATCH_QA_PROMPT = """Use the following pieces of context to answer the question at the end. If you don't know the answer, just say that you don't know, don't try to make up an answer.
+
+{context}
+
+Question: {question}
+Helpful Answer:"""
+
+# Loaders, splitters and chains are imported where they are used; the
+# unstructured/pypdf stacks are slow to import and most runs need only one.
 
 class RAGTool:
     def __init__(self, rag_config: RAGConfig, vector_config: VectorDBConfig):
         self.rag_config = rag_config
         self.vector_db = get_vector_db(vector_config)
+        self.manifest_path = rag_config.manifest_path or f"{vector_config.persist_path}.manifest.sqlite"
+        self._manifest = None
+        self._splitter = None
+        self._splitter_lock = threading.Lock()
 
-    def _get_loader(self, file_path: str):
-        ext = self.rag_config.file_type or os.path.splitext(file_path)[-1][1:]
-        ext = ext.lower()
-
-        if ext == "pdf":
-            return PyPDFLoader(file_path)
-        elif ext in {"txt", "md"}:
-            return TextLoader(file_path)
-        elif ext == "csv":
-            return CSVLoader(file_path)
-        elif ext == "docx":
-            return UnstructuredWordDocumentLoader(file_path)
-        elif ext == "html":
-            return UnstructuredHTMLLoader(file_path)
-        else:
-            raise ValueError(f"Unsupported file type: {ext}")
+    @property
+    def manifest(self) -> IngestManifest:
+        if self._manifest is None:
+            self._manifest = IngestManifest(self.manifest_path)
+        return self._manifest
+
+    def _chunker_key(self) -> str:
+        cfg = self.rag_config
+        return chunker_key(cfg.splitter, cfg.chunk_size, cfg.chunk_overlap, cfg.tokenizer)
+
+    def _embedding_key(self) -> str:
+        embeddings = getattr(self.vector_db.embeddings, "embeddings", self.vector_db.embeddings)
+        model = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", "")
+        return f"{type(embeddings).__name__}:{model}"
+
+    @property
+    def _forced_file_type(self) -> Optional[str]:
+        # Registry keys are lowercase; a config may say "PDF".
+        file_type = self.rag_config.file_type
+        return file_type.lower() if file_type else None
+
+    def _file_type(self, file_path: str) -> str:
+        """``rag_config.file_type`` when forced, otherwise detected per file."""
+        file_type = self._forced_file_type or detect_file_type(file_path)
+        if file_type is None:
+            raise ValueError(f"Unsupported file type: {file_path}")
+        return file_type
+
+    def _get_splitter(self):
+        # One splitter per tool, so split_workers processes are started once.
+        with self._splitter_lock:
+            if self._splitter is None:
+                cfg = self.rag_config
+                self._splitter = get_text_splitter(cfg.splitter, cfg.chunk_size, cfg.chunk_overlap,
+                                                   tokenizer=cfg.tokenizer, workers=cfg.split_workers)
+            return self._splitter
+
+    def close(self):
+        """Stops the splitter's worker processes and closes the manifest."""
+        close = getattr(self._splitter, "close", None)
+        if close is not None:
+            close()
+        if self._manifest is not None:
+            self._manifest.close()
+            self._manifest = None
+
+    def _iter_chunk_batches(self, file_path: str, file_type: str):
+        """Yields the file's chunk texts a batch at a time.
+
+        The token splitter produces ``ChunkBatch`` records (one text buffer
+        per batch) and Documents are never built for the chunks; only the
+        recursive splitter goes through langchain Documents.
+        """
+        splitter = self._get_splitter()
+        if self.rag_config.splitter == "token" and file_type in {"txt", "md"}:
+            # Plain text is streamed through the splitter without a loader.
+            batches = splitter.iter_file_record_batches(file_path)
+            while True:
+                with span("split", streaming="true"):
+                    chunks = next(batches, None)
+                if chunks is None:
+                    return
+                yield chunks.texts()
+
+        batches = LoaderRegistry.get(file_type).batches(file_path, self.rag_config)
+        while True:
+            with span("load", loader=file_type):
+                documents = next(batches, None)
+            if documents is None:
+                return
+            with span("split"):
+                if self.rag_config.splitter == "token":
+                    texts = [text for batch in splitter.split_document_records(documents) for text in batch.texts()]
+                else:
+                    texts = [chunk.page_content for chunk in splitter.split_documents(documents)]
+            yield texts
+
+    def ingest_document(self, file_path: str, file_type: Optional[str] = None):
+        # Batches are written without saving; the index is persisted once per
+        # file, and only then is the file recorded in the manifest.
+        with self.vector_db.bulk():
+            message, pending = self._ingest_file(file_path, file_type)
+        self.vector_db.save()
+        if pending:
+            self.manifest.commit([pending])
+        return message
+
+    def _ingest_file(self, file_path: str, file_type: Optional[str] = None):
+        file_type = file_type.lower() if file_type else self._file_type(file_path)
+        chunker, embedding_model = self._chunker_key(), self._embedding_key()
+        check = self.manifest.check(file_path, chunker, embedding_model)
+        record_cache("ingest_manifest", hit=check.status == "unchanged")
+        if check.status == "unchanged":
+            return f"Skipped unchanged {file_path}", None
 
-    def ingest_document(self, file_path: str):
-        loader = self._get_loader(file_path)
-        documents = loader.load()
+        # Pages/rows are loaded, split and embedded a batch at a time, so memory
+        # is bounded by the batch size rather than the file size.
+        diff = IncrementalDiff(file_path, check.entry, reembed_all=check.config_changed)
+        stale = diff.stale_before()
+        if stale:
+            self.vector_db.delete(stale)
+        added = 0
+        for texts in self._iter_chunk_batches(file_path, file_type):
+            ids, to_add = diff.add(texts)
+            if to_add:
+                self.vector_db.add_texts(
+                    [texts[i] for i in to_add],
+                    metadatas=[{"source": file_path, "chunk_id": ids[i]} for i in to_add],
+                    ids=[ids[i] for i in to_add],
+                )
+                added += len(to_add)
+        removed = diff.stale_after()
+        if removed:
+            self.vector_db.delete(removed)
+        pending = PendingRecord(file_path, check, chunker, embedding_model, diff.ids)
+        return (f"Ingested {added} chunks from {file_path} "
+                f"({len(diff.ids) - added} unchanged, {len(stale) + len(removed)} removed)"), pending
 
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.rag_config.chunk_size,
-            chunk_overlap=self.rag_config.chunk_overlap,
-        )
-        chunks = splitter.split_documents(documents)
-        self.vector_db.add_texts([chunk.page_content for chunk in chunks])
-        return f"Ingested {len(chunks)} chunks from {file_path}"
+    def ingest_directory(self, root: str):
+        """Syncs every file under ``root``; files gone from disk are removed.
+
+        Each file is routed by its own type to that type's thread pool, sized
+        by the registry's per-type limit (or ``rag_config.loader_concurrency``),
+        so one pass handles a mixed tree without heavy parsers starving text.
+        The index is saved once, after every file has been written, and the
+        manifest is updated in one transaction after that.
+        """
+        seen = set()
+        results = []
+        routed = []  # (path, file_type) in walk order
+        for dirpath, _, filenames in os.walk(root):
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                seen.add(path)
+                file_type = self._forced_file_type or detect_file_type(path)
+                if file_type is None:
+                    results.append(f"Skipped unsupported {path}")
+                else:
+                    routed.append((path, file_type))
+
+        limits = LoaderRegistry.concurrency_limits(self.rag_config.loader_concurrency)
+        pools = {file_type: ThreadPoolExecutor(limits.get(file_type, 1), thread_name_prefix=f"ingest-{file_type}")
+                 for file_type in {file_type for _, file_type in routed}}
+        pending, forgotten = [], []
+        with self.vector_db.bulk():
+            try:
+                futures = [pools[file_type].submit(self._ingest_file, path, file_type)
+                           for path, file_type in routed]
+                for future in futures:
+                    message, record = future.result()
+                    results.append(message)
+                    if record:
+                        pending.append(record)
+            finally:
+                for pool in pools.values():
+                    pool.shutdown(cancel_futures=True)
+
+            prefix = os.path.join(root, "")
+            for path in self.manifest.paths():
+                if path.startswith(prefix) and path not in seen:
+                    entry = self.manifest.lookup(path)
+                    stale = entry.chunk_ids if entry else []
+                    if stale:
+                        self.vector_db.delete(stale)
+                    forgotten.append(path)
+                    results.append(f"Removed {len(stale)} chunks of deleted {path}")
+        self.vector_db.save()
+        self.manifest.commit(pending, forgotten)
+        if getattr(self.vector_db, "quantized", False):
+            report = self.vector_db.report()
+            if not report.get("meets_floor", True):
+                results.append(f"Recall below floor {report['recall_floor']}; see the index report")
+        return results
+
+    def _diversity_kwargs(self):
+        search_kwargs = self.rag_config.search_kwargs
+        return {key: search_kwargs[key] for key in ("k", "fetch_k", "lambda_mult") if key in search_kwargs}
 
     def query(self, question: str):
-        retriever = self.vector_db.get_vectorstore().as_retriever(
-            search_kwargs=self.rag_config.search_kwargs
-        )
+        from langchain.chains import RetrievalQA
+
+        if self.rag_config.search_type == "similarity":
+            retriever = self.vector_db.get_vectorstore().as_retriever(
+                search_kwargs=self.rag_config.search_kwargs
+            )
+        else:
+            from vector_db.vector_db_interface import DiverseRetriever
+            retriever = DiverseRetriever(vector_db=self.vector_db, method=self.rag_config.search_type,
+                                         search_kwargs=self._diversity_kwargs())
 
         llm = load_llm(self.rag_config.llm_config)
         qa = RetrievalQA.from_chain_type(llm=llm, retriever=retriever)
+        if is_enabled():
+            from telemetry.langchain_telemetry import TelemetryCallbackHandler
+            return qa.run(question, callbacks=[TelemetryCallbackHandler()])
         return qa.run(question)
+
+    def query_batch(self, questions: Iterable[str], output_path: str,
+                    ids: Optional[Iterable[str]] = None, resume: bool = True) -> str:
+        """Answers many questions, streaming ``{"id", "question", "answer"}`` lines to JSONL.
+
+        Questions are processed ``batch_size`` at a time: one batched embedding
+        call, one multi-vector search, then concurrent LLM calls through the
+        llm_loader gateway at batch priority. Each answer is appended and
+        flushed as soon as it arrives, so with ``resume`` a rerun skips ids
+        already present in ``output_path``. A question whose LLM call fails is
+        written as ``{"id", "question", "error"}`` and retried on resume.
+        """
+        return asyncio.run(self.aquery_batch(questions, output_path, ids=ids, resume=resume))
+
+    async def aquery_batch(self, questions: Iterable[str], output_path: str,
+                           ids: Optional[Iterable[str]] = None, resume: bool = True) -> str:
+        questions = list(questions)
+        ids = [str(i) for i in ids] if ids is not None else [str(i) for i in range(len(questions))]
+        done = self._completed_ids(output_path) if resume else set()
+        todo = [(i, q) for i, q in zip(ids, questions) if i not in done]
+
+        batch_size = self.rag_config.batch_size
+        with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+            for start in range(0, len(todo), batch_size):
+                await self._answer_batch(todo[start:start + batch_size], out)
+        return output_path
+
+    @staticmethod
+    def _completed_ids(output_path: str) -> set:
+        if not os.path.exists(output_path):
+            return set()
+        completed = set()
+        with open(output_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    if "error" not in record:
+                        completed.add(record["id"])
+                except (ValueError, KeyError):
+                    continue  # a partially written last line is simply redone
+        return completed
+
+    async def _answer_batch(self, batch: List[tuple], out):
+        from llm.llm_loader import get_gateway
+
+        # Identical questions in a batch are embedded, retrieved and answered once.
+        unique_questions = list(dict.fromkeys(q for _, q in batch))
+        vectors = self.vector_db.embeddings.embed_documents(unique_questions)
+        if self.rag_config.search_type == "similarity":
+            hits = self.vector_db.search_by_vectors(vectors, k=self.rag_config.search_kwargs.get("k", 4))
+        else:
+            hits = self.vector_db.diverse_search_by_vectors(vectors, method=self.rag_config.search_type,
+                                                            **self._diversity_kwargs())
+
+        gateway = get_gateway()
+        semaphore = asyncio.Semaphore(self.rag_config.batch_concurrency)
+        answers = {}  # question -> {"answer": ...} or {"error": ...}
+
+        async def answer(question, docs):
+            with span("prompt_build", mode="batch"):
+                context = "\n\n".join(doc.page_content for doc in docs)
+                prompt = BATCH_QA_PROMPT.format(context=context, question=question)
+            try:
+                async with semaphore:
+                    with span("llm_total", mode="batch"):
+                        result = await gateway.ainvoke(prompt, self.rag_config.llm_config, priority="batch")
+            except Exception as e:
+                # One failed question must not abort the batch or lose finished answers.
+                answers[question] = {"error": f"{type(e).__name__}: {e}"}
+            else:
+                answers[question] = {"answer": getattr(result, "content", result)}
+
+        pending = {asyncio.ensure_future(answer(q, docs)) for q, docs in zip(unique_questions, hits)}
+        written = set()
+        try:
+            while pending:
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for qid, question in batch:
+                    if qid not in written and question in answers:
+                        out.write(json.dumps({"id": qid, "question": question, **answers[question]}) + "\n")
+                        written.add(qid)
+                out.flush()
+        finally:
+            # Cancelled from outside: stop the remaining LLM calls instead of orphaning them.
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
@@ -0,0 +1,199 @@
+"""Admission control and request deadlines for the API.
+
+Each endpoint class (retrieval-only ``/query/``, LLM-bound ``/agent/``) has
+its own ``AdmissionController``: a concurrency limit plus a bounded FIFO
+queue. A request that would wait longer than its remaining deadline, or
+finds the queue full, is rejected at once with ``Overloaded`` (429 and
+Retry-After) instead of joining a queue it cannot get through in time.
+
+The deadline lives in a context variable, so embedding, search and LLM
+calls made for the request (including ones run via ``asyncio.to_thread``)
+can read ``remaining()`` and give up when the client no longer waits.
+"""
+import asyncio
+import contextvars
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+from telemetry.telemetry import inc, observe, set_gauge
+
+# Absolute time.monotonic() by which the current request must finish.
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Overloaded(Exception):
+    def __init__(self, endpoint: str, reason: str, retry_after: float):
+        super().__init__(f"{endpoint} is overloaded ({reason}); retry after {retry_after:.0f}s")
+        self.endpoint = endpoint
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Sets the request deadline; a nested deadline can only shorten it."""
+    if seconds is None:
+        yield
+        return
+    target = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(target if outer is None else min(outer, target))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining(default: Optional[float] = None) -> Optional[float]:
+    """Seconds left before the current deadline (``default`` when none is set)."""
+    target = _deadline.get()
+    if target is None:
+        return default
+    return max(0.0, target - time.monotonic())
+
+
+def check_deadline(stage: str = "request"):
+    if _deadline.get() is not None and remaining() <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {stage}")
+
+
+def bounded_timeout(timeout: Optional[float]) -> Optional[float]:
+    """``timeout`` capped at the remaining deadline."""
+    left = remaining()
+    if left is None:
+        return timeout
+    return left if timeout is None else min(timeout, left)
+
+
+class AdmissionController:
+    """Concurrency limit and bounded queue for one endpoint class.
+
+    Expected queue wait is estimated from an exponentially weighted moving
+    average of recent service times, and the same estimate is sent back as
+    Retry-After on rejection.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, timeout: float,
+                 initial_service_time: float = 0.1):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.service_time = initial_service_time
+        self.in_flight = 0
+        self._waiters = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def expected_wait(self, position: int) -> float:
+        return position * self.service_time / self.max_concurrency
+
+    def _reject(self, reason: str):
+        inc("rag_admission_rejected_total", endpoint=self.name, reason=reason)
+        retry_after = max(1, math.ceil(self.expected_wait(self.queued + 1)))
+        raise Overloaded(self.name, reason, retry_after)
+
+    async def acquire(self):
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            return
+        if self.queued >= self.max_queue:
+            self._reject("queue_full")
+        budget = remaining()
+        if budget is not None and self.expected_wait(self.queued + 1) > budget:
+            self._reject("deadline")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._report()
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(future, budget)
+        except asyncio.TimeoutError:
+            self._reject("timeout")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            if not future.done() or future.cancelled():
+                try:
+                    self._waiters.remove(future)
+                except ValueError:
+                    pass
+            self._report()
+        observe("admission_wait", time.monotonic() - start, endpoint=self.name)
+
+    def release(self):
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < self.max_concurrency:
+            future = self._waiters.popleft()
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+        self._report()
+
+    @asynccontextmanager
+    async def admit(self):
+        """Holds a slot for the request within the endpoint timeout.
+
+        A deadline set by the caller (e.g. from X-Request-Timeout) can only
+        shorten the timeout: nested deadlines keep the earlier one.
+        """
+        with deadline(self.timeout):
+            await self.acquire()
+            start = time.monotonic()
+            try:
+                yield
+            finally:
+                self.service_time = 0.8 * self.service_time + 0.2 * (time.monotonic() - start)
+                self.release()
+
+    def _report(self):
+        set_gauge("rag_admission_in_flight", self.in_flight, endpoint=self.name)
+        set_gauge("rag_admission_queued", self.queued, endpoint=self.name)
+
+    def stats(self):
+        return {"in_flight": self.in_flight, "queued": self.queued, "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue, "service_time": round(self.service_time, 4)}
+
+
+async def cancel_on_disconnect(request, coro):
+    """Runs ``coro`` and cancels it if the client disconnects first.
+
+    ``request.receive()`` returns ``http.disconnect`` once the client goes
+    away (the body has already been read by then). Returns ``(True, result)``
+    when the work finished and ``(False, None)`` when the client left.
+    """
+    work = asyncio.ensure_future(coro)
+
+    async def watch():
+        while True:
+            message = await request.receive()
+            if message["type"] == "http.disconnect":
+                return
+
+    watcher = asyncio.ensure_future(watch())
+    try:
+        await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        work.cancel()
+        raise
+    finally:
+        watcher.cancel()
+    if work.done():
+        return True, work.result()
+    work.cancel()
+    # Let the work unwind (close its LLM stream, release its slot) before returning.
+    await asyncio.wait({work})
+    inc("rag_requests_abandoned_total")
+    return False, None
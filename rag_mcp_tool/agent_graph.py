@@ -1,22 +1,133 @@
-from langgraph.graph import StateGraph, END
-from langchain.chat_models import ChatOpenAI
-from typing import Dict, Any
+import asyncio
+import os
+import time
 
-llm = ChatOpenAI(temperature=0, model="gpt-4")
+from typing import Dict, Any, Optional
+
+from telemetry.telemetry import span, observe, record_tokens, is_enabled
+from mcp_utils import context_text
+from admission import bounded_timeout, check_deadline
+
+# Shared LLM client settings. One client is reused by every request, and
+# calls go through the llm_loader gateway at interactive priority, so agent
+# requests share rate limits and concurrency with batch work on the same model.
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 64))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 60))
+# Used to count tokens only when the provider does not report usage.
+LLM_TOKENIZER = os.getenv("LLM_TOKENIZER", "cl100k_base")
+
+llm = None
+llm_config = None
+_tokenizer = None
+
+
+def configure_llm(model: str = None, base_url: str = None,
+                  max_concurrency: int = None, timeout: float = None):
+    """(Re)builds the shared LLM client and its gateway lane."""
+    global llm, llm_config, LLM_MODEL, LLM_BASE_URL, LLM_MAX_CONCURRENCY, LLM_TIMEOUT
+    from llm.llm_loader import get_gateway, load_llm
+
+    LLM_MODEL = model or LLM_MODEL
+    LLM_BASE_URL = base_url or LLM_BASE_URL
+    LLM_MAX_CONCURRENCY = int(max_concurrency or LLM_MAX_CONCURRENCY)
+    LLM_TIMEOUT = float(timeout or LLM_TIMEOUT)
+
+    llm_config = {
+        "provider": "openai_chat",
+        "model_name": LLM_MODEL,
+        "temperature": 0,
+        "base_url": LLM_BASE_URL,
+        "request_timeout": LLM_TIMEOUT,
+        "max_concurrency": LLM_MAX_CONCURRENCY,
+    }
+    # Pooled per (provider, model, endpoint) by llm_loader.
+    llm = load_llm(llm_config)
+    get_gateway().reset_lane(llm_config)
+    return llm
+
+
+def get_llm():
+    # The provider SDK is only imported when the first request needs it.
+    if llm is None:
+        configure_llm()
+    return llm
+
+
+def _usage(message) -> Optional[tuple]:
+    """(prompt, completion) tokens the provider reported on a response or chunk."""
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = (getattr(message, "response_metadata", None) or {}).get("token_usage")
+    if usage:
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    return None
+
+
+def _count_tokens(text: str) -> int:
+    global _tokenizer
+    if _tokenizer is None:
+        from ingest.text_splitter import get_tokenizer
+        _tokenizer = get_tokenizer(LLM_TOKENIZER)
+    return len(_tokenizer.pieces(text))
+
+
+async def call_llm(prompt: str, timeout: Optional[float] = None) -> str:
+    """Runs one LLM call through the gateway without blocking the event loop.
+
+    The timeout covers the whole request, including time spent waiting for a
+    free slot in the gateway lane, so a saturated provider surfaces as
+    ``asyncio.TimeoutError`` instead of an ever-growing queue. It is capped
+    at the request deadline (admission.py), so a call is not started or kept
+    for a request nobody is waiting for any more.
+    """
+    from llm.llm_loader import get_gateway
+
+    check_deadline("llm")
+    get_llm()
+    gateway = get_gateway()
+
+    async def _invoke():
+        if not is_enabled():
+            response = await gateway.ainvoke(prompt, llm_config)
+            return response.content
+
+        # Stream so time to first token can be measured. The provider reports
+        # token usage in a final chunk when asked to.
+        parts = []
+        usage = None
+        start = time.time()
+        with span("llm_total", model=LLM_MODEL):
+            async for chunk in gateway.astream(prompt, llm_config, stream_options={"include_usage": True}):
+                if chunk.content:
+                    if not parts:
+                        observe("llm_ttft", time.time() - start, model=LLM_MODEL)
+                    parts.append(chunk.content)
+                usage = _usage(chunk) or usage
+        answer = "".join(parts)
+        prompt_tokens, completion_tokens = usage or (_count_tokens(prompt), _count_tokens(answer))
+        record_tokens("prompt", prompt_tokens, model=LLM_MODEL)
+        record_tokens("completion", completion_tokens, model=LLM_MODEL)
+        return answer
+
+    return await asyncio.wait_for(_invoke(), timeout=bounded_timeout(timeout or LLM_TIMEOUT))
 
 # Step 1: Define a simple function to simulate a tool
-def read_context_tool(mcp_context: dict) -> str:
-    content = "\n\n".join([c["content"] for c in mcp_context.get("context", [])])
+def read_context_tool(mcp_context) -> str:
+    content = "\n\n".join(context_text(mcp_context))
     return f"Context Retrieved from MCP:\n{content}"
 
 # Step 2: Define agent node (basic decision node for now)
-def agent_node(state: Dict[str, Any]) -> Dict[str, Any]:
+async def agent_node(state: Dict[str, Any]) -> Dict[str, Any]:
     query = state["query"]
     mcp = state["mcp"]
 
-    context_preview = read_context_tool(mcp)
+    with span("prompt_build"):
+        context_preview = read_context_tool(mcp)
 
-    prompt = f"""You are an AI assistant using retrieved document context to answer questions.
+        prompt = f"""You are an AI assistant using retrieved document context to answer questions.
 
 Context:
 {context_preview}
@@ -24,16 +135,18 @@ Context:
 Question: {query}
 Answer:"""
 
-    response = llm.invoke(prompt).content
+    response = await call_llm(prompt)
     return {"query": query, "mcp": mcp, "response": response}
 
 # Optional tool node (can be expanded later)
-def tool_node(state: Dict[str, Any]) -> Dict[str, Any]:
+async def tool_node(state: Dict[str, Any]) -> Dict[str, Any]:
     tool_output = read_context_tool(state["mcp"])
     return {"query": state["query"], "mcp": state["mcp"], "response": tool_output}
 
 # Step 3: Build LangGraph
 def build_graph():
+    from langgraph.graph import StateGraph, END
+
     builder = StateGraph()
     builder.add_node("agent", agent_node)
     # Optional: builder.add_node("tool", tool_node)
@@ -41,10 +154,17 @@ def build_graph():
     builder.add_edge("agent", END)
     return builder.compile()
 
-graph = build_graph()
+graph = None
+
+
+def get_graph():
+    global graph
+    if graph is None:
+        graph = build_graph()
+    return graph
 
 # Step 4: Entry function for FastAPI
 async def run_agent(query: str, mcp_context: dict):
     initial_state = {"query": query, "mcp": mcp_context}
-    result = await graph.ainvoke(initial_state)
+    result = await get_graph().ainvoke(initial_state)
     return result["response"]
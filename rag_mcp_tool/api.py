@@ -1,29 +1,298 @@
-from fastapi import FastAPI, Query
+import asyncio
+import hmac
+import os
+import threading
+from contextlib import contextmanager
+
+from fastapi import Depends, FastAPI, Query, HTTPException, Header, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from pydantic import BaseModel
 from embeddings import load_config, get_embedding_model
 from rag import load_and_split_documents, query_vector_store
-from vector_store import load_vector_store
-from mcp_utils import create_mcp_context
-from rag_mcp_tool.agent_graph import run_agent
+from vector_store import load_vector_store, load_vector_store_version
+from index_versions import VersionedIndex, IndexHandle, current_version, rollback
+from index_manager import TenantIndexManager, UnknownTenantError
+from mcp_utils import create_mcp_context, encode, MEDIA_TYPES, MODES
+from admission import AdmissionController, Overloaded, bounded_timeout, cancel_on_disconnect, check_deadline, deadline
+from rag_mcp_tool.agent_graph import run_agent, configure_llm
+from telemetry import telemetry
+
+# Heavy state is filled in by warm_up() on a background thread after the
+# server starts listening, so the pod can accept health probes immediately
+# and report ready once the index and embedding client are usable.
+config = None
+embedding_model = None
+index = None
+# Multi-tenant mode (config `tenants_root`): one index per X-Tenant-ID.
+tenants = None
+# Per-endpoint concurrency limits and queues (config `admission`).
+admission = {}
+warmup_state = {"status": "starting", "error": None}
+_ready = threading.Event()
+# Set when the index is attached in the gunicorn master before fork.
+preloaded = None
+
+
+def shared_index_root(config):
+    return config.get("shared_index_path", os.path.join(config["vector_store_path"], "shared"))
 
-config = load_config()
-embedding_model = get_embedding_model(config)
-db = load_vector_store(config, embedding_model)
+
+# With `index_sharing: shared` the index is served from the memory-mapped
+# layout in shared_index.py. Under gunicorn with preload_app (gunicorn_conf.py)
+# it is attached here, in the master, so every forked worker inherits it.
+if os.getenv("RAG_PRELOAD_INDEX") == "1":
+    import shared_index
+
+    config = load_config()
+    if config.get("index_sharing") == "shared":
+        preloaded = IndexHandle(*shared_index.preload_before_fork(shared_index_root(config)))
 
 app = FastAPI(title="RAG MCP LangGraph API")
 
 class QueryRequest(BaseModel):
     query: str
 
+
+def warm_up():
+    global config, embedding_model, index, tenants, admission
+    try:
+        warmup_state["status"] = "loading"
+        config = config or load_config()
+        telemetry.enable(config.get("telemetry_enabled", False))
+        if config.get("telemetry_otel"):
+            telemetry.use_opentelemetry()
+        admission = build_admission(config)
+        embedding_model = get_embedding_model(config)
+        if config.get("tenants_root"):
+            tenants = build_tenant_manager(config, embedding_model)
+        else:
+            index = build_versioned_index(config, embedding_model)
+        configure_llm(
+            model=config.get("llm_model"),
+            base_url=config.get("llm_base_url"),
+            max_concurrency=config.get("llm_max_concurrency"),
+            timeout=config.get("llm_timeout"),
+        )
+        # A dummy embedding opens the client connection pool (or loads the
+        # local model weights) before the first real request does.
+        embedding_model.embed_query("warm-up")
+        warmup_state["status"] = "ready"
+        _ready.set()
+    except Exception as e:
+        warmup_state["status"] = "failed"
+        warmup_state["error"] = str(e)
+
+
+def build_versioned_index(config, embedding_model) -> VersionedIndex:
+    """Loads the current index version and starts the hot-swap watcher."""
+    interval = config.get("index_poll_seconds", 5)
+    if config.get("index_sharing") == "shared":
+        import shared_index
+
+        def loader(path):
+            return shared_index.attach_shared_index(path, embedding_model)
+
+        versioned = VersionedIndex(shared_index_root(config), loader, interval, handle=preloaded)
+        if preloaded is not None:
+            preloaded.db.embedding_function = embedding_model
+    else:
+        def loader(path):
+            return load_vector_store_version(path, embedding_model, config)
+
+        versioned = VersionedIndex(config["vector_store_path"], loader, interval)
+
+    if current_version(versioned.root) is None:
+        # Unversioned store from before snapshots existed: serve it, no watcher.
+        versioned.swap("legacy", load_vector_store(config, embedding_model))
+        return versioned
+    versioned.load_current()
+    versioned.start_watcher()
+    return versioned
+
+
+def build_tenant_manager(config, embedding_model) -> TenantIndexManager:
+    def loader(path):
+        return load_vector_store_version(path, embedding_model, config)
+
+    return TenantIndexManager(
+        config["tenants_root"], loader,
+        ram_budget_bytes=int(config.get("tenant_ram_budget_mb", 2048) * 2 ** 20),
+        refresh_seconds=config.get("index_poll_seconds", 5),
+    )
+
+
+# Retrieval is bounded; the LLM-bound agent gets a longer deadline.
+ADMISSION_DEFAULTS = {
+    "query": {"max_concurrency": 64, "max_queue": 256, "timeout": 5.0},
+    "agent": {"max_concurrency": 32, "max_queue": 64, "timeout": 60.0},
+}
+
+
+def build_admission(config):
+    settings = config.get("admission") or {}
+    return {endpoint: AdmissionController(endpoint, **{**defaults, **settings.get(endpoint, {})})
+            for endpoint, defaults in ADMISSION_DEFAULTS.items()}
+
+
+@contextmanager
+def lease_index(tenant):
+    """The tenant's index in multi-tenant mode, else the single served index."""
+    if tenants is None:
+        with index.lease() as db:
+            yield db
+        return
+    if not tenant:
+        raise HTTPException(status_code=400, detail="X-Tenant-ID header is required")
+    try:
+        handle = tenants.acquire(tenant)
+    except UnknownTenantError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    try:
+        yield handle.db
+    finally:
+        tenants.release(handle)
+
+
+def _search(tenant, query):
+    check_deadline("search")
+    with lease_index(tenant) as db:
+        return query_vector_store(query, db, with_scores=True)
+
+
+async def retrieve(tenant, query):
+    """Embedding + search on a worker thread, bounded by the request deadline.
+
+    The lease is taken and released on that thread, so a request that times
+    out or is abandoned never releases an index a search is still reading.
+    """
+    # Loading a cold tenant reads the index from disk; keep it off the event loop.
+    return await asyncio.wait_for(asyncio.to_thread(_search, tenant, query), bounded_timeout(None))
+
+
+async def answer(tenant, query):
+    docs = await retrieve(tenant, query)
+    return await run_agent(query, create_mcp_context(query, docs))
+
+
+async def admitted(endpoint, request: Request, work, client_timeout=None):
+    """Runs ``work()`` under the endpoint's admission limit and deadline.
+
+    Returns None when the client disconnected and the work was cancelled.
+    """
+    with deadline(client_timeout):
+        async with admission[endpoint].admit():
+            completed, result = await cancel_on_disconnect(request, work())
+    return result if completed else None
+
+
+def require_ready():
+    if not _ready.is_set():
+        raise HTTPException(status_code=503, detail=f"Service is {warmup_state['status']}")
+
+
+@app.on_event("startup")
+async def start_warm_up():
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "alive"}
+
+
+@app.exception_handler(Overloaded)
+async def overloaded(request: Request, e: Overloaded):
+    return JSONResponse(status_code=429, content={"detail": str(e)},
+                        headers={"Retry-After": str(int(e.retry_after))})
+
+
+@app.exception_handler(TimeoutError)
+async def timed_out(request: Request, e: TimeoutError):
+    return JSONResponse(status_code=504, content={"detail": str(e) or "Request deadline exceeded"})
+
+
+@app.get("/ready")
+async def ready():
+    status_code = 200 if _ready.is_set() else 503
+    content = {**warmup_state, "index_version": index and index.version}
+    content["admission"] = {endpoint: controller.stats() for endpoint, controller in admission.items()}
+    if tenants is not None:
+        content["tenants"] = {key: value for key, value in tenants.stats().items() if key != "tenants"}
+    return JSONResponse(status_code=status_code, content=content)
+
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(telemetry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+def require_admin(authorization: str = Header(None)):
+    """Admin endpoints need ``Authorization: Bearer $RAG_ADMIN_TOKEN``; without
+    the variable set they are disabled."""
+    token = os.getenv("RAG_ADMIN_TOKEN")
+    if not token:
+        raise HTTPException(status_code=403, detail="Admin API is disabled (RAG_ADMIN_TOKEN is not set)")
+    scheme, _, supplied = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(supplied.encode(), token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+
+def _rollback(root, version):
+    try:
+        return rollback(root, version)
+    except ValueError as e:
+        # An unknown version is missing; no earlier version is a state conflict.
+        raise HTTPException(status_code=404 if version else 409, detail=str(e))
+
+
+@app.post("/admin/index/rollback", dependencies=[Depends(require_admin)])
+async def rollback_index(version: str = Query(None), x_tenant_id: str = Header(None)):
+    require_ready()
+    if tenants is not None:
+        if not x_tenant_id:
+            raise HTTPException(status_code=400, detail="X-Tenant-ID header is required")
+        try:
+            root = tenants.tenant_root(x_tenant_id)
+        except UnknownTenantError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        target = _rollback(root, version)
+        # The next request for this tenant loads the rolled-back version.
+        tenants.evict(x_tenant_id)
+        return {"tenant": x_tenant_id, "index_version": target}
+    target = _rollback(index.root, version)
+    # Load now rather than waiting for the next poll.
+    await asyncio.to_thread(index.load_current)
+    return {"index_version": target}
+
 @app.post("/query/")
-async def query_docs(request: QueryRequest):
-    docs = query_vector_store(request.query, db)
-    mcp = create_mcp_context(request.query, docs)
-    return mcp
+async def query_docs(request: Request, body: QueryRequest, mode: str = Query("full"),
+                     accept: str = Header("application/json"), x_tenant_id: str = Header(None),
+                     x_request_timeout: float = Header(None)):
+    """MCP context for the query; ``mode=reference`` omits chunk text.
+
+    Sent as msgpack when the client accepts application/msgpack, else JSON.
+    The encoded bytes are returned as-is, bypassing FastAPI's serializer.
+    Rejected with 429 when over capacity; X-Request-Timeout (seconds) can
+    shorten the endpoint's deadline.
+    """
+    if mode not in MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {MODES}")
+    require_ready()
+    docs = await admitted("query", request, lambda: retrieve(x_tenant_id, body.query),
+                          x_request_timeout)
+    if docs is None:
+        return Response(status_code=499)
+    fmt = "msgpack" if MEDIA_TYPES["msgpack"] in accept else "json"
+    mcp = create_mcp_context(body.query, docs, mode=mode)
+    return Response(content=encode(mcp, fmt), media_type=MEDIA_TYPES[fmt])
 
 @app.post("/agent/")
-async def agent_response(request: QueryRequest):
-    docs = query_vector_store(request.query, db)
-    mcp = create_mcp_context(request.query, docs)
-    answer = await run_agent(request.query, mcp)
-    return {"response": answer}
+async def agent_response(request: Request, body: QueryRequest, x_tenant_id: str = Header(None),
+                         x_request_timeout: float = Header(None)):
+    require_ready()
+    # Deadline overruns (retrieval or LLM) become 504 via timed_out().
+    response = await admitted("agent", request, lambda: answer(x_tenant_id, body.query),
+                              x_request_timeout)
+    if response is None:
+        return Response(status_code=499)
+    return {"response": response}
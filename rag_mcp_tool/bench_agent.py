@@ -0,0 +1,86 @@
+"""Load test for the async agent graph against a local mock LLM.
+
+Runs the mock server in a background thread and fires concurrent
+``run_agent`` calls on a single event loop, which is what one uvicorn worker
+does. No OpenAI key or network access is needed.
+
+    python bench_agent.py --requests 500 --concurrency 256 --latency 0.5
+"""
+import argparse
+import asyncio
+import math
+import os
+import statistics
+import threading
+import time
+
+import uvicorn
+
+from mock_llm_server import build_mock_app
+
+MOCK_HOST = "127.0.0.1"
+MOCK_PORT = 8100
+
+
+def start_mock_server(latency, port: int = MOCK_PORT, **options) -> uvicorn.Server:
+    app = build_mock_app(latency, **options)
+    server = uvicorn.Server(uvicorn.Config(app, host=MOCK_HOST, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def run_load(total: int, concurrency: int):
+    # Imported late so OPENAI_API_KEY is set before the client is built.
+    from agent_graph import configure_llm, run_agent
+
+    configure_llm(
+        base_url=f"http://{MOCK_HOST}:{MOCK_PORT}/v1",
+        max_concurrency=concurrency,
+    )
+    mcp = {"context": [{"content": "The payment terms are net 30."}]}
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            await run_agent(f"question {i}", mcp)
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - start, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "mock-key")
+    server = start_mock_server(args.latency)
+
+    elapsed, latencies, errors = asyncio.run(run_load(args.requests, args.concurrency))
+    server.should_exit = True
+
+    latencies.sort()
+    print(f"requests:        {args.requests}")
+    print(f"errors:          {errors}")
+    print(f"elapsed:         {elapsed:.2f}s")
+    print(f"throughput:      {args.requests / elapsed:.1f} req/s")
+    print(f"peak in-flight:  {server.config.app.state.peak_in_flight}")
+    if latencies:
+        print(f"latency p50:     {statistics.median(latencies):.3f}s")
+        # Nearest rank: the smallest latency at or above 99% of the samples.
+        print(f"latency p99:     {latencies[math.ceil(len(latencies) * 0.99) - 1]:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
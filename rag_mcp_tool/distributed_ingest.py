@@ -0,0 +1,269 @@
+"""Multi-node ingest: work units in a shared queue, FAISS segments, one merge.
+
+    python distributed_ingest.py plan /mnt/corpus --job corpus-2024-06
+    python distributed_ingest.py work --job corpus-2024-06          # on every node
+    python distributed_ingest.py status --job corpus-2024-06
+    python distributed_ingest.py merge --job corpus-2024-06 [--base current]
+
+``plan`` groups the corpus files into units of about ``--unit-mb`` and
+enqueues them (ingest/work_queue.py; ``ingest_queue_path`` in config.yaml).
+Each worker claims a unit and then parses, chunks and embeds its files. It
+writes an fp32 FAISS segment under ``ingest_segments_path`` and records the
+segment in the queue.
+
+A segment is written to a staging directory and renamed into place, and its
+path only counts once ``complete`` succeeds under the worker's lease. A node
+that crashes, or loses its lease, therefore leaves nothing that gets merged,
+and its unit is retried elsewhere.
+
+``merge`` runs once every unit is done. It copies the segments' vectors
+(no re-embedding) into a store with the configured storage precision,
+skipping chunk IDs already present, and publishes the result as a new
+index version (index_versions.py). With ``--base current`` the segments
+are added to the version being served instead of a new empty index.
+
+Chunk IDs include the file path, so all nodes must see the corpus under the
+same path.
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import socket
+import threading
+import uuid
+from typing import Dict, List, Tuple
+
+from embeddings import get_embedding_model, load_config
+from index_versions import prune_versions, publish_version
+from rag import load_and_split_records, split_options
+from vector_store import empty_vector_store, has_vector_store, load_vector_store
+from ingest.ingest_manifest import chunk_ids
+from ingest.work_queue import WorkQueue
+
+
+def queue_path(config) -> str:
+    return config.get("ingest_queue_path", os.path.join(config["vector_store_path"], "ingest_queue.sqlite"))
+
+
+def segments_root(config, job: str) -> str:
+    return os.path.join(config.get("ingest_segments_path",
+                                   os.path.join(config["vector_store_path"], "segments")), job)
+
+
+def plan_units(root: str, unit_bytes: int) -> List[Tuple[str, Dict]]:
+    """Consecutive files grouped into units of roughly ``unit_bytes``.
+
+    Unit IDs are the unit's position plus a digest of its files' paths, sizes
+    and mtimes, so planning the same corpus twice yields the same units.
+    """
+    files = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            files.append(os.path.abspath(os.path.join(dirpath, name)))
+    files.sort()
+
+    units, group, group_bytes = [], [], 0
+    for path in files:
+        group.append(path)
+        group_bytes += os.path.getsize(path)
+        if group_bytes >= unit_bytes:
+            units.append(group)
+            group, group_bytes = [], 0
+    if group:
+        units.append(group)
+
+    planned = []
+    for i, group in enumerate(units):
+        digest = hashlib.sha256()
+        for path in group:
+            stat = os.stat(path)
+            digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+        planned.append((f"{i:06d}-{digest.hexdigest()[:12]}", {"files": group}))
+    return planned
+
+
+def build_segment(files: List[str], config, embedding_model, output: str) -> int:
+    """Chunks and embeds ``files`` into a FAISS store saved at ``output``."""
+    from langchain.vectorstores import FAISS
+
+    options = split_options(config)
+    docs, ids = [], []
+    for path in files:
+        records = load_and_split_records(path, **options)
+        file_ids = chunk_ids(path, records.texts())
+        docs.extend(records.to_documents(metadatas=[{"chunk_id": chunk_id} for chunk_id in file_ids]))
+        ids.extend(file_ids)
+    if docs:
+        FAISS.from_documents(docs, embedding_model, ids=ids).save_local(output)
+    return len(docs)
+
+
+def _keep_leased(queue: WorkQueue, unit, worker: str, lease_seconds: float, stop: threading.Event):
+    while not stop.wait(lease_seconds / 3):
+        if not queue.heartbeat(unit, worker, lease_seconds):
+            return
+
+
+def run_worker(queue: WorkQueue, job: str, config, worker: str, lease_seconds: float = 300.0) -> int:
+    """Processes units until none are left to claim; returns how many it completed."""
+    embedding_model = get_embedding_model(config)
+    root = segments_root(config, job)
+    os.makedirs(root, exist_ok=True)
+    completed = 0
+
+    while True:
+        unit = queue.claim(job, worker, lease_seconds)
+        if unit is None:
+            return completed
+        files = unit.payload["files"]
+        # One directory per attempt: a retry never touches an earlier attempt's output.
+        segment = os.path.join(root, f"{unit.unit_id}.a{unit.attempt}")
+        staging = f"{segment}.{worker}.tmp"
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=_keep_leased, args=(queue, unit, worker, lease_seconds, stop),
+                                     daemon=True)
+        heartbeat.start()
+        try:
+            shutil.rmtree(staging, ignore_errors=True)
+            chunks = build_segment(files, config, embedding_model, staging)
+            if chunks:
+                os.replace(staging, segment)
+        except Exception as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            queue.fail(unit, worker, f"{type(e).__name__}: {e}")
+            print(f"[{worker}] unit {unit.unit_id} attempt {unit.attempt} failed: {e}")
+            continue
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        result = {"segment": segment if chunks else None, "chunks": chunks, "files": len(files)}
+        if queue.complete(unit, worker, result):
+            completed += 1
+            print(f"[{worker}] unit {unit.unit_id}: {len(files)} files, {chunks} chunks")
+        else:
+            # The lease expired and another worker owns the unit; this output is never merged.
+            shutil.rmtree(segment, ignore_errors=True)
+
+
+def _add_batch(target, batch):
+    if batch:
+        target.add_embeddings([(text, vector) for text, vector, _, _ in batch],
+                              metadatas=[metadata for _, _, metadata, _ in batch],
+                              ids=[chunk_id for _, _, _, chunk_id in batch])
+
+
+def training_sample(segments: List[Tuple[str, int]], size: int, seed: int = 0):
+    """Up to ``size`` vectors drawn from every segment in proportion to its chunks.
+
+    ``segments`` are ``(path, chunks)`` pairs. Only the FAISS index files are
+    read, not the docstores.
+    """
+    import faiss
+    import numpy as np
+
+    total = sum(chunks for _, chunks in segments)
+    rng = np.random.default_rng(seed)
+    parts = []
+    for path, chunks in segments:
+        index = faiss.read_index(os.path.join(path, "index.faiss"))
+        take = min(index.ntotal, max(1, round(size * chunks / total))) if total > size else index.ntotal
+        vectors = index.reconstruct_n(0, index.ntotal)
+        parts.append(vectors[rng.choice(index.ntotal, size=take, replace=False)])
+    return np.concatenate(parts) if parts else None
+
+
+def merge_segments(queue: WorkQueue, job: str, config, embedding_model, base=None, batch_size: int = 1024,
+                   train_size: int = 65536):
+    """Combines the job's segments into ``base`` (or a new store).
+
+    An untrained target index (int8/fp16 storage) is trained first, on up to
+    ``train_size`` vectors sampled across all segments, so its value ranges
+    cover the whole corpus rather than the first batch added.
+
+    Returns ``(store, added, duplicates)``. Raises RuntimeError while any
+    unit is unfinished.
+    """
+    from langchain.vectorstores import FAISS
+
+    counts = queue.counts(job)
+    if counts["pending"] or counts["leased"] or counts["failed"]:
+        raise RuntimeError(f"Job {job} is not complete: {counts}")
+
+    target = base if base is not None else empty_vector_store(embedding_model, config)
+    results = [result for _, result in queue.results(job) if result.get("segment")]
+    if not target.index.is_trained and results:
+        sample = training_sample([(r["segment"], r["chunks"]) for r in results], train_size)
+        target.index.train(sample)
+
+    present = set(target.index_to_docstore_id.values())
+    added = duplicates = 0
+    for result in results:
+        segment = FAISS.load_local(result["segment"], embedding_model, allow_dangerous_deserialization=True)
+        vectors = segment.index.reconstruct_n(0, segment.index.ntotal)
+        batch = []
+        for position, chunk_id in sorted(segment.index_to_docstore_id.items()):
+            if chunk_id in present:
+                duplicates += 1
+                continue
+            present.add(chunk_id)
+            doc = segment.docstore.search(chunk_id)
+            batch.append((doc.page_content, vectors[position], doc.metadata, chunk_id))
+            if len(batch) >= batch_size:
+                _add_batch(target, batch)
+                added += len(batch)
+                batch = []
+        _add_batch(target, batch)
+        added += len(batch)
+    return target, added, duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=("plan", "work", "status", "merge"))
+    parser.add_argument("corpus", nargs="?", help="plan: directory to ingest")
+    parser.add_argument("--job", default="default")
+    parser.add_argument("--unit-mb", type=float, default=64)
+    parser.add_argument("--worker", default=f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}")
+    parser.add_argument("--lease-seconds", type=float, default=300)
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--retry-failed", action="store_true", help="status: requeue failed units")
+    parser.add_argument("--base", choices=("none", "current"), default="none",
+                        help="merge: start from an empty index or from the version being served")
+    parser.add_argument("--keep-segments", action="store_true")
+    args = parser.parse_args()
+
+    config = load_config()
+    queue = WorkQueue(queue_path(config), max_attempts=args.max_attempts)
+
+    if args.command == "plan":
+        if not args.corpus:
+            parser.error("plan needs a corpus directory")
+        units = plan_units(args.corpus, int(args.unit_mb * 2 ** 20))
+        new = queue.enqueue(args.job, units)
+        print(f"Job {args.job}: {len(units)} units planned, {new} newly queued")
+    elif args.command == "work":
+        completed = run_worker(queue, args.job, config, args.worker, args.lease_seconds)
+        print(f"[{args.worker}] done: {completed} units; queue {queue.counts(args.job)}")
+    elif args.command == "status":
+        if args.retry_failed:
+            print(f"Requeued {queue.retry_failed(args.job)} failed units")
+        print(f"Job {args.job}: {queue.counts(args.job)}")
+        for unit_id, error, attempts in queue.errors(args.job):
+            print(f"  {unit_id} (attempt {attempts}): {error}")
+    else:
+        embedding_model = get_embedding_model(config)
+        base = load_vector_store(config, embedding_model) \
+            if args.base == "current" and has_vector_store(config) else None
+        store, added, duplicates = merge_segments(queue, args.job, config, embedding_model, base)
+        version = publish_version(config["vector_store_path"], store.save_local)
+        prune_versions(config["vector_store_path"], config.get("index_keep_versions", 3))
+        print(f"Merged {added} chunks ({duplicates} duplicate IDs skipped); published index version {version}")
+        if not args.keep_segments:
+            shutil.rmtree(segments_root(config, args.job), ignore_errors=True)
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
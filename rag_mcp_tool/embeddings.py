@@ -1,18 +1,19 @@
+import os
+
 import yaml
 
 
 def load_config():
-    with open("config.yaml") as f:
+    # RAG_CONFIG points a service (e.g. one started by the loadtest harness) at another file.
+    with open(os.getenv("RAG_CONFIG", "config.yaml")) as f:
         return yaml.safe_load(f)
 
 
-def get_embedding_model(config):
-    if config["embedding_model"] == "openai":
-        from langchain.embeddings import OpenAIEmbeddings
-        return OpenAIEmbeddings(openai_api_key=config["openai_api_key"])
+EMBEDDING_KEYS = ("embedding_model", "openai_api_key", "embedding_base_url", "onnx_model_dir",
+                  "embedding_max_length", "embedding_batch_size", "embedding_workers")
 
-    elif config["embedding_model"] == "huggingface":
-        from langchain.embeddings import HuggingFaceEmbeddings
-        return HuggingFaceEmbeddings()
 
-    raise ValueError("Unsupported embedding model specified.")
+def get_embedding_model(config):
+    from llm.embedding_loader import load_embeddings
+
+    return load_embeddings({key: config[key] for key in EMBEDDING_KEYS if config.get(key) is not None})
@@ -0,0 +1,14 @@
+# gunicorn_conf.py
+# gunicorn -c gunicorn_conf.py api:app
+#
+# Loads the app (and, with `index_sharing: shared`, the memory-mapped index)
+# once in the master before forking, so workers share it copy-on-write.
+import multiprocessing
+import os
+
+os.environ["RAG_PRELOAD_INDEX"] = "1"
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
@@ -0,0 +1,59 @@
+"""Import-time profile of the service modules.
+
+Runs ``python -X importtime`` in a fresh interpreter and prints the slowest
+imports by cumulative time, plus a per-top-level-package summary so it is easy
+to spot an SDK that should not be on the start-up path.
+
+    python import_profile.py api --top 25
+"""
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+
+
+def profile_imports(module: str):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:   self |  cumulative | [indent]module"
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return rows, result.returncode, result.stderr
+
+
+def report(rows, top: int):
+    total_us = sum(self_us for _, self_us, _ in rows)
+    print(f"total import time: {total_us / 1000:.1f} ms over {len(rows)} modules\n")
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: -r[2])[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name.strip()}")
+
+    packages = defaultdict(int)
+    for name, self_us, _ in rows:
+        packages[name.strip().split(".")[0]] += self_us
+    print(f"\n{'self ms':>9}  top-level package")
+    for package, self_us in sorted(packages.items(), key=lambda p: -p[1])[:top]:
+        print(f"{self_us / 1000:>9.1f}  {package}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("module", nargs="?", default="api")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    rows, returncode, stderr = profile_imports(args.module)
+    if returncode != 0:
+        print(stderr.splitlines()[-1] if stderr else "import failed", file=sys.stderr)
+    report(rows, args.top)
+
+
+if __name__ == "__main__":
+    main()
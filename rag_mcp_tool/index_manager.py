@@ -0,0 +1,178 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from index_versions import IndexHandle, current_version, version_path
+from telemetry.telemetry import inc, observe, record_cache, set_gauge
+
+# Tenant IDs become directory names under tenants_root.
+TENANT_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+INDEX_FILES = ("index.faiss", "index.pkl")
+
+
+class UnknownTenantError(LookupError):
+    pass
+
+
+def index_size_bytes(path: str) -> int:
+    """Resident size estimate: the FAISS index and docstore are read into RAM.
+
+    vectors.f32 (rescoring) is memory-mapped and paged in on demand, so it is
+    not counted against the budget.
+    """
+    return sum(os.path.getsize(os.path.join(path, name))
+               for name in INDEX_FILES if os.path.exists(os.path.join(path, name)))
+
+
+class _Entry:
+    __slots__ = ("handle", "path", "size", "checked_at")
+
+    def __init__(self, handle: IndexHandle, path: str, size: int):
+        self.handle = handle
+        self.path = path
+        self.size = size
+        self.checked_at = time.monotonic()
+
+
+class TenantIndexManager:
+    """Loads one index per tenant on demand and keeps them under a RAM budget.
+
+    Each tenant has its own snapshot root ``<tenants_root>/<tenant>`` (see
+    index_versions; a flat legacy index also works). Indexes are kept in LRU
+    order; when a load pushes the resident total over ``ram_budget_bytes``,
+    least recently used tenants are evicted. An evicted index still in use is
+    released when its last lease ends. Concurrent requests for a tenant that
+    is not resident share a single load. Every ``refresh_seconds`` a resident
+    tenant's CURRENT pointer is re-read and a newly published version loaded.
+    """
+
+    def __init__(self, tenants_root: str, loader, ram_budget_bytes: int, refresh_seconds: float = 30.0):
+        self.tenants_root = tenants_root
+        self.loader = loader
+        self.ram_budget_bytes = ram_budget_bytes
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._loading = {}
+        self.resident_bytes = 0
+
+    def tenant_root(self, tenant: str) -> str:
+        if not TENANT_ID.match(tenant or ""):
+            raise UnknownTenantError(f"Invalid tenant id: {tenant!r}")
+        return os.path.join(self.tenants_root, tenant)
+
+    def _resolve(self, tenant: str):
+        root = self.tenant_root(tenant)
+        version = current_version(root)
+        if version is not None:
+            return version, version_path(root, version)
+        if os.path.exists(os.path.join(root, "index.faiss")):
+            return "legacy", root
+        raise UnknownTenantError(f"No index for tenant {tenant}")
+
+    def acquire(self, tenant: str) -> IndexHandle:
+        """Returns the tenant's handle with a lease taken; pair with release()."""
+        with self._lock:
+            entry = self._entries.get(tenant)
+            stale = entry is not None and time.monotonic() - entry.checked_at > self.refresh_seconds
+            if entry is not None and not stale:
+                self._entries.move_to_end(tenant)
+                entry.handle.leases += 1
+                record_cache("tenant_index", hit=True)
+                return entry.handle
+            future = self._loading.get(tenant)
+            leader = future is None
+            if leader:
+                future = self._loading[tenant] = Future()
+
+        if leader:
+            self._load(tenant, future, entry)
+        else:
+            inc("rag_tenant_index_coalesced_loads_total")
+        handle = future.result()
+        with self._lock:
+            evicted = handle.retired
+            if not evicted:
+                handle.leases += 1
+        # Evicted between load and lease (a burst of other tenants); try again.
+        return self.acquire(tenant) if evicted else handle
+
+    def _load(self, tenant: str, future: Future, current):
+        try:
+            version, path = self._resolve(tenant)
+            if current is not None and current.handle.version == version:
+                current.checked_at = time.monotonic()
+                handle = current.handle
+            else:
+                record_cache("tenant_index", hit=False)
+                start = time.perf_counter()
+                db = self.loader(path)
+                observe("index_load", time.perf_counter() - start, kind="tenant")
+                handle = IndexHandle(version, db)
+                self._admit(tenant, _Entry(handle, path, index_size_bytes(path)))
+            future.set_result(handle)
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._loading.pop(tenant, None)
+
+    def _admit(self, tenant: str, entry: _Entry):
+        with self._lock:
+            old = self._entries.pop(tenant, None)
+            if old is not None:
+                self._retire(old)
+            self._entries[tenant] = entry
+            self.resident_bytes += entry.size
+            # Evict LRU tenants, never the one just loaded.
+            while self.resident_bytes > self.ram_budget_bytes and len(self._entries) > 1:
+                _, victim = self._entries.popitem(last=False)
+                self._retire(victim)
+                inc("rag_tenant_index_evictions_total")
+            self._report()
+
+    def _retire(self, entry: _Entry):
+        self.resident_bytes -= entry.size
+        entry.handle.retired = True
+        entry.handle.release_if_drained()
+
+    def release(self, handle: IndexHandle):
+        with self._lock:
+            handle.leases -= 1
+            handle.release_if_drained()
+
+    @contextmanager
+    def lease(self, tenant: str):
+        handle = self.acquire(tenant)
+        try:
+            yield handle.db
+        finally:
+            self.release(handle)
+
+    def evict(self, tenant: str) -> bool:
+        with self._lock:
+            entry = self._entries.pop(tenant, None)
+            if entry is None:
+                return False
+            self._retire(entry)
+            self._report()
+            return True
+
+    def _report(self):
+        set_gauge("rag_tenant_indexes_resident", len(self._entries))
+        set_gauge("rag_tenant_index_resident_bytes", self.resident_bytes)
+        set_gauge("rag_tenant_index_budget_bytes", self.ram_budget_bytes)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "resident": len(self._entries),
+                "resident_bytes": self.resident_bytes,
+                "ram_budget_bytes": self.ram_budget_bytes,
+                "tenants": [{"tenant": t, "version": e.handle.version, "bytes": e.size, "leases": e.handle.leases}
+                            for t, e in reversed(self._entries.items())],
+            }
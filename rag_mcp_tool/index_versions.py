@@ -0,0 +1,237 @@
+"""Versioned index snapshots with atomic, drain-aware hot swap.
+
+Layout under a snapshot root (``vector_store_path`` by default):
+
+    versions/v000001/   one complete, immutable snapshot per publish
+    versions/v000002/
+    CURRENT             name of the version that should be served
+
+Publishing writes into a hidden staging directory, renames it into place and
+then replaces ``CURRENT`` with ``os.replace``, so readers never observe a half
+written snapshot. ``VersionedIndex`` polls ``CURRENT`` on a background thread,
+loads the new version off the request path and swaps a single reference.
+Requests hold a lease on the version they started with; the old version is
+released once its last lease is returned.
+
+Each serving process also records the versions it holds under ``leases/``
+(refreshed on every poll), and ``prune_versions``, run after a publish,
+deletes old snapshots except CURRENT and any version a live process holds.
+"""
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterable, List, Set
+
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+LEASES_DIR = "leases"
+# A lease record not refreshed for this long belongs to a process that is gone.
+LEASE_TTL = 300.0
+
+
+def list_versions(root: str):
+    versions_dir = os.path.join(root, VERSIONS_DIR)
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(v for v in os.listdir(versions_dir) if v.startswith("v") and not v.endswith(".tmp"))
+
+
+def version_path(root: str, version: str) -> str:
+    return os.path.join(root, VERSIONS_DIR, version)
+
+
+def current_version(root: str):
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def set_current_version(root: str, version: str):
+    if version not in list_versions(root):
+        raise ValueError(f"Unknown index version: {version}")
+    pointer = os.path.join(root, f".{CURRENT_FILE}.tmp")
+    with open(pointer, "w") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(root, CURRENT_FILE))
+
+
+def publish_version(root: str, write_snapshot) -> str:
+    """Writes a new snapshot via ``write_snapshot(path)`` and makes it current."""
+    existing = list_versions(root)
+    version = f"v{int(existing[-1][1:]) + 1 if existing else 1:06d}"
+    staging = version_path(root, f".{version}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    write_snapshot(staging)
+    os.replace(staging, version_path(root, version))
+    set_current_version(root, version)
+    return version
+
+
+def rollback(root: str, version: str = None) -> str:
+    """Points CURRENT at ``version``, or at the one published before the current one."""
+    if version is None:
+        versions = list_versions(root)
+        current = current_version(root)
+        older = [v for v in versions if current is None or v < current]
+        if not older:
+            raise ValueError("No earlier index version to roll back to")
+        version = older[-1]
+    set_current_version(root, version)
+    return version
+
+
+def hold_versions(root: str, holder: str, versions: Iterable[str]):
+    """Records the versions one serving process uses; an empty set clears it."""
+    versions = sorted(set(versions))
+    leases = os.path.join(root, LEASES_DIR)
+    path = os.path.join(leases, holder)
+    if not versions:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return
+    os.makedirs(leases, exist_ok=True)
+    staging = os.path.join(leases, f".{holder}.tmp")
+    with open(staging, "w") as f:
+        f.write("\n".join(versions))
+    os.replace(staging, path)
+
+
+def leased_versions(root: str, ttl: float = LEASE_TTL) -> Set[str]:
+    """Versions held by processes that refreshed their lease within ``ttl`` seconds."""
+    leases = os.path.join(root, LEASES_DIR)
+    if not os.path.isdir(leases):
+        return set()
+    held = set()
+    now = time.time()
+    for name in os.listdir(leases):
+        if name.startswith("."):
+            continue
+        path = os.path.join(leases, name)
+        try:
+            if now - os.path.getmtime(path) > ttl:
+                continue
+            with open(path) as f:
+                held.update(f.read().split())
+        except FileNotFoundError:
+            continue
+    return held
+
+
+def prune_versions(root: str, keep: int = 3, lease_ttl: float = LEASE_TTL) -> List[str]:
+    """Deletes all but the newest ``keep`` versions; returns the ones removed.
+
+    The current version and versions a serving process holds are never removed.
+    """
+    protected = leased_versions(root, lease_ttl) | {current_version(root)}
+    removed = []
+    for version in list_versions(root)[:-max(1, keep)]:
+        if version not in protected:
+            shutil.rmtree(version_path(root, version), ignore_errors=True)
+            removed.append(version)
+    return removed
+
+
+class IndexHandle:
+    """One loaded version plus a count of requests currently using it."""
+
+    def __init__(self, version: str, db):
+        self.version = version
+        self.db = db
+        self.leases = 0
+        self.retired = False
+
+    def release_if_drained(self):
+        if self.retired and self.leases == 0:
+            self.db = None
+
+
+class VersionedIndex:
+    """Serves the CURRENT version of a snapshot root and hot-swaps on change.
+
+    ``loader(path)`` turns a version directory into a queryable store; it runs
+    on the watcher thread, never on the request path.
+    """
+
+    def __init__(self, root: str, loader, interval: float = 5.0, handle: IndexHandle = None):
+        self.root = root
+        self.loader = loader
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._handle = handle
+        self._retired = []  # swapped-out handles that may still be leased
+        self._stop = threading.Event()
+        self.holder = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+    @property
+    def version(self):
+        return self._handle.version if self._handle else None
+
+    def load_current(self):
+        version = current_version(self.root)
+        if version is None:
+            raise FileNotFoundError(f"No published index version under {self.root}")
+        if version != self.version:
+            self.swap(version, self.loader(version_path(self.root, version)))
+        return version
+
+    def swap(self, version: str, db):
+        new_handle = IndexHandle(version, db)
+        with self._lock:
+            old_handle, self._handle = self._handle, new_handle
+            if old_handle is not None:
+                old_handle.retired = True
+                old_handle.release_if_drained()
+                self._retired.append(old_handle)
+        self.hold()
+
+    def held_versions(self) -> Set[str]:
+        """The served version plus retired ones still serving requests."""
+        with self._lock:
+            self._retired = [h for h in self._retired if h.db is not None]
+            handles = self._retired + ([self._handle] if self._handle else [])
+            return {h.version for h in handles}
+
+    def hold(self):
+        """Refreshes this process's lease record so prune_versions() skips its versions."""
+        try:
+            hold_versions(self.root, self.holder, self.held_versions())
+        except OSError as e:
+            print(f"Could not record index lease under {self.root}: {e}")
+
+    @contextmanager
+    def lease(self):
+        with self._lock:
+            handle = self._handle
+            if handle is None:
+                raise RuntimeError("Index is not loaded")
+            handle.leases += 1
+        try:
+            yield handle.db
+        finally:
+            with self._lock:
+                handle.leases -= 1
+                handle.release_if_drained()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.load_current()
+            except Exception as e:
+                print(f"Index watcher failed to load {current_version(self.root)}: {e}")
+            self.hold()
+
+    def start_watcher(self):
+        threading.Thread(target=self._run, name="index-watcher", daemon=True).start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        hold_versions(self.root, self.holder, ())
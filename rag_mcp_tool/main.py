@@ -1,26 +1,62 @@
 from embeddings import get_embedding_model, load_config
-from rag import load_and_split_documents, query_vector_store
-from vector_store import build_vector_store, save_vector_store, load_vector_store
-from mcp_utils import create_mcp_context
-import json
+from rag import load_and_split_documents, query_vector_store, sync_documents, split_options
+from vector_store import (build_vector_store, save_vector_store, load_vector_store, has_vector_store,
+                          empty_vector_store, index_report)
+from ingest.ingest_manifest import IngestManifest
+from mcp_utils import create_mcp_context, encode
+from index_versions import rollback
+import argparse
 import os
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", default="example_docs/sample.txt")
+    parser.add_argument("--publish", action="store_true",
+                        help="build a new index version from --docs even if one exists")
+    parser.add_argument("--sync", metavar="DIR",
+                        help="ingest only new/changed files under DIR and publish a new version")
+    parser.add_argument("--rollback", nargs="?", const="previous",
+                        help="serve an earlier version (default: the one before current)")
+    args = parser.parse_args()
+
     config = load_config()
     embedding_model = get_embedding_model(config)
 
-    if not os.path.exists(config["vector_store_path"]):
-        docs = load_and_split_documents("example_docs/sample.txt", config["chunk_size"], config["chunk_overlap"])
+    if args.rollback:
+        version = rollback(config["vector_store_path"], None if args.rollback == "previous" else args.rollback)
+        print(f"Rolled back to index version {version}")
+        return
+
+    if args.sync:
+        manifest = IngestManifest(config.get(
+            "manifest_path", os.path.join(config["vector_store_path"], "ingest_manifest.sqlite")))
+        db = load_vector_store(config, embedding_model) if has_vector_store(config) \
+            else empty_vector_store(embedding_model, config)
+        changed, commit_manifest = sync_documents(args.sync, db, manifest, config, config["embedding_model"])
+        if changed:
+            version = save_vector_store(db, config)
+            # Only once the new version is published do the synced files count as ingested.
+            commit_manifest()
+            print(f"{changed} files changed; published index version {version}")
+        else:
+            print("No changes; index version unchanged")
+    elif args.publish or not has_vector_store(config):
+        docs = load_and_split_documents(args.docs, **split_options(config))
         db = build_vector_store(docs, embedding_model, config)
-        save_vector_store(db, config)
+        report = index_report(db, config)
+        if report is not None:
+            from vector_db.quantization import format_report
+            print(f"FAISS {config['storage_precision']} index report:\n{format_report(report)}")
+        version = save_vector_store(db, config)
+        print(f"Published index version {version}")
     else:
         db = load_vector_store(config, embedding_model)
 
     query = "What are the key payment terms?"
-    results = query_vector_store(query, db)
+    results = query_vector_store(query, db, with_scores=True)
     mcp_context = create_mcp_context(query, results)
 
-    print(json.dumps(mcp_context, indent=2))
+    print(encode(mcp_context, indent=True).decode("utf-8"))
 
 if __name__ == "__main__":
     main()
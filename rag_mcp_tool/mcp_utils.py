@@ -1,18 +1,112 @@
-def create_mcp_context(query, retrieved_docs):
-    context_blocks = [
-        {
-            "type": "document",
-            "role": "retriever",
-            "name": f"chunk_{i}",
-            "content": doc.page_content
-        } for i, doc in enumerate(retrieved_docs)
-    ]
-
-    return {
-        "metadata": {
-            "query": query,
-            "source": "vector_db_search",
-            "retrieved_at": "2025-04-08"
-        },
-        "context": context_blocks
-    }
+"""Typed MCP context and its wire encodings.
+
+``create_mcp_context`` builds slotted dataclasses once, from the retrieved
+documents, and ``encode`` hands them straight to orjson (or msgpack), which
+serializes dataclasses natively; there is no intermediate dict and no
+pydantic pass per response.
+
+The response keeps the original ``{"metadata": {...}, "context": [...]}``
+shape; ``mode`` and the per-block chunk ID, hash, score and source are
+additions, so existing clients keep working.
+
+In reference mode a block carries its chunk ID and a content hash but no
+text. A client that caches chunks locally by ID checks the hash and asks for
+the full context only when it misses.
+"""
+import hashlib
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback; same output, slower
+    orjson = None
+
+MODES = ("full", "reference")
+MEDIA_TYPES = {"json": "application/json", "msgpack": "application/msgpack"}
+METADATA_KEYS = ("source", "page", "row", "start_index")
+
+
+@dataclass(slots=True)
+class ContextBlock:
+    name: str
+    chunk_id: str
+    content_hash: str
+    score: Optional[float] = None
+    source: Dict = field(default_factory=dict)
+    content: Optional[str] = None
+    type: str = "document"
+    role: str = "retriever"
+
+
+@dataclass(slots=True)
+class ContextMetadata:
+    query: str
+    retrieved_at: str
+    mode: str = "full"
+    source: str = "vector_db_search"
+
+
+@dataclass(slots=True)
+class MCPContext:
+    # Same top-level shape as the original dict response: {"metadata", "context"}.
+    metadata: ContextMetadata
+    context: List[ContextBlock]
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def create_mcp_context(query, retrieved_docs, mode: str = "full") -> MCPContext:
+    """``retrieved_docs`` are Documents or (Document, score) pairs."""
+    if mode not in MODES:
+        raise ValueError(f"Unsupported context mode: {mode}. Use one of {MODES}")
+
+    blocks = []
+    for i, item in enumerate(retrieved_docs):
+        doc, score = item if isinstance(item, tuple) else (item, None)
+        digest = content_hash(doc.page_content)
+        metadata = doc.metadata or {}
+        blocks.append(ContextBlock(
+            name=f"chunk_{i}",
+            # Ingested chunks carry their manifest ID; fall back to the content hash.
+            chunk_id=metadata.get("chunk_id") or digest,
+            content_hash=digest,
+            score=None if score is None else float(score),
+            source={key: metadata[key] for key in METADATA_KEYS if key in metadata},
+            content=doc.page_content if mode == "full" else None,
+        ))
+
+    return MCPContext(
+        metadata=ContextMetadata(
+            query=query,
+            retrieved_at=datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            mode=mode,
+        ),
+        context=blocks,
+    )
+
+
+def encode(context: MCPContext, fmt: str = "json", indent: bool = False) -> bytes:
+    if fmt == "msgpack":
+        import msgpack
+        return msgpack.packb(context.to_dict(), use_bin_type=True)
+    if fmt != "json":
+        raise ValueError(f"Unsupported context format: {fmt}. Use one of {tuple(MEDIA_TYPES)}")
+    if orjson is not None:
+        return orjson.dumps(context, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(context.to_dict(), indent=2 if indent else None,
+                      separators=None if indent else (",", ":")).encode("utf-8")
+
+
+def context_text(context) -> List[str]:
+    """Chunk texts of an MCPContext (or a decoded context dict)."""
+    if isinstance(context, MCPContext):
+        return [block.content for block in context.context if block.content is not None]
+    return [block["content"] for block in context.get("context", []) if block.get("content") is not None]
@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import json
+import struct
+import time
+import uuid
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import List, Dict, Any, Optional, Union
+
+# Minimal OpenAI-compatible chat completions and embeddings endpoints used by
+# bench_agent.py and the loadtest harness. Point the service at it with
+# `llm_base_url` / `embedding_base_url: "http://127.0.0.1:8100/v1"`.
+# Latencies are seconds, or zero-argument callables drawing one sample per
+# request (see loadtest/latency.py).
+MOCK_LATENCY = 0.5
+MOCK_EMBEDDING_DIM = 1536
+
+
+class ChatRequest(BaseModel):
+    model: str
+    messages: List[Dict[str, Any]]
+    stream: bool = False
+    stream_options: Optional[Dict[str, Any]] = None
+
+
+class EmbeddingRequest(BaseModel):
+    model: str = "text-embedding-ada-002"
+    input: Union[str, List[str], List[List[int]]]
+
+
+def mock_vector(text, dim: int) -> List[float]:
+    """Deterministic unit-scale vector, so repeated queries hit the same neighbours."""
+    seed = hashlib.sha256(str(text).encode("utf-8")).digest()
+    values = []
+    counter = 0
+    while len(values) < dim:
+        block = hashlib.sha256(seed + counter.to_bytes(4, "little")).digest()
+        values.extend(v / 2 ** 31 - 1.0 for v in struct.unpack("<8I", block))
+        counter += 1
+    return values[:dim]
+
+
+def _prompt_tokens(request: ChatRequest) -> int:
+    return sum(len(str(message.get("content", "")).split()) for message in request.messages)
+
+
+def _sample(latency) -> float:
+    return max(0.0, latency() if callable(latency) else latency)
+
+
+def build_mock_app(latency=MOCK_LATENCY, embed_latency=0.02, tokens: int = 3,
+                   dim: int = MOCK_EMBEDDING_DIM) -> FastAPI:
+    app = FastAPI(title="Mock LLM")
+    app.state.in_flight = 0
+    app.state.peak_in_flight = 0
+    app.state.embedding_requests = 0
+    words = (["Mock", " answer"] + [" token"] * max(0, tokens - 3) + ["."])[:max(1, tokens)]
+
+    async def stream_completion(request: ChatRequest, completion_id: str):
+        app.state.in_flight += 1
+        app.state.peak_in_flight = max(app.state.peak_in_flight, app.state.in_flight)
+        delay = _sample(latency)
+        try:
+            # Half the latency before the first token, the rest spread over tokens.
+            await asyncio.sleep(delay / 2)
+            for token in words:
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(delay / 2 / len(words))
+            if (request.stream_options or {}).get("include_usage"):
+                prompt_tokens = _prompt_tokens(request)
+                usage = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.model,
+                    "choices": [],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                              "total_tokens": prompt_tokens + len(words)},
+                }
+                yield f"data: {json.dumps(usage)}\n\n"
+            yield "data: [DONE]\n\n"
+        finally:
+            app.state.in_flight -= 1
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: ChatRequest):
+        if request.stream:
+            return StreamingResponse(
+                stream_completion(request, f"chatcmpl-{uuid.uuid4().hex}"),
+                media_type="text/event-stream",
+            )
+
+        app.state.in_flight += 1
+        app.state.peak_in_flight = max(app.state.peak_in_flight, app.state.in_flight)
+        try:
+            await asyncio.sleep(_sample(latency))
+        finally:
+            app.state.in_flight -= 1
+
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(words)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": _prompt_tokens(request), "completion_tokens": len(words),
+                      "total_tokens": _prompt_tokens(request) + len(words)},
+        }
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: EmbeddingRequest):
+        inputs = [request.input] if isinstance(request.input, str) else request.input
+        app.state.embedding_requests += 1
+        await asyncio.sleep(_sample(embed_latency))
+        return {
+            "object": "list",
+            "model": request.model,
+            "data": [{"object": "embedding", "index": i, "embedding": mock_vector(text, dim)}
+                     for i, text in enumerate(inputs)],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return {"in_flight": app.state.in_flight, "peak_in_flight": app.state.peak_in_flight,
+                "embedding_requests": app.state.embedding_requests}
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(build_mock_app(), host="127.0.0.1", port=8100)
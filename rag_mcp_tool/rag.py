@@ -1,12 +1,102 @@
-from langchain.document_loaders import TextLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from telemetry.telemetry import span
+from admission import check_deadline
+
+def load_and_split_documents(file_path, chunk_size=500, chunk_overlap=50, splitter="recursive",
+                             tokenizer="cl100k_base"):
+    from ingest.text_splitter import get_text_splitter
+
+    text_splitter = get_text_splitter(splitter, chunk_size, chunk_overlap, tokenizer=tokenizer)
+    if splitter == "token":
+        # Streamed from disk; the whole file is never held in memory.
+        with span("split", streaming="true"):
+            return text_splitter.split_file_documents(file_path)
+
+    from langchain.document_loaders import TextLoader
 
-def load_and_split_documents(file_path, chunk_size=500, chunk_overlap=50):
     loader = TextLoader(file_path)
-    docs = loader.load()
+    with span("load", loader="TextLoader"):
+        docs = loader.load()
+    with span("split"):
+        return text_splitter.split_documents(docs)
+
+def load_and_split_records(file_path, chunk_size=500, chunk_overlap=50, splitter="recursive",
+                           tokenizer="cl100k_base"):
+    """Like load_and_split_documents, as one ``ChunkBatch`` (ingest/chunk_records.py),
+    or a ``DocumentChunks`` view when the splitter returns Documents anyway.
+
+    Callers hash and diff ``texts()`` and build Documents only for the chunks
+    they write.
+    """
+    from ingest.chunk_records import DocumentChunks
+    from ingest.text_splitter import get_text_splitter
+
+    if splitter == "token":
+        text_splitter = get_text_splitter(splitter, chunk_size, chunk_overlap, tokenizer=tokenizer)
+        with span("split", streaming="true"):
+            return text_splitter.split_file_records(file_path)
+    # The recursive splitter builds Documents itself; use those as they are.
+    return DocumentChunks(load_and_split_documents(file_path, chunk_size, chunk_overlap, splitter, tokenizer))
+
+def split_options(config):
+    """Splitter settings from config.yaml, as keyword arguments for load_and_split_documents."""
+    return {
+        "chunk_size": config["chunk_size"],
+        "chunk_overlap": config["chunk_overlap"],
+        "splitter": config.get("splitter", "recursive"),
+        "tokenizer": config.get("tokenizer", "cl100k_base"),
+    }
+
+def query_vector_store(query, db, k=4, with_scores=False):
+    """Documents, or (Document, score) pairs when ``with_scores`` is set."""
+    check_deadline("search")
+    with span("search", backend="faiss"):
+        if with_scores:
+            return db.similarity_search_with_score(query, k=k)
+        return db.similarity_search(query, k=k)
+
+def sync_documents(root, db, manifest, config, embedding_key):
+    """Adds new/changed chunks under ``root`` to ``db`` and drops stale ones.
+
+    Returns ``(changed, commit_manifest)``: the number of files whose chunks
+    changed, and a callable that records them in the manifest. Call it only
+    after ``db`` has been saved; until then the manifest still describes the
+    published index, so an interrupted sync is simply redone next time.
+    Unchanged files are skipped from the manifest without being read.
+    """
+    import os
+    from ingest.ingest_manifest import PendingRecord, chunk_ids, diff_chunks
+    from ingest.text_splitter import chunker_key
+
+    options = split_options(config)
+    chunker = chunker_key(options["splitter"], options["chunk_size"], options["chunk_overlap"], options["tokenizer"])
+    pending, forgotten, seen = [], [], set()
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            seen.add(path)
+            check = manifest.check(path, chunker, embedding_key)
+            if check.status == "unchanged":
+                continue
+
+            records = load_and_split_records(path, **options)
+            ids = chunk_ids(path, records.texts())
+            to_add, stale = diff_chunks(check.entry, ids, reembed_all=check.config_changed)
+            if stale:
+                db.delete(stale)
+            if to_add:
+                docs = records.to_documents(to_add, [{"chunk_id": ids[i]} for i in to_add])
+                db.add_documents(docs, ids=[ids[i] for i in to_add])
+            pending.append(PendingRecord(path, check, chunker, embedding_key, ids))
+
+    prefix = os.path.join(root, "")
+    for path in manifest.paths():
+        if path.startswith(prefix) and path not in seen:
+            entry = manifest.lookup(path)
+            if entry and entry.chunk_ids:
+                db.delete(entry.chunk_ids)
+            forgotten.append(path)
 
-    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    return splitter.split_documents(docs)
+    def commit_manifest():
+        manifest.commit(pending, forgotten)
 
-def query_vector_store(query, db, k=4):
-    return db.similarity_search(query, k=k)
+    return len(pending) + len(forgotten), commit_manifest
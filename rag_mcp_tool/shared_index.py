@@ -0,0 +1,149 @@
+"""Read-only FAISS index layout that can be shared by forked workers.
+
+A pickled langchain FAISS store keeps every chunk as a Python ``Document`` in
+an ``InMemoryDocstore`` dict. Forked workers touch those objects' refcounts on
+every lookup, so copy-on-write duplicates the docstore into each worker.
+
+The shared layout instead stores, per version (see index_versions.py):
+
+    index.faiss   raw FAISS index (C++ buffers, never refcounted)
+    texts.bin     UTF-8 chunk texts, concatenated
+    meta.bin      JSON metadata per chunk, concatenated
+    offsets.npy   int64 [n + 1, 2] byte offsets into both files
+
+The index codes, texts and metadata are memory-mapped (texts and metadata
+decoded per hit), so they live in the page cache once for all workers, also
+after a hot swap, when workers attach a new version instead of inheriting it. ``publish`` writes a new version and flips
+``CURRENT``; each worker's ``VersionedIndex`` notices and re-attaches.
+"""
+import gc
+import json
+import logging
+import os
+
+import faiss
+import numpy as np
+from langchain.docstore.base import Docstore
+from langchain.schema import Document
+from langchain.vectorstores import FAISS
+
+from index_versions import current_version, prune_versions, publish_version, version_path
+
+logger = logging.getLogger(__name__)
+
+
+class MmapDocstore(Docstore):
+    """Docstore whose ids are row positions into memory-mapped text buffers."""
+
+    def __init__(self, path: str):
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.texts = np.memmap(os.path.join(path, "texts.bin"), dtype=np.uint8, mode="r") \
+            if os.path.getsize(os.path.join(path, "texts.bin")) else b""
+        self.metas = np.memmap(os.path.join(path, "meta.bin"), dtype=np.uint8, mode="r") \
+            if os.path.getsize(os.path.join(path, "meta.bin")) else b""
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def search(self, search: str):
+        i = int(search)
+        if i < 0 or i >= len(self):
+            return f"ID {search} not found."
+        (text_start, meta_start), (text_end, meta_end) = self.offsets[i], self.offsets[i + 1]
+        text = bytes(self.texts[text_start:text_end]).decode("utf-8")
+        metadata = json.loads(bytes(self.metas[meta_start:meta_end]) or b"{}")
+        return Document(page_content=text, metadata=metadata)
+
+    def add(self, texts):
+        raise NotImplementedError("Shared indexes are read-only; publish a new version instead.")
+
+
+class PositionalIds:
+    """``index_to_docstore_id`` replacement that does not allocate n strings."""
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def __getitem__(self, i):
+        if i < 0 or i >= self.size:
+            raise KeyError(i)
+        return str(i)
+
+    def get(self, i, default=None):
+        return str(i) if 0 <= i < self.size else default
+
+    def __len__(self):
+        return self.size
+
+
+def export_shared_index(db, path: str):
+    """Writes a langchain FAISS store into the shared layout at ``path``."""
+    os.makedirs(path, exist_ok=True)
+    faiss.write_index(db.index, os.path.join(path, "index.faiss"))
+
+    offsets = [(0, 0)]
+    with open(os.path.join(path, "texts.bin"), "wb") as texts, \
+            open(os.path.join(path, "meta.bin"), "wb") as metas:
+        for i in range(db.index.ntotal):
+            doc = db.docstore.search(db.index_to_docstore_id[i])
+            text_start, meta_start = offsets[-1]
+            text_start += texts.write(doc.page_content.encode("utf-8"))
+            meta_start += metas.write(json.dumps(doc.metadata, separators=(",", ":")).encode("utf-8"))
+            offsets.append((text_start, meta_start))
+    np.save(os.path.join(path, "offsets.npy"), np.asarray(offsets, dtype=np.int64))
+
+
+def read_mapped_index(index_file: str):
+    """Reads ``index_file`` with its vector codes memory-mapped, not copied.
+
+    ``IO_FLAG_MMAP`` only maps inverted lists; the flat indexes built here
+    keep their codes in an ``IndexFlatCodes`` buffer, which faiss maps only
+    with ``IO_FLAG_MMAP_IFC`` (faiss >= 1.8). Older faiss copies the codes
+    into every worker's heap, so per-worker RAM grows with the corpus.
+    """
+    mmap_ifc = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+    if mmap_ifc is not None:
+        return faiss.read_index(index_file, mmap_ifc)
+    logger.warning("faiss %s cannot map flat index codes; each worker loads its own copy of %s",
+                   getattr(faiss, "__version__", "?"), index_file)
+    try:
+        return faiss.read_index(index_file, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        return faiss.read_index(index_file)
+
+
+def attach_shared_index(path: str, embedding_model=None) -> FAISS:
+    """Opens a shared-layout version as a read-only langchain FAISS store."""
+    index = read_mapped_index(os.path.join(path, "index.faiss"))
+    docstore = MmapDocstore(path)
+    return FAISS(embedding_model, index, docstore, PositionalIds(len(docstore)))
+
+
+def publish(db, root: str) -> str:
+    """Exports ``db`` as a new shared version under ``root`` and makes it current."""
+    return publish_version(root, lambda path: export_shared_index(db, path))
+
+
+def preload_before_fork(root: str):
+    """Attaches the current version in the master and freezes the heap.
+
+    ``gc.freeze`` moves everything allocated so far into the permanent
+    generation, so the collector in each worker never writes to those pages.
+    """
+    version = current_version(root)
+    if version is None:
+        raise FileNotFoundError(f"No published shared index under {root}")
+    db = attach_shared_index(version_path(root, version))
+    gc.freeze()
+    return version, db
+
+
+if __name__ == "__main__":
+    # Convert the pickled store at vector_store_path into a new shared version.
+    from embeddings import load_config
+    from vector_store import load_vector_store
+
+    config = load_config()
+    root = config.get("shared_index_path", os.path.join(config["vector_store_path"], "shared"))
+    print("Published shared version", publish(load_vector_store(config, None), root))
+    prune_versions(root, config.get("index_keep_versions", 3))
@@ -1,15 +1,74 @@
-from langchain.vectorstores import FAISS
+import os
+
+from index_versions import current_version, prune_versions, publish_version, version_path
+
+# Vector store backends are imported on first use to keep API start-up light.
 # Future: from langchain.vectorstores import Chroma, Qdrant
 
 def build_vector_store(docs, embedding_model, config):
     if config["vector_store"] == "faiss":
-        return FAISS.from_documents(docs, embedding_model)
+        precision = config.get("storage_precision", "fp32")
+        if precision == "fp32":
+            from langchain.vectorstores import FAISS
+            return FAISS.from_documents(docs, embedding_model)
+
+        from vector_db.quantization import QuantizedFAISS
+        db = QuantizedFAISS.create(
+            embedding_model, config.get("vector_size", 1536),
+            precision, config.get("rescore_candidates", 0),
+        )
+        db.add_texts([d.page_content for d in docs], metadatas=[d.metadata for d in docs])
+        return db
+    raise NotImplementedError("Only FAISS is supported right now.")
+
+def index_report(db, config):
+    """Compression and recall of a quantized store (vector_db/quantization.py), else None.
+
+    Copies the index into an exact one, so callers run it on demand.
+    """
+    if config.get("storage_precision", "fp32") == "fp32":
+        return None
+    from vector_db.quantization import quantization_report
+    return quantization_report(db, recall_floor=config.get("recall_floor"))
+
+def empty_vector_store(embedding_model, config):
+    if config["vector_store"] == "faiss":
+        from vector_db.quantization import QuantizedFAISS
+        return QuantizedFAISS.create(
+            embedding_model, config.get("vector_size", 1536),
+            config.get("storage_precision", "fp32"), config.get("rescore_candidates", 0),
+        )
     raise NotImplementedError("Only FAISS is supported right now.")
 
 def save_vector_store(db, config):
+    """Publishes ``db`` as a new version under vector_store_path and returns it.
+
+    Older versions beyond ``index_keep_versions`` are then pruned.
+    """
     if config["vector_store"] == "faiss":
-        db.save_local(config["vector_store_path"])
+        version = publish_version(config["vector_store_path"], db.save_local)
+        prune_versions(config["vector_store_path"], config.get("index_keep_versions", 3))
+        return version
+
+def load_vector_store_version(path, embedding_model, config=None):
+    if config and config.get("storage_precision", "fp32") != "fp32":
+        from vector_db.quantization import QuantizedFAISS
+        return QuantizedFAISS.load_local(
+            path, embedding_model, allow_dangerous_deserialization=True,
+            rescore_candidates=config.get("rescore_candidates", 0),
+        )
+    from langchain.vectorstores import FAISS
+    return FAISS.load_local(path, embedding_model, allow_dangerous_deserialization=True)
 
 def load_vector_store(config, embedding_model):
     if config["vector_store"] == "faiss":
-        return FAISS.load_local(config["vector_store_path"], embedding_model, allow_dangerous_deserialization=True)
+        path = config["vector_store_path"]
+        version = current_version(path)
+        # Stores saved before versioning live directly in vector_store_path.
+        if version is not None:
+            path = version_path(path, version)
+        return load_vector_store_version(path, embedding_model, config)
+
+def has_vector_store(config):
+    path = config["vector_store_path"]
+    return current_version(path) is not None or os.path.exists(os.path.join(path, "index.faiss"))
@@ -0,0 +1,76 @@
+# langchain_telemetry.py
+import time
+from typing import Any, Dict, List
+from uuid import UUID
+
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.embeddings.base import Embeddings
+
+from telemetry.telemetry import is_enabled, observe, record_tokens, span
+
+
+class InstrumentedEmbeddings(Embeddings):
+    """Wraps an embedding model so every call is recorded as an ``embed`` span."""
+
+    def __init__(self, embeddings: Embeddings, model: str = None):
+        self.embeddings = embeddings
+        self.model = model or type(embeddings).__name__
+
+    def __getattr__(self, name):
+        return getattr(self.embeddings, name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with span("embed", model=self.model, kind="documents"):
+            vectors = self.embeddings.embed_documents(texts)
+        if is_enabled():
+            # Rough count (~4 chars per token) to avoid tokenizing twice.
+            record_tokens("embedding", sum(len(t) for t in texts) // 4, model=self.model)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        with span("embed", model=self.model, kind="query"):
+            return self.embeddings.embed_query(text)
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """Records retriever and LLM timings (incl. time to first token) for chains."""
+
+    def __init__(self):
+        self._starts: Dict[UUID, float] = {}
+        self._first_token_seen = set()
+
+    def on_retriever_start(self, serialized, query, *, run_id: UUID, **kwargs: Any):
+        self._starts[run_id] = time.time()
+
+    def on_retriever_end(self, documents, *, run_id: UUID, **kwargs: Any):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            observe("search", time.time() - start, backend="retriever")
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any):
+        self._starts[run_id] = time.time()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any):
+        self._starts[run_id] = time.time()
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any):
+        if run_id in self._first_token_seen or run_id not in self._starts:
+            return
+        self._first_token_seen.add(run_id)
+        observe("llm_ttft", time.time() - self._starts[run_id])
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        start = self._starts.pop(run_id, None)
+        self._first_token_seen.discard(run_id)
+        if start is not None:
+            observe("llm_total", time.time() - start)
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage:
+            record_tokens("prompt", usage.get("prompt_tokens", 0))
+            record_tokens("completion", usage.get("completion_tokens", 0))
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs: Any):
+        start = self._starts.pop(run_id, None)
+        self._first_token_seen.discard(run_id)
+        if start is not None:
+            observe("llm_total", time.time() - start, error=type(error).__name__)
@@ -0,0 +1,203 @@
+# telemetry.py
+"""Per-stage latency, token and cache metrics for the RAG pipeline.
+
+Stages recorded across the code base:
+
+    load, split, embed, index_write, search, rerank, prompt_build,
+    llm_ttft (time to first token), llm_total
+
+Usage::
+
+    from telemetry.telemetry import span, record_tokens
+
+    with span("search", backend="faiss"):
+        docs = db.similarity_search(query)
+
+Metrics are kept in-process and rendered in Prometheus text format by
+``render_prometheus()`` (served on ``/metrics`` by the API). Completed spans
+can also be forwarded to exporters such as OpenTelemetry via ``add_exporter``
+or ``use_opentelemetry``.
+
+Telemetry is off unless ``enable()`` is called or ``RAG_TELEMETRY=1`` is set.
+While off, ``span()`` returns a shared no-op context manager and the record
+functions return after a single flag check.
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+STAGES = (
+    "load", "split", "embed", "index_write", "search", "rerank",
+    "prompt_build", "llm_ttft", "llm_total",
+)
+
+# Seconds; covers sub-millisecond cache lookups up to slow LLM calls.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_enabled = os.getenv("RAG_TELEMETRY", "0") == "1"
+_lock = threading.Lock()
+_exporters: List[Callable] = []
+
+# (stage, labels) -> [bucket counts..., +Inf count, sum]
+_histograms: Dict[Tuple, List[float]] = {}
+# (name, labels) -> value
+_counters: Dict[Tuple, float] = {}
+# (name, labels) -> value
+_gauges: Dict[Tuple, float] = {}
+
+
+def enable(enabled: bool = True):
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+        _gauges.clear()
+
+
+def add_exporter(exporter: Callable[[str, float, float, Dict], None]):
+    """Registers ``exporter(stage, start_ts, end_ts, labels)`` for every span."""
+    _exporters.append(exporter)
+
+
+def use_opentelemetry(tracer=None):
+    """Forwards spans to OpenTelemetry (requires ``opentelemetry-api``)."""
+    from opentelemetry import trace
+
+    tracer = tracer or trace.get_tracer("rag")
+
+    def export(stage, start, end, labels):
+        otel_span = tracer.start_span(stage, start_time=int(start * 1e9), attributes=labels)
+        otel_span.end(end_time=int(end * 1e9))
+
+    add_exporter(export)
+
+
+def _key(name: str, labels: Dict) -> Tuple:
+    return (name, tuple(sorted(labels.items())))
+
+
+def observe(stage: str, seconds: float, **labels):
+    if not _enabled:
+        return
+    key = _key(stage, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                hist[i] += 1
+                break
+        else:
+            hist[len(LATENCY_BUCKETS)] += 1
+        hist[-1] += seconds
+
+
+def inc(name: str, value: float = 1, **labels):
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, **labels):
+    if not _enabled:
+        return
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def record_tokens(kind: str, count: int, **labels):
+    """``kind`` is prompt, completion or embedding."""
+    inc("rag_tokens_total", count, kind=kind, **labels)
+
+
+def record_cache(cache: str, hit: bool):
+    inc("rag_cache_requests_total", 1, cache=cache, result="hit" if hit else "miss")
+
+
+class _Span:
+    __slots__ = ("stage", "labels", "start")
+
+    def __init__(self, stage: str, labels: Dict):
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.time()
+        if exc_type is not None:
+            self.labels["error"] = exc_type.__name__
+        observe(self.stage, end - self.start, **self.labels)
+        for exporter in _exporters:
+            exporter(self.stage, self.start, end, self.labels)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(stage: str, **labels):
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Span(stage, labels)
+
+
+def _format_labels(labels: Tuple, extra: str = "") -> str:
+    parts = [f'{k}="{str(v)}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def render_prometheus() -> str:
+    lines = []
+    with _lock:
+        histograms = sorted(_histograms.items())
+        counters = sorted(_counters.items())
+        gauges = sorted(_gauges.items())
+
+    if histograms:
+        lines.append("# HELP rag_stage_seconds Time spent per pipeline stage.")
+        lines.append("# TYPE rag_stage_seconds histogram")
+    for (stage, labels), hist in histograms:
+        labels = (("stage", stage),) + labels
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), hist):
+            cumulative += count
+            le = 'le="%s"' % bound
+            lines.append(f"rag_stage_seconds_bucket{_format_labels(labels, le)} {cumulative}")
+        lines.append(f"rag_stage_seconds_sum{_format_labels(labels)} {hist[-1]}")
+        lines.append(f"rag_stage_seconds_count{_format_labels(labels)} {cumulative}")
+
+    seen = set()
+    for kind, metrics in (("counter", counters), ("gauge", gauges)):
+        for (name, labels), value in metrics:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "rag_mcp_tool"))
+
+from admission import (AdmissionController, DeadlineExceeded, Overloaded, bounded_timeout,
+                       cancel_on_disconnect, check_deadline, deadline, remaining)
+
+
+class FakeRequest:
+    def __init__(self, disconnect_after=None):
+        self.disconnect_after = disconnect_after
+
+    async def receive(self):
+        if self.disconnect_after is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.disconnect_after)
+        return {"type": "http.disconnect"}
+
+
+class TestDeadline(unittest.TestCase):
+    def test_nested_deadline_only_shortens(self):
+        self.assertIsNone(remaining())
+        self.assertEqual(bounded_timeout(30), 30)
+        with deadline(10):
+            with deadline(60):
+                self.assertLessEqual(remaining(), 10)
+            with deadline(0):
+                self.assertEqual(bounded_timeout(30), 0)
+                with self.assertRaises(DeadlineExceeded):
+                    check_deadline("llm")
+        self.assertIsNone(remaining())
+
+
+class TestAdmission(unittest.TestCase):
+    def test_queue_limit_and_fifo_handoff(self):
+        async def scenario():
+            controller = AdmissionController("query", max_concurrency=1, max_queue=1, timeout=5)
+            order = []
+
+            async def request(name, hold):
+                async with controller.admit():
+                    order.append(name)
+                    await asyncio.sleep(hold)
+
+            first = asyncio.ensure_future(request("first", 0.05))
+            await asyncio.sleep(0)
+            second = asyncio.ensure_future(request("second", 0))
+            await asyncio.sleep(0)
+            with self.assertRaises(Overloaded) as rejected:
+                await request("third", 0)
+            self.assertEqual(rejected.exception.reason, "queue_full")
+            self.assertGreaterEqual(rejected.exception.retry_after, 1)
+            await asyncio.gather(first, second)
+            self.assertEqual(order, ["first", "second"])
+            self.assertEqual((controller.in_flight, controller.queued), (0, 0))
+
+        asyncio.run(scenario())
+
+    def test_fast_fail_when_wait_exceeds_deadline(self):
+        async def scenario():
+            controller = AdmissionController("agent", max_concurrency=1, max_queue=10, timeout=60,
+                                             initial_service_time=2.0)
+            holder = asyncio.ensure_future(self._hold(controller, 0.1))
+            await asyncio.sleep(0)
+            start = time.monotonic()
+            with deadline(0.5):
+                with self.assertRaises(Overloaded) as rejected:
+                    await controller.acquire()
+            self.assertEqual(rejected.exception.reason, "deadline")
+            self.assertLess(time.monotonic() - start, 0.05)
+            await holder
+            # Short service times admit a queued request within the same deadline.
+            controller.service_time = 0.01
+            holder = asyncio.ensure_future(self._hold(controller, 0.05))
+            await asyncio.sleep(0)
+            with deadline(0.5):
+                async with controller.admit():
+                    pass
+            await holder
+
+        asyncio.run(scenario())
+
+    def test_client_deadline_cannot_extend_endpoint_timeout(self):
+        async def scenario():
+            controller = AdmissionController("query", max_concurrency=1, max_queue=1, timeout=5)
+            with deadline(3600):
+                async with controller.admit():
+                    self.assertLessEqual(remaining(), 5)
+            with deadline(1):
+                async with controller.admit():
+                    self.assertLessEqual(remaining(), 1)
+
+        asyncio.run(scenario())
+
+    @staticmethod
+    async def _hold(controller, seconds):
+        async with controller.admit():
+            await asyncio.sleep(seconds)
+
+    def test_cancel_on_disconnect(self):
+        async def scenario():
+            cancelled = asyncio.Event()
+
+            async def slow_llm_call():
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.set()
+                    raise
+
+            self.assertEqual(await cancel_on_disconnect(FakeRequest(0.01), slow_llm_call()), (False, None))
+            self.assertTrue(cancelled.is_set())
+
+            async def quick():
+                return "answer"
+
+            self.assertEqual(await cancel_on_disconnect(FakeRequest(), quick()), (True, "answer"))
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
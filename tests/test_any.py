@@ -311,11 +311,85 @@ def get_schema_reader(source_type: str, db_type: str = None, conn_details: dict
     else:
         raise ValueError(f"Unsupported source_type: {source_type}")
 
+# text_to_sql_schema/pool.py
+import queue
+import threading
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """Thread-safe pool of DB-API connections for one backend.
+
+    At most ``max_size`` connections exist; idle ones are reused most recently
+    used first and pinged before reuse, and a connection that fails its ping
+    or cannot be rolled back after an error is discarded and replaced.
+    """
+
+    def __init__(self, connect, max_size: int = 5, ping=None):
+        self._connect = connect
+        self._ping = ping
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.max_size = max_size
+
+    def _checkout(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            try:
+                if self._ping is not None:
+                    self._ping(conn)
+                return conn
+            except Exception:
+                _close_quietly(conn)
+
+    @contextmanager
+    def connection(self, timeout: float = 30.0):
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No connection available within {timeout}s (pool size {self.max_size})")
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn
+            conn.rollback()  # end any read transaction before the next borrower
+            self._idle.put(conn)
+        except BaseException:
+            if conn is not None:
+                try:
+                    conn.rollback()
+                    self._idle.put(conn)
+                except Exception:
+                    _close_quietly(conn)
+            raise
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                _close_quietly(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
 # text_to_sql_schema/schema.py
 import json
 import os
+import threading
+import time
+import urllib.parse
 from dotenv import load_dotenv
 from .readers.factory import get_schema_reader
+from .pool import ConnectionPool
 
 load_dotenv()
 
@@ -324,6 +398,8 @@ SCHEMA_CACHE = None
 
 class ConnectionDetailsFactory:
     _strategies = {}
+    _pools = {}
+    _pools_lock = threading.Lock()
 
     @classmethod
     def register(cls, db_type):
@@ -338,10 +414,76 @@ class ConnectionDetailsFactory:
             raise ValueError(f"Unsupported db_type: {db_type}")
         return cls._strategies[db_type].get_connection_details()
 
+    @classmethod
+    def strategy(cls, db_type):
+        if db_type not in cls._strategies:
+            raise ValueError(f"Unsupported db_type: {db_type}")
+        return cls._strategies[db_type]
+
+    @classmethod
+    def pool(cls, db_type, read_only: bool = True) -> ConnectionPool:
+        """Process-wide connection pool for ``db_type`` (size: SQL_POOL_SIZE).
 
-@ConnectionDetailsFactory.register("postgres")
-@ConnectionDetailsFactory.register("mysql")
-class DefaultSQLStrategy:
+        Read-only and read-write connections are pooled separately.
+        """
+        key = (db_type, read_only)
+        with cls._pools_lock:
+            if key not in cls._pools:
+                strategy = cls.strategy(db_type)
+                if not hasattr(strategy, "connect"):
+                    raise ValueError(f"SQL execution is not supported for db_type: {db_type}")
+                details = strategy.get_connection_details()
+                cls._pools[key] = ConnectionPool(
+                    lambda: strategy.connect(details, read_only=read_only),
+                    max_size=int(os.getenv("SQL_POOL_SIZE", 5)),
+                    ping=strategy.ping,
+                )
+            return cls._pools[key]
+
+    @classmethod
+    def close_pools(cls):
+        with cls._pools_lock:
+            for pool in cls._pools.values():
+                pool.close()
+            cls._pools.clear()
+
+
+class SQLExecutionStrategy:
+    """Connection, server-side cursor and statement timeout for one backend.
+
+    Subclasses override what their driver does differently; cursors must
+    stream rows from the server rather than buffer the whole result.
+
+    ``begin_read_only`` makes the database itself refuse writes for the next
+    statement. Where the database has no such mode, or it does not cover DDL,
+    DB_USER should be a login that can only read.
+    """
+
+    def ping(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        cursor.close()
+
+    def cursor(self, conn, batch_size: int):
+        cursor = conn.cursor()
+        cursor.arraysize = batch_size
+        return cursor
+
+    def set_statement_timeout(self, conn, seconds: float):
+        pass
+
+    def clear_statement_timeout(self, conn):
+        pass
+
+    def begin_read_only(self, conn):
+        pass
+
+    def end_read_only(self, conn):
+        pass
+
+
+class DefaultSQLStrategy(SQLExecutionStrategy):
     def get_connection_details(self):
         return {
             "host": os.getenv("DB_HOST"),
@@ -352,16 +494,90 @@ class DefaultSQLStrategy:
         }
 
 
+@ConnectionDetailsFactory.register("postgres")
+class PostgresStrategy(DefaultSQLStrategy):
+    def connect(self, details, read_only: bool = False):
+        import psycopg2
+        return psycopg2.connect(**details)
+
+    def begin_read_only(self, conn):
+        # First statement of the transaction; data-modifying CTEs, EXPLAIN
+        # ANALYZE of DML and writing functions then fail in the server.
+        cursor = conn.cursor()
+        cursor.execute("SET TRANSACTION READ ONLY")
+        cursor.close()
+
+    def cursor(self, conn, batch_size: int):
+        # A named cursor is server-side: rows arrive itersize at a time.
+        cursor = conn.cursor(name="execute_sql")
+        cursor.itersize = batch_size
+        return cursor
+
+    def set_statement_timeout(self, conn, seconds: float):
+        cursor = conn.cursor()
+        cursor.execute("SET LOCAL statement_timeout = %s", (int(seconds * 1000),))
+        cursor.close()
+
+
+@ConnectionDetailsFactory.register("mysql")
+class MySQLStrategy(DefaultSQLStrategy):
+    def connect(self, details, read_only: bool = False):
+        import pymysql
+        return pymysql.connect(**details)
+
+    def begin_read_only(self, conn):
+        # Session-wide rather than START TRANSACTION READ ONLY: DDL commits
+        # implicitly and would otherwise run in a fresh read-write transaction.
+        cursor = conn.cursor()
+        cursor.execute("SET SESSION TRANSACTION READ ONLY")
+        cursor.close()
+
+    def end_read_only(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("SET SESSION TRANSACTION READ WRITE")
+        cursor.close()
+
+    def cursor(self, conn, batch_size: int):
+        import pymysql.cursors
+        return conn.cursor(pymysql.cursors.SSCursor)  # unbuffered
+
+    def set_statement_timeout(self, conn, seconds: float):
+        cursor = conn.cursor()
+        cursor.execute("SET SESSION MAX_EXECUTION_TIME = %s", (int(seconds * 1000),))
+        cursor.close()
+
+    def clear_statement_timeout(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("SET SESSION MAX_EXECUTION_TIME = 0")
+        cursor.close()
+
+
 @ConnectionDetailsFactory.register("sqlite")
-class SQLiteStrategy:
+class SQLiteStrategy(SQLExecutionStrategy):
     def get_connection_details(self):
         return {
             "database": os.getenv("DB_NAME")
         }
 
+    def connect(self, details, read_only: bool = False):
+        import sqlite3
+        if read_only:
+            # The file is opened read-only, so no statement (PRAGMA included) can write it.
+            uri = "file:" + urllib.parse.quote(details["database"]) + "?mode=ro"
+            return sqlite3.connect(uri, uri=True, check_same_thread=False)
+        return sqlite3.connect(details["database"], check_same_thread=False)
+
+    def set_statement_timeout(self, conn, seconds: float):
+        # SQLite steps lazily, so the deadline covers fetching as well.
+        deadline = time.monotonic() + seconds
+        conn.set_progress_handler(lambda: int(time.monotonic() > deadline), 10_000)
+
+    def clear_statement_timeout(self, conn):
+        conn.set_progress_handler(None, 0)
+
 
 @ConnectionDetailsFactory.register("oracle")
-class OracleStrategy:
+class OracleStrategy(SQLExecutionStrategy):
     def get_connection_details(self):
         return {
             "host": os.getenv("DB_HOST"),
@@ -372,6 +588,26 @@ class OracleStrategy:
             "schema": os.getenv("DB_SCHEMA")
         }
 
+    def connect(self, details, read_only: bool = False):
+        import oracledb
+        dsn = oracledb.makedsn(details["host"], details["port"], service_name=details["service_name"])
+        return oracledb.connect(user=details["user"], password=details["password"], dsn=dsn)
+
+    def ping(self, conn):
+        conn.ping()
+
+    def begin_read_only(self, conn):
+        # Blocks DML; DDL commits implicitly in Oracle, so use a read-only login too.
+        cursor = conn.cursor()
+        cursor.execute("SET TRANSACTION READ ONLY")
+        cursor.close()
+
+    def set_statement_timeout(self, conn, seconds: float):
+        conn.call_timeout = int(seconds * 1000)
+
+    def clear_statement_timeout(self, conn):
+        conn.call_timeout = 0
+
 
 @ConnectionDetailsFactory.register("mongodb")
 class MongoDBStrategy:
@@ -383,7 +619,7 @@ class MongoDBStrategy:
 
 
 @ConnectionDetailsFactory.register("sqlserver")
-class SQLServerStrategy:
+class SQLServerStrategy(SQLExecutionStrategy):
     def get_connection_details(self):
         return {
             "server": os.getenv("DB_HOST"),
@@ -394,6 +630,26 @@ class SQLServerStrategy:
             "driver": os.getenv("DB_DRIVER")
         }
 
+    # No read-only transaction mode: pyodbc runs with autocommit off and SQL
+    # Server DDL is transactional, so the pool's rollback undoes writes; use a
+    # db_datareader login to refuse them outright.
+    def connect(self, details, read_only: bool = False):
+        import pyodbc
+        return pyodbc.connect(
+            f"DRIVER={details['driver']};"
+            f"SERVER={details['server']},{details['port']};"
+            f"DATABASE={details['database']};"
+            f"UID={details['user']};"
+            f"PWD={details['password']};"
+            f"TrustServerCertificate=yes;"
+        )
+
+    def set_statement_timeout(self, conn, seconds: float):
+        conn.timeout = max(1, int(seconds))  # pyodbc query timeout, whole seconds
+
+    def clear_statement_timeout(self, conn):
+        conn.timeout = 0
+
 def enrich_schema_with_descriptions(
     schema: Dict[str, TableSchema],
     desc_file_path: str
@@ -454,9 +710,9 @@ def filter_tables(schema: dict, include: dict) -> dict:
     return {table: columns for table, columns in schema.items() if match(table)}
 
 
-def get_or_load_cached_schema():
+def get_or_load_cached_schema(reload: bool = False):
     global SCHEMA_CACHE
-    if SCHEMA_CACHE is None:
+    if SCHEMA_CACHE is None or reload:
         full_schema = get_schema_from_db()
         include = {
             "exact": os.getenv("INCLUDE_TABLES_EXACT", "").split(",") if os.getenv("INCLUDE_TABLES_EXACT") else [],
@@ -477,27 +733,517 @@ def schema_to_prompt(schema: dict) -> str:
     return "\n".join(lines)
 
 
+# text_to_sql_schema/executor.py
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from .schema import ConnectionDetailsFactory
+
+try:
+    import pyarrow as pa
+except ImportError:  # batches fall back to plain column dicts
+    pa = None
+
+# A quick first filter only; writes are refused by the database session
+# (SQLExecutionStrategy.begin_read_only).
+READ_ONLY = re.compile(r"^\s*(select|with|explain|show|describe|pragma)\b", re.IGNORECASE)
+_LEXEME = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/|(\$\w*\$).*?\1|;|[^'\"$;/-]+|.",
+                     re.DOTALL)
+
+
+@dataclass
+class ExecutionResult:
+    columns: List[str]
+    data: Dict[str, list]
+    row_count: int
+    truncated: Optional[str] = None  # "max_rows" or "max_bytes" when cut short
+    elapsed: float = 0.0
+    batches: int = 0
+
+    def to_json(self) -> str:
+        return json.dumps(self.__dict__, default=str)
+
+
+@dataclass
+class _Limits:
+    max_rows: int
+    max_bytes: int
+    rows: int = 0
+    bytes: int = 0
+    truncated: Optional[str] = field(default=None)
+    columns: List[str] = field(default_factory=list)
+
+
+def is_single_statement(sql: str) -> bool:
+    """True unless ``sql`` has a ``;`` (outside quotes and comments) followed by more SQL."""
+    ended = False
+    for match in _LEXEME.finditer(sql):
+        token = match.group(0)
+        if token == ";":
+            ended = True
+        elif ended and token.strip() and not token.startswith(("--", "/*")):
+            return False
+    return True
+
+
+def _column_names(description) -> List[str]:
+    """Cursor column names, suffixed ``_1``, ``_2``... where a name repeats (``a.id, b.id``)."""
+    names, seen = [], set()
+    for column in description or ():
+        name, n = column[0], 0
+        while name in seen:
+            n += 1
+            name = f"{column[0]}_{n}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def _columnar(columns: List[str], rows: list):
+    data = {name: [row[i] for row in rows] for i, name in enumerate(columns)}
+    if pa is not None:
+        return pa.RecordBatch.from_pydict(data)
+    return data
+
+
+def _batch_bytes(batch) -> int:
+    if pa is not None and isinstance(batch, pa.RecordBatch):
+        return batch.nbytes
+    return sum(len(str(value)) for values in batch.values() for value in values)
+
+
+def stream_sql(sql: str, db_type: Optional[str] = None, batch_size: int = 1000,
+               max_rows: int = 10_000, max_bytes: int = 16 * 1024 * 1024,
+               timeout: Optional[float] = None, read_only: bool = True) -> Iterator:
+    """Yields columnar batches (Arrow RecordBatches, or dicts without pyarrow).
+
+    Rows come from a server-side cursor ``batch_size`` at a time, so only one
+    batch is held here; iteration stops once ``max_rows`` rows or
+    ``max_bytes`` bytes have been yielded, and the statement is cancelled
+    after ``timeout`` seconds. The final ``_Limits``, with the column names
+    (known even when no row matched), is sent back through
+    ``StopIteration.value``.
+    """
+    db_type = db_type or os.getenv("DB_TYPE")
+    if not is_single_statement(sql):
+        raise ValueError("Only a single statement can be executed")
+    if read_only and not READ_ONLY.match(sql):
+        raise ValueError("Only read-only statements can be executed")
+    timeout = float(os.getenv("SQL_STATEMENT_TIMEOUT", 30)) if timeout is None else timeout
+    strategy = ConnectionDetailsFactory.strategy(db_type)
+    limits = _Limits(max_rows=max_rows, max_bytes=max_bytes)
+
+    with ConnectionDetailsFactory.pool(db_type, read_only).connection() as conn:
+        if read_only:
+            strategy.begin_read_only(conn)
+        strategy.set_statement_timeout(conn, timeout)
+        cursor = strategy.cursor(conn, batch_size)
+        try:
+            cursor.execute(sql)
+            limits.columns = _column_names(cursor.description)
+            while limits.rows < max_rows:
+                rows = cursor.fetchmany(min(batch_size, max_rows - limits.rows))
+                if not rows:
+                    break
+                batch = _columnar(limits.columns, rows)
+                limits.rows += len(rows)
+                limits.bytes += _batch_bytes(batch)
+                yield batch
+                if limits.bytes >= max_bytes:
+                    limits.truncated = "max_bytes"
+                    break
+            else:
+                # Hit max_rows: report truncation only if more rows were pending.
+                if cursor.fetchmany(1):
+                    limits.truncated = "max_rows"
+        finally:
+            cursor.close()
+            strategy.clear_statement_timeout(conn)
+            if read_only:
+                strategy.end_read_only(conn)
+    return limits
+
+
+def execute_sql_query(sql: str, **kwargs) -> ExecutionResult:
+    """Runs ``stream_sql`` and gathers its (bounded) batches into one result."""
+    start = time.perf_counter()
+    stream = stream_sql(sql, **kwargs)
+    data, batches = {}, 0
+    while True:
+        try:
+            batch = next(stream)
+        except StopIteration as done:
+            limits = done.value
+            break
+        batches += 1
+        if pa is not None and isinstance(batch, pa.RecordBatch):
+            batch = batch.to_pydict()
+        for name, values in batch.items():
+            data.setdefault(name, []).extend(values)
+    columns = limits.columns
+    return ExecutionResult(columns=columns, data={name: data.get(name, []) for name in columns},
+                           row_count=limits.rows, truncated=limits.truncated,
+                           elapsed=round(time.perf_counter() - start, 4), batches=batches)
+
+
+# text_to_sql_schema/sql_cache.py
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+def normalize_question(question: str) -> str:
+    """Whitespace and trailing punctuation do not change the SQL asked for.
+
+    Case is kept: "customer 'ACME'" and "customer 'acme'" select different
+    rows under a case-sensitive collation, so they must not share an entry.
+    """
+    return re.sub(r"\s+", " ", question).strip().rstrip("?.!;").strip()
+
+
+def table_fingerprints(schema: dict) -> Dict[str, str]:
+    return {
+        table: hashlib.sha256(json.dumps(meta, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+        for table, meta in schema.items()
+    }
+
+
+def schema_hash(schema: dict) -> str:
+    return hashlib.sha256(json.dumps(table_fingerprints(schema), sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def referenced_tables(sql: str, schema: dict) -> List[str]:
+    """Schema tables named in ``sql`` (quoted or not, any case)."""
+    words = {w.lower() for w in re.findall(r"[A-Za-z_][A-Za-z0-9_$]*", sql)}
+    return sorted(table for table in schema if table.lower() in words or table.lower().split(".")[-1] in words)
+
+
+class SQLCache:
+    """Generated SQL keyed by (normalized question, schema hash, model), in SQLite.
+
+    Each entry records the tables its SQL reads. ``migrate(old, new)`` runs on
+    schema reload: entries touching a changed or dropped table are deleted and
+    the rest are carried over to the new schema hash, so one altered table does
+    not flush every cached question.
+
+    With ``embed`` (a text -> vector callable) a miss falls back to the most
+    similar cached question for the same schema and model, if its cosine
+    similarity is at least ``similarity``.
+    """
+
+    def __init__(self, path: str = "sql_cache.sqlite", embed: Optional[Callable[[str], List[float]]] = None,
+                 similarity: float = 0.95):
+        self.embed = embed
+        self.similarity = similarity
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS sql_cache (
+                question TEXT NOT NULL,
+                schema_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                sql TEXT NOT NULL,
+                tables TEXT NOT NULL,
+                embedding BLOB,
+                created_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (question, schema_hash, model)
+            )"""
+        )
+        self._conn.commit()
+
+    def get(self, question: str, schema_version: str, model: str) -> Optional[str]:
+        key = normalize_question(question)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sql, question FROM sql_cache WHERE question = ? AND schema_hash = ? AND model = ?",
+                (key, schema_version, model),
+            ).fetchone()
+        if row is None and self.embed is not None:
+            row = self._nearest(key, schema_version, model)
+        if row is None:
+            return None
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sql_cache SET hits = hits + 1 WHERE question = ? AND schema_hash = ? AND model = ?",
+                (row[1], schema_version, model),
+            )
+            self._conn.commit()
+        return row[0]
+
+    def _nearest(self, key: str, schema_version: str, model: str):
+        query = self.embed(key)
+        query_norm = math.sqrt(sum(x * x for x in query)) or 1.0
+        best, best_score = None, self.similarity
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT sql, question, embedding FROM sql_cache "
+                "WHERE schema_hash = ? AND model = ? AND embedding IS NOT NULL",
+                (schema_version, model),
+            ).fetchall()
+        for sql, question, blob in rows:
+            vector = array("f")
+            vector.frombytes(blob)
+            norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+            score = sum(a * b for a, b in zip(query, vector)) / (query_norm * norm)
+            if score >= best_score:
+                best, best_score = (sql, question), score
+        return best
+
+    def put(self, question: str, schema_version: str, model: str, sql: str, tables: Iterable[str]):
+        key = normalize_question(question)
+        embedding = array("f", self.embed(key)).tobytes() if self.embed is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sql_cache (question, schema_hash, model, sql, tables, embedding, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, schema_version, model, sql, json.dumps(sorted(tables)), embedding, time.time()),
+            )
+            self._conn.commit()
+
+    def migrate(self, old_schema: dict, new_schema: dict) -> List[str]:
+        """Drops entries for changed tables, re-keys the rest; returns the changed tables."""
+        old, new = table_fingerprints(old_schema), table_fingerprints(new_schema)
+        changed = sorted(t for t in old.keys() | new.keys() if old.get(t) != new.get(t))
+        old_hash, new_hash = schema_hash(old_schema), schema_hash(new_schema)
+        if old_hash == new_hash:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT question, model, tables FROM sql_cache WHERE schema_hash = ?", (old_hash,)
+            ).fetchall()
+            stale = [(q, m) for q, m, tables in rows if set(json.loads(tables)) & set(changed)]
+            self._conn.executemany(
+                "DELETE FROM sql_cache WHERE question = ? AND schema_hash = ? AND model = ?",
+                [(q, old_hash, m) for q, m in stale],
+            )
+            self._conn.execute(
+                "UPDATE OR REPLACE sql_cache SET schema_hash = ? WHERE schema_hash = ?", (new_hash, old_hash)
+            )
+            self._conn.commit()
+        return changed
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM sql_cache")
+            self._conn.commit()
+
+
 # text_to_sql_schema/tools.py
+import os
 from mcp import tool, tool_server
+from .executor import execute_sql_query
 from .schema import get_or_load_cached_schema, get_schema_from_db, schema_to_prompt
+from .sql_cache import SQLCache, referenced_tables, schema_hash
 from your_sql_generation_module import generate_sql_from_text
 
 SCHEMA = get_or_load_cached_schema()
 SCHEMA_PROMPT = schema_to_prompt(SCHEMA)
+SCHEMA_HASH = schema_hash(SCHEMA)
+SQL_MODEL = os.getenv("SQL_MODEL", "default")
+
+
+def _question_embedder():
+    # Near-duplicate matching is opt-in: SQL_CACHE_SIMILARITY=0.95
+    if not os.getenv("SQL_CACHE_SIMILARITY"):
+        return None
+    from langchain.embeddings import OpenAIEmbeddings
+    return OpenAIEmbeddings().embed_query
+
+
+SQL_CACHE = SQLCache(
+    os.getenv("SQL_CACHE_PATH", "sql_cache.sqlite"),
+    embed=_question_embedder(),
+    similarity=float(os.getenv("SQL_CACHE_SIMILARITY", "0.95")),
+)
 
 
 @tool
 def text_to_sql(query: str) -> str:
-    return generate_sql_from_text(query, SCHEMA_PROMPT)
+    cached = SQL_CACHE.get(query, SCHEMA_HASH, SQL_MODEL)
+    if cached is not None:
+        return cached
+    sql = generate_sql_from_text(query, SCHEMA_PROMPT)
+    SQL_CACHE.put(query, SCHEMA_HASH, SQL_MODEL, sql, referenced_tables(sql, SCHEMA))
+    return sql
+
+
+@tool
+def execute_sql(sql: str, max_rows: int = 1000) -> str:
+    """Runs a read-only query against DB_TYPE and returns columnar JSON."""
+    max_rows = min(max_rows, int(os.getenv("SQL_MAX_ROWS", 10_000)))
+    result = execute_sql_query(sql, max_rows=max_rows,
+                               max_bytes=int(os.getenv("SQL_MAX_BYTES", 16 * 1024 * 1024)))
+    return result.to_json()
 
 
 @tool
 def reload_schema() -> str:
-    global SCHEMA, SCHEMA_PROMPT
-    SCHEMA = get_or_load_cached_schema()
-    SCHEMA_PROMPT = schema_to_prompt(SCHEMA)
-    return "Schema reloaded successfully."
+    global SCHEMA, SCHEMA_PROMPT, SCHEMA_HASH
+    new_schema = get_or_load_cached_schema(reload=True)
+    changed = SQL_CACHE.migrate(SCHEMA, new_schema)
+    SCHEMA, SCHEMA_PROMPT, SCHEMA_HASH = new_schema, schema_to_prompt(new_schema), schema_hash(new_schema)
+    if changed:
+        return f"Schema reloaded; cached SQL invalidated for tables: {', '.join(changed)}."
+    return "Schema reloaded successfully; no table changes."
 
 
 if __name__ == "__main__":
-    tool_server([text_to_sql, reload_schema]).run()
+    tool_server([text_to_sql, execute_sql, reload_schema]).run()
+
+
+# text_to_sql_schema/tests/test_executor.py
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from text_to_sql_schema.executor import execute_sql_query, is_single_statement, stream_sql
+from text_to_sql_schema.schema import ConnectionDetailsFactory
+
+
+class ExecuteSQLTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "test.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, customer TEXT, total REAL)")
+            conn.executemany("INSERT INTO orders (customer, total) VALUES (?, ?)",
+                             [(f"customer_{i % 7}", i * 1.5) for i in range(2500)])
+        os.environ["DB_NAME"] = path
+        ConnectionDetailsFactory.close_pools()
+
+    def tearDown(self):
+        ConnectionDetailsFactory.close_pools()
+        self.tmp.cleanup()
+
+    def test_streams_batches_and_truncates_at_max_rows(self):
+        batches = list(stream_sql("SELECT id, customer FROM orders ORDER BY id", db_type="sqlite",
+                                  batch_size=400, max_rows=1000))
+        self.assertEqual([b.num_rows if hasattr(b, "num_rows") else len(b["id"]) for b in batches],
+                         [400, 400, 200])
+
+        result = execute_sql_query("SELECT id FROM orders", db_type="sqlite", max_rows=1000)
+        self.assertEqual((result.row_count, result.truncated), (1000, "max_rows"))
+        result = execute_sql_query("SELECT COUNT(*) AS n FROM orders", db_type="sqlite")
+        self.assertEqual((result.data, result.truncated), ({"n": [2500]}, None))
+
+    def test_byte_limit_timeout_and_read_only(self):
+        result = execute_sql_query("SELECT customer FROM orders", db_type="sqlite",
+                                   batch_size=100, max_bytes=1)
+        self.assertEqual((result.row_count, result.truncated), (100, "max_bytes"))
+
+        slow = ("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) "
+                "SELECT COUNT(*) FROM n")
+        with self.assertRaises(sqlite3.OperationalError):
+            execute_sql_query(slow, db_type="sqlite", timeout=0.2)
+        with self.assertRaises(ValueError):
+            execute_sql_query("DELETE FROM orders", db_type="sqlite")
+
+        # The pooled connection survives both failures.
+        self.assertEqual(execute_sql_query("SELECT 1 AS one", db_type="sqlite").data, {"one": [1]})
+
+    def test_writes_are_refused_by_the_database(self):
+        with self.assertRaises(sqlite3.OperationalError):
+            execute_sql_query("PRAGMA user_version = 5", db_type="sqlite")
+        self.assertEqual(execute_sql_query("PRAGMA user_version", db_type="sqlite").data, {"user_version": [0]})
+
+    def test_empty_results_and_duplicate_names_keep_every_column(self):
+        result = execute_sql_query("SELECT id, customer FROM orders WHERE id < 0", db_type="sqlite")
+        self.assertEqual((result.columns, result.data, result.batches), (["id", "customer"],
+                                                                        {"id": [], "customer": []}, 0))
+
+        result = execute_sql_query("SELECT a.id, b.id, a.id AS id_1 FROM orders a JOIN orders b ON b.id = a.id + 1 "
+                                   "WHERE a.id = 1", db_type="sqlite")
+        self.assertEqual(result.columns, ["id", "id_1", "id_1_1"])
+        self.assertEqual(result.data, {"id": [1], "id_1": [2], "id_1_1": [1]})
+
+    def test_multiple_statements_are_rejected(self):
+        self.assertTrue(is_single_statement("SELECT ';' AS a, $x$;$x$ -- ; trailing\n;  "))
+        self.assertTrue(is_single_statement("SELECT 1; /* done */"))
+        self.assertFalse(is_single_statement("SELECT 1; DELETE FROM orders"))
+        self.assertFalse(is_single_statement("SELECT 'a'';'; DROP TABLE orders"))
+        with self.assertRaises(ValueError):
+            execute_sql_query("SELECT 1; DELETE FROM orders", db_type="sqlite")
+        self.assertEqual(execute_sql_query("SELECT COUNT(*) AS n FROM orders", db_type="sqlite").data,
+                         {"n": [2500]})
+
+
+# text_to_sql_schema/tests/test_sql_cache.py
+import os
+import tempfile
+import unittest
+
+from text_to_sql_schema.sql_cache import SQLCache, normalize_question, referenced_tables, schema_hash
+
+SCHEMA = {
+    "orders": {"columns": [{"name": "id", "type": "INTEGER"}, {"name": "customer", "type": "TEXT"}]},
+    "customers": {"columns": [{"name": "name", "type": "TEXT"}]},
+}
+
+
+class SQLCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite")
+        self.cache = SQLCache(self.path)
+        self.version = schema_hash(SCHEMA)
+
+    def tearDown(self):
+        self.cache._conn.close()
+        self.tmp.cleanup()
+
+    def test_keyed_by_question_schema_and_model(self):
+        self.cache.put("How many orders?", self.version, "m1", "SELECT COUNT(*) FROM orders", ["orders"])
+        self.assertEqual(self.cache.get("  How   many orders ", self.version, "m1"), "SELECT COUNT(*) FROM orders")
+        self.assertIsNone(self.cache.get("How many orders?", self.version, "m2"))
+        self.assertIsNone(self.cache.get("How many orders?", "other-schema", "m1"))
+        self.assertIsNone(self.cache.get("How many customers?", self.version, "m1"))
+
+    def test_literals_keep_their_case(self):
+        self.assertNotEqual(normalize_question("orders for customer 'ACME'"),
+                            normalize_question("orders for customer 'acme'"))
+        self.cache.put("orders for customer 'ACME'", self.version, "m",
+                       "SELECT * FROM orders WHERE customer = 'ACME'", ["orders"])
+        self.assertIsNone(self.cache.get("orders for customer 'acme'", self.version, "m"))
+
+    def test_migrate_keeps_entries_of_unchanged_tables(self):
+        self.cache.put("orders", self.version, "m", "SELECT * FROM orders", ["orders"])
+        self.cache.put("names", self.version, "m", "SELECT name FROM customers", ["customers"])
+        altered = dict(SCHEMA, customers={"columns": [{"name": "name", "type": "VARCHAR(80)"}]})
+
+        self.assertEqual(self.cache.migrate(SCHEMA, altered), ["customers"])
+        new_version = schema_hash(altered)
+        self.assertEqual(self.cache.get("orders", new_version, "m"), "SELECT * FROM orders")
+        self.assertIsNone(self.cache.get("names", new_version, "m"))
+        self.assertIsNone(self.cache.get("orders", self.version, "m"))
+        self.assertEqual(self.cache.migrate(altered, altered), [])
+
+    def test_similar_question_hits_only_with_embeddings(self):
+        vectors = {"How many orders": [1.0, 0.0], "Number of orders": [0.99, 0.1], "List customers": [0.0, 1.0]}
+        cache = SQLCache(os.path.join(self.tmp.name, "similar.sqlite"), embed=vectors.__getitem__, similarity=0.95)
+        try:
+            cache.put("How many orders?", self.version, "m", "SELECT COUNT(*) FROM orders", ["orders"])
+            self.assertEqual(cache.get("Number of orders?", self.version, "m"), "SELECT COUNT(*) FROM orders")
+            self.assertIsNone(cache.get("List customers", self.version, "m"))
+            self.assertIsNone(cache.get("Number of orders?", self.version, "other-model"))
+        finally:
+            cache._conn.close()
+        # Without an embedder only exact (normalized) questions hit.
+        self.cache.put("How many orders?", self.version, "m", "SELECT COUNT(*) FROM orders", ["orders"])
+        self.assertIsNone(self.cache.get("Number of orders?", self.version, "m"))
+
+    def test_referenced_tables(self):
+        self.assertEqual(referenced_tables('SELECT * FROM "Orders" JOIN customers c ON 1=1', SCHEMA),
+                         ["customers", "orders"])
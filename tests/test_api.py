@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "rag_mcp_tool"))
+
+try:
+    from fastapi.testclient import TestClient
+    import api
+except ImportError:
+    api = None
+
+
+class Doc:
+    def __init__(self, page_content, metadata=None):
+        self.page_content = page_content
+        self.metadata = metadata or {}
+
+
+@unittest.skipIf(api is None, "fastapi and the service dependencies are required")
+class TestQueryResponse(unittest.TestCase):
+    def setUp(self):
+        self.saved = api.retrieve, api.admission
+
+        async def retrieve(tenant, query):
+            return [(Doc("Payment is due net 30.", {"source": "a.pdf", "page": 3, "chunk_id": "c1"}), 0.12)]
+
+        api.retrieve = retrieve
+        api.admission = api.build_admission({})
+        api._ready.set()
+        self.client = TestClient(api.app)  # no context manager: warm-up is not started
+
+    def tearDown(self):
+        api.retrieve, api.admission = self.saved
+        api._ready.clear()
+
+    def test_query_json_shape_is_stable(self):
+        response = self.client.post("/query/", json={"query": "payment terms?"})
+        self.assertEqual(response.status_code, 200)
+        payload = json.loads(response.content)
+        # Clients written against the original response read these keys.
+        self.assertEqual(set(payload), {"metadata", "context"})
+        self.assertEqual(set(payload["metadata"]), {"query", "source", "retrieved_at", "mode"})
+        self.assertEqual(payload["metadata"]["query"], "payment terms?")
+        self.assertEqual(payload["metadata"]["source"], "vector_db_search")
+        self.assertEqual(payload["metadata"]["mode"], "full")
+        block, = payload["context"]
+        self.assertEqual({key: block[key] for key in ("type", "role", "name", "content")},
+                         {"type": "document", "role": "retriever", "name": "chunk_0",
+                          "content": "Payment is due net 30."})
+        self.assertEqual(set(block) - {"type", "role", "name", "content"},
+                         {"chunk_id", "content_hash", "score", "source"})
+
+    def test_reference_mode_keeps_the_shape_without_text(self):
+        payload = json.loads(self.client.post("/query/?mode=reference", json={"query": "q"}).content)
+        self.assertEqual(payload["metadata"]["mode"], "reference")
+        self.assertIsNone(payload["context"][0]["content"])
+
+
+if __name__ == "__main__":
+    unittest.main()
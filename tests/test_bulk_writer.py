@@ -0,0 +1,90 @@
+from vector_db.bulk_writer import BulkWriteError, bulk_write
+import threading
+import time
+import unittest
+
+try:
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import Distance, VectorParams
+    from langchain.embeddings import FakeEmbeddings
+    from langchain.vectorstores import Qdrant
+except ImportError:
+    QdrantClient = None
+
+
+class FlakyStore:
+    """Records upserts; fails the first ``failures`` attempts for chosen ids."""
+
+    def __init__(self, failures=None, latency=0.0):
+        self.points = {}
+        self.failures = dict(failures or {})
+        self.latency = latency
+        self.in_flight = self.peak = 0
+        self.lock = threading.Lock()
+
+    def write(self, texts, metadatas, ids):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            with self.lock:
+                for i in ids:
+                    if self.failures.get(i, 0):
+                        self.failures[i] -= 1
+                        raise ConnectionError(f"upsert of {i} failed")
+                self.points.update(zip(ids, texts))
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+class TestBulkWrite(unittest.TestCase):
+    def setUp(self):
+        self.texts = [f"chunk {i}" for i in range(100)]
+        self.ids = [f"id{i}" for i in range(100)]
+
+    def test_batches_run_in_parallel_and_report_progress(self):
+        store = FlakyStore(latency=0.02)
+        seen = []
+        result = bulk_write(store.write, self.texts, None, self.ids, batch_size=10, parallelism=4,
+                            progress=lambda r, total: seen.append((r.written, total)))
+        self.assertEqual((result.written, result.batches), (100, 10))
+        self.assertEqual(len(store.points), 100)
+        self.assertGreater(store.peak, 1)
+        self.assertLessEqual(store.peak, 4)
+        self.assertEqual(seen[-1], (100, 100))
+
+    def test_only_failed_batches_are_retried(self):
+        store = FlakyStore(failures={"id15": 2}, latency=0.0)
+        result = bulk_write(store.write, self.texts, None, self.ids, batch_size=10, backoff=0)
+        self.assertEqual(result.retries, 2)
+        self.assertEqual(len(store.points), 100)
+
+        store = FlakyStore(failures={"id15": 10, "id73": 10})
+        with self.assertRaises(BulkWriteError) as raised:
+            bulk_write(store.write, self.texts, None, self.ids, batch_size=10, max_retries=1, backoff=0)
+        self.assertEqual([b.index for b in raised.exception.result.failed], [1, 7])
+        self.assertEqual(raised.exception.result.written, 80)
+        self.assertEqual(len(raised.exception.failed_ids), 20)
+        self.assertEqual(len(store.points), 80)
+
+
+@unittest.skipIf(QdrantClient is None, "qdrant-client and langchain are required")
+class TestQdrantInMemory(unittest.TestCase):
+    def test_bulk_upsert_into_in_memory_qdrant(self):
+        client = QdrantClient(location=":memory:")
+        client.recreate_collection("rag_collection", vectors_config=VectorParams(size=8, distance=Distance.COSINE))
+        store = Qdrant(client=client, collection_name="rag_collection", embeddings=FakeEmbeddings(size=8))
+
+        import uuid
+        ids = [str(uuid.UUID(int=i)) for i in range(50)]
+        texts = [f"chunk {i}" for i in range(50)]
+        result = bulk_write(lambda t, m, i: store.add_texts(t, metadatas=m, ids=i, batch_size=len(t)),
+                            texts, [{"n": n} for n in range(50)], ids, batch_size=8, parallelism=3)
+        self.assertEqual(result.written, 50)
+        self.assertEqual(client.count("rag_collection").count, 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+from ingest.chunk_records import ChunkBatch, ChunkRecord
+from ingest.text_splitter import TextChunk, TokenTextChunker
+import io
+import os
+import tempfile
+import unittest
+
+try:
+    from langchain.schema import Document
+except ImportError:
+    Document = None
+
+
+TEXT = ("Payment is due within thirty days. Late fees apply. " * 30 + "\n\n   \n\nNew section.\n") * 20
+
+
+class TestChunkBatch(unittest.TestCase):
+    def setUp(self):
+        self.chunker = TokenTextChunker(60, 10, tokenizer="regex")
+        self.chunks = list(self.chunker.split_stream(io.StringIO(TEXT)))
+
+    def test_texts_match_chunks_and_overlap_is_shared(self):
+        batch = ChunkBatch.from_chunks("doc.txt", self.chunks)
+        self.assertEqual(batch.texts(), [c.text for c in self.chunks])
+        self.assertEqual(list(batch.offsets), [c.start for c in self.chunks])
+        self.assertLess(len(batch.buffer), sum(len(c.text) for c in self.chunks))
+        self.assertEqual(batch.texts([2, 0]), [self.chunks[2].text, self.chunks[0].text])
+
+    def test_gaps_and_unknown_offsets(self):
+        batch = ChunkBatch("doc.txt")
+        for chunk in [TextChunk("alpha beta", 0, 10), TextChunk(" beta gamma", 5, 16),
+                      TextChunk("delta", 40, 45), TextChunk("no offset", -1, -1), TextChunk("again", -1, -1)]:
+            batch.append(chunk.text, chunk.start)
+        self.assertEqual(batch.texts(), ["alpha beta", " beta gamma", "delta", "no offset", "again"])
+        self.assertEqual(batch.buffer, "alpha beta gammadeltano offsetagain")
+        self.assertEqual(batch[-1].text, "again")
+
+    def test_restarting_offsets_do_not_share_text(self):
+        class Page:
+            def __init__(self, text, start):
+                self.page_content, self.metadata = text, {"start_index": start}
+
+        # Pages loaded separately each count offsets from 0.
+        batch = ChunkBatch.from_documents("f.pdf", [Page("AAAA", 0), Page("BBBBBB", 0), Page("BBBBCC", 2)])
+        self.assertEqual(batch.texts(), ["AAAA", "BBBBBB", "BBBBCC"])
+        self.assertEqual(batch.buffer, "AAAABBBBBBCC")
+
+    def test_records_are_slotted_views_with_interned_source(self):
+        first = ChunkBatch("".join(["docs/", "a.txt"]))
+        second = ChunkBatch("".join(["docs/a", ".txt"]))
+        self.assertIs(first.source, second.source)
+        first.append("hello", 0)
+        record = first[0]
+        self.assertIsInstance(record, ChunkRecord)
+        self.assertFalse(hasattr(record, "__dict__"))
+        self.assertEqual((record.text, record.start_index, record.source), ("hello", 0, "docs/a.txt"))
+        with self.assertRaises(IndexError):
+            first[1]
+
+    def test_file_record_batches_match_file_chunks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "doc.txt")
+            with open(path, "w") as f:
+                f.write(TEXT)
+            batches = list(self.chunker.iter_file_record_batches(path, batch_size=7))
+            self.assertTrue(all(len(b) <= 7 for b in batches))
+            self.assertEqual([t for b in batches for t in b.texts()], [c.text for c in self.chunks])
+            self.assertEqual(self.chunker.split_file_records(path).texts(), [c.text for c in self.chunks])
+
+    @unittest.skipIf(Document is None, "langchain not installed")
+    def test_documents_only_at_the_boundary(self):
+        batch = ChunkBatch.from_chunks("doc.txt", self.chunks)
+        documents = batch.to_documents([1], [{"chunk_id": "c1"}])
+        self.assertEqual(documents[0].page_content, self.chunks[1].text)
+        self.assertEqual(documents[0].metadata,
+                         {"source": "doc.txt", "start_index": self.chunks[1].start, "chunk_id": "c1"})
+        split = self.chunker.split_documents([Document(page_content=TEXT, metadata={"source": "x", "page": 2})])
+        self.assertEqual([d.page_content for d in split], [c.text for c in self.chunks])
+        self.assertEqual(split[0].metadata, {"source": "x", "page": 2, "start_index": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
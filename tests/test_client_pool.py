@@ -0,0 +1,90 @@
+from vector_db.client_pool import config_key, pooled, reset
+from vector_db.vector_db_config import VectorDBConfig
+import threading
+import unittest
+
+try:
+    from qdrant_client import QdrantClient
+    from vector_db.client_pool import ensure_qdrant_collection
+except ImportError:
+    QdrantClient = None
+
+
+class FakeClient:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestClientPool(unittest.TestCase):
+    def tearDown(self):
+        reset()
+
+    def test_equal_configs_share_one_instance(self):
+        created = []
+
+        def factory():
+            created.append(FakeClient())
+            return created[-1]
+
+        a = pooled(("db",) + config_key(VectorDBConfig("qdrant", qdrant_url="http://q:6333")), factory)
+        b = pooled(("db",) + config_key(VectorDBConfig("qdrant", qdrant_url="http://q:6333")), factory)
+        c = pooled(("db",) + config_key(VectorDBConfig("qdrant", qdrant_url="http://other:6333")), factory)
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+        self.assertEqual(len(created), 2)
+
+    def test_reconnect_replaces_and_closes(self):
+        first = pooled(("qdrant", "url"), FakeClient)
+        second = pooled(("qdrant", "url"), FakeClient, reconnect=True)
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        self.assertIs(pooled(("qdrant", "url"), FakeClient), second)
+
+    def test_slow_build_does_not_block_other_keys(self):
+        release = threading.Event()
+        created = []
+
+        def slow_factory():
+            release.wait(5)
+            created.append(FakeClient())
+            return created[-1]
+
+        results = []
+        callers = [threading.Thread(target=lambda: results.append(pooled(("slow",), slow_factory)))
+                   for _ in range(3)]
+        for caller in callers:
+            caller.start()
+        # Built while the slow key's factory is still running.
+        self.assertIsInstance(pooled(("fast",), FakeClient), FakeClient)
+        release.set()
+        for caller in callers:
+            caller.join()
+        self.assertEqual(len(created), 1)
+        self.assertTrue(all(client is created[0] for client in results))
+
+    def test_failed_build_is_not_pooled(self):
+        def broken():
+            raise ConnectionError("refused")
+
+        with self.assertRaises(ConnectionError):
+            pooled(("qdrant", "down"), broken)
+        self.assertIsInstance(pooled(("qdrant", "down"), FakeClient), FakeClient)
+
+
+@unittest.skipIf(QdrantClient is None, "qdrant-client is required")
+class TestQdrantBootstrap(unittest.TestCase):
+    def test_collection_creation_is_idempotent(self):
+        client = QdrantClient(location=":memory:")
+        config = VectorDBConfig("qdrant", qdrant_url=":memory:", vector_size=8, storage_precision="int8")
+        self.assertTrue(ensure_qdrant_collection(client, config))
+        self.assertFalse(ensure_qdrant_collection(client, config))
+        self.assertEqual(client.get_collection("rag_collection").config.params.vectors.size, 8)
+
+        with self.assertRaises(ValueError):
+            ensure_qdrant_collection(client, VectorDBConfig("qdrant", qdrant_url=":memory:", vector_size=16))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import sys
+import threading
+import unittest
+
+try:
+    import numpy as np
+    from vector_db.diversity import mmr_select, pack_candidates, select
+except ImportError:
+    np = None
+
+try:
+    import faiss
+    from langchain.embeddings.base import Embeddings
+    from langchain.vectorstores import FAISS
+
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "vector_db"))
+    from vector_db_config import VectorDBConfig
+    from vector_db_factory import FAISSDB
+    from vector_db_interface import DiverseRetriever
+except ImportError:
+    FAISS = None
+
+
+def reference_mmr(query, candidates, k, lambda_mult):
+    query = query / np.linalg.norm(query)
+    candidates = candidates / np.linalg.norm(candidates, axis=1, keepdims=True)
+    picked = []
+    while len(picked) < min(k, len(candidates)):
+        scores = [
+            -np.inf if i in picked else
+            lambda_mult * float(c @ query) - (1 - lambda_mult) * max((float(c @ candidates[j]) for j in picked),
+                                                                       default=0.0)
+            for i, c in enumerate(candidates)
+        ]
+        picked.append(int(np.argmax(scores)))
+    return picked
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class TestDiversity(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.queries = rng.standard_normal((4, 16)).astype(np.float32)
+        self.candidates = rng.standard_normal((4, 12, 16)).astype(np.float32)
+
+    def test_mmr_matches_reference(self):
+        for lambda_mult in (0.0, 0.5, 1.0):
+            picks = mmr_select(self.queries, self.candidates, 5, lambda_mult)
+            for q in range(4):
+                self.assertEqual(list(picks[q]),
+                                 reference_mmr(self.queries[q], self.candidates[q], 5, lambda_mult))
+
+    def test_batch_matches_single_query(self):
+        for method in ("mmr", "dpp"):
+            batch = select(self.queries, self.candidates, 5, method)
+            for q in range(4):
+                single = select(self.queries[q:q + 1], self.candidates[q:q + 1], 5, method)
+                self.assertEqual(list(batch[q]), list(single[0]))
+
+    def test_mask_limits_picks(self):
+        candidates, mask = pack_candidates([list(self.candidates[0][:3]), [], list(self.candidates[2])], 12)
+        for method in ("mmr", "dpp"):
+            picks = select(self.queries[:3], candidates, 5, method, mask=mask)
+            self.assertEqual(sorted(picks[0][:3]), [0, 1, 2])
+            self.assertEqual(list(picks[0][3:]), [-1, -1])
+            self.assertEqual(list(picks[1]), [-1] * 5)
+            self.assertTrue((picks[2] >= 0).all())
+
+    def test_duplicates_are_avoided(self):
+        basis = np.eye(4, dtype=np.float32)
+        query = basis[:1]
+        related = [0.6 * basis[0] + 0.8 * basis[1], 0.6 * basis[0] + 0.8 * basis[2]]
+        candidates = np.stack([basis[0], basis[0], basis[0]] + related)[None]
+        for method in ("mmr", "dpp"):
+            picks = select(query, candidates, 3, method, lambda_mult=0.3)[0]
+            self.assertEqual(sorted(picks), [0, 3, 4], method)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            select(self.queries, self.candidates, 3, "random")
+
+
+if FAISS is not None:
+    class TableEmbeddings(Embeddings):
+        def __init__(self, table):
+            self.table = table
+
+        def embed_documents(self, texts):
+            return [list(self.table[text]) for text in texts]
+
+        def embed_query(self, text):
+            return list(self.table[text])
+
+
+@unittest.skipIf(FAISS is None, "faiss and langchain are required")
+class TestFAISSCandidates(unittest.TestCase):
+    def setUp(self):
+        basis = np.eye(4, dtype=np.float32)
+        self.table = {
+            "a": basis[0],
+            "a copy": basis[0],
+            "a near": 0.95 * basis[0] + 0.31 * basis[1],
+            "b": 0.6 * basis[0] + 0.8 * basis[1],
+            "c": 0.6 * basis[0] + 0.8 * basis[2],
+            "d": basis[3],
+            "q": basis[0],
+            "q2": 0.6 * basis[1] + 0.8 * basis[3],
+        }
+        self.texts = ["a", "a copy", "a near", "b", "c", "d"]
+
+    def faiss_db(self, precision):
+        embeddings = TableEmbeddings(self.table)
+        db = FAISSDB.__new__(FAISSDB)
+        db.config = VectorDBConfig("faiss", vector_size=4, storage_precision=precision)
+        db.embeddings = embeddings
+        db._write_lock = threading.Lock()
+        db._bulk_depth = 1  # nothing is saved to disk
+        if precision == "fp32":
+            db.vectorstore = FAISS.from_texts(self.texts, embeddings, ids=self.texts)
+        else:
+            db.vectorstore = db._empty_store()
+            db.add_texts(self.texts, ids=self.texts)
+        return db
+
+    def test_candidates_line_up_with_their_documents(self):
+        for precision in ("fp32", "int8"):
+            db = self.faiss_db(precision)
+            queries = [self.table["q"], self.table["q2"]]
+            docs, candidates, mask = db.candidates_by_vectors(queries, fetch_k=8)
+            self.assertEqual(candidates.shape, (2, 8, 4))
+            self.assertEqual(mask.sum(axis=1).tolist(), [6, 6])
+            for q in range(2):
+                self.assertEqual(len(docs[q]), 6)
+                for j, doc in enumerate(docs[q]):
+                    np.testing.assert_allclose(candidates[q, j], self.table[doc.page_content], atol=1e-6)
+
+    def test_retriever_matches_reference_mmr(self):
+        db = self.faiss_db("fp32")
+        fetched = db.vectorstore.similarity_search_by_vector(list(self.table["q"]), k=6)
+        vectors = np.stack([self.table[doc.page_content] for doc in fetched])
+        expected = [fetched[i].page_content for i in reference_mmr(self.table["q"], vectors, 3, 0.3)]
+
+        retriever = DiverseRetriever(vector_db=db, method="mmr",
+                                     search_kwargs={"k": 3, "fetch_k": 6, "lambda_mult": 0.3})
+        picked = [doc.page_content for doc in retriever.get_relevant_documents("q")]
+        self.assertEqual(picked, expected)
+        self.assertFalse({"a", "a copy"} <= set(picked))
+
+
+if __name__ == "__main__":
+    unittest.main()
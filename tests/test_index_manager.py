@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "rag_mcp_tool"))
+
+from index_manager import TenantIndexManager, UnknownTenantError
+from index_versions import publish_version
+
+
+def write_index(size):
+    def write(path):
+        with open(os.path.join(path, "index.faiss"), "wb") as f:
+            f.write(b"\0" * size)
+    return write
+
+
+class TestTenantIndexManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.loads = []
+        for tenant in ("acme", "globex", "initech"):
+            publish_version(os.path.join(self.tmp.name, tenant), write_index(400))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def loader(self, path):
+        self.loads.append(path)
+        time.sleep(0.05)
+        return {"path": path}
+
+    def manager(self, budget=1000):
+        return TenantIndexManager(self.tmp.name, self.loader, ram_budget_bytes=budget)
+
+    def test_lru_eviction_under_budget(self):
+        manager = self.manager()
+        for tenant in ("acme", "globex", "acme", "initech"):
+            with manager.lease(tenant) as db:
+                self.assertIn(tenant, db["path"])
+        stats = manager.stats()
+        self.assertEqual([t["tenant"] for t in stats["tenants"]], ["initech", "acme"])
+        self.assertEqual(stats["resident_bytes"], 800)
+        self.assertEqual(len(self.loads), 3)
+
+    def test_concurrent_loads_are_coalesced(self):
+        manager = self.manager()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(manager.acquire("acme"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.loads), 1)
+        self.assertEqual(len({id(h) for h in results}), 1)
+        self.assertEqual(results[0].leases, 8)
+
+    def test_evicted_index_is_released_after_last_lease(self):
+        manager = self.manager(budget=500)
+        handle = manager.acquire("acme")
+        with manager.lease("globex"):
+            pass
+        self.assertTrue(handle.retired)
+        self.assertIsNotNone(handle.db)
+        manager.release(handle)
+        self.assertIsNone(handle.db)
+
+    def test_unknown_and_invalid_tenants(self):
+        manager = self.manager()
+        with self.assertRaises(UnknownTenantError):
+            manager.acquire("nobody")
+        with self.assertRaises(UnknownTenantError):
+            manager.acquire("../etc")
+
+
+if __name__ == "__main__":
+    unittest.main()
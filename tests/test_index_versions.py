@@ -0,0 +1,88 @@
+from rag_mcp_tool.index_versions import (
+    VersionedIndex, hold_versions, prune_versions, publish_version, rollback, current_version,
+    list_versions, version_path, LEASES_DIR
+)
+import os
+import time
+import tempfile
+import unittest
+
+
+def write_snapshot(text):
+    def write(path):
+        with open(os.path.join(path, "data.txt"), "w") as f:
+            f.write(text)
+    return write
+
+
+def read_snapshot(path):
+    with open(os.path.join(path, "data.txt")) as f:
+        return f.read()
+
+
+class TestIndexVersions(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_publish_and_rollback(self):
+        self.assertEqual(publish_version(self.root, write_snapshot("one")), "v000001")
+        self.assertEqual(publish_version(self.root, write_snapshot("two")), "v000002")
+        self.assertEqual(list_versions(self.root), ["v000001", "v000002"])
+        self.assertEqual(current_version(self.root), "v000002")
+
+        self.assertEqual(rollback(self.root), "v000001")
+        self.assertEqual(current_version(self.root), "v000001")
+        self.assertEqual(read_snapshot(version_path(self.root, "v000001")), "one")
+
+        with self.assertRaises(ValueError):
+            rollback(self.root)
+
+    def test_swap_waits_for_in_flight_leases(self):
+        publish_version(self.root, write_snapshot("one"))
+        index = VersionedIndex(self.root, read_snapshot)
+        index.load_current()
+
+        with index.lease() as old_db:
+            old_handle = index._handle
+            publish_version(self.root, write_snapshot("two"))
+            index.load_current()
+
+            self.assertEqual(old_db, "one")
+            self.assertEqual(old_handle.db, "one")
+            with index.lease() as new_db:
+                self.assertEqual(new_db, "two")
+
+        self.assertIsNone(old_handle.db)
+        self.assertEqual(index.version, "v000002")
+
+    def test_prune_keeps_current_and_leased_versions(self):
+        for n in range(5):
+            publish_version(self.root, write_snapshot(str(n)))
+        rollback(self.root, "v000001")
+        hold_versions(self.root, "worker-a", ["v000002"])
+        hold_versions(self.root, "crashed", ["v000003"])
+        stale = time.time() - 3600
+        os.utime(os.path.join(self.root, LEASES_DIR, "crashed"), (stale, stale))
+
+        self.assertEqual(prune_versions(self.root, keep=1), ["v000003", "v000004"])
+        self.assertEqual(list_versions(self.root), ["v000001", "v000002", "v000005"])
+
+    def test_served_and_draining_versions_are_held(self):
+        publish_version(self.root, write_snapshot("one"))
+        index = VersionedIndex(self.root, read_snapshot)
+        index.load_current()
+        with index.lease():
+            publish_version(self.root, write_snapshot("two"))
+            publish_version(self.root, write_snapshot("three"))
+            index.load_current()
+            # v000001 still serves a request; v000002 was never loaded here.
+            self.assertEqual(prune_versions(self.root, keep=1), ["v000002"])
+        index.hold()
+        self.assertEqual(prune_versions(self.root, keep=1), ["v000001"])
+        index.stop_watcher()
+        self.assertEqual(os.listdir(os.path.join(self.root, LEASES_DIR)), [])
+
@@ -0,0 +1,102 @@
+from ingest.ingest_manifest import FileCheck, IngestManifest, IncrementalDiff, PendingRecord, chunk_ids, diff_chunks
+import os
+import sqlite3
+import tempfile
+import unittest
+
+
+class TestIngestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manifest = IngestManifest(os.path.join(self.tmp.name, "manifest.sqlite"))
+        self.path = os.path.join(self.tmp.name, "doc.txt")
+        self.write("alpha")
+
+    def tearDown(self):
+        self.manifest.close()
+        self.tmp.cleanup()
+
+    def write(self, text, mtime_ns=None):
+        with open(self.path, "w") as f:
+            f.write(text)
+        if mtime_ns:
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_unchanged_file_is_skipped(self):
+        check = self.manifest.check(self.path, "recursive:500:50", "openai")
+        self.assertEqual(check.status, "new")
+        self.manifest.record(self.path, check, "recursive:500:50", "openai", ["a"])
+
+        self.assertEqual(self.manifest.check(self.path, "recursive:500:50", "openai").status, "unchanged")
+
+        # Touched with identical content: still skipped.
+        self.write("alpha", mtime_ns=10 ** 18)
+        self.assertEqual(self.manifest.check(self.path, "recursive:500:50", "openai").status, "unchanged")
+
+    def test_changed_content_and_config(self):
+        check = self.manifest.check(self.path, "recursive:500:50", "openai")
+        self.manifest.record(self.path, check, "recursive:500:50", "openai", ["a"])
+
+        self.write("beta", mtime_ns=10 ** 18)
+        self.assertEqual(self.manifest.check(self.path, "recursive:500:50", "openai").status, "changed")
+
+        check = self.manifest.check(self.path, "recursive:500:50", "huggingface")
+        self.assertTrue(check.config_changed)
+
+    def test_commit_applies_records_and_removals_together(self):
+        other = os.path.join(self.tmp.name, "gone.txt")
+        with open(other, "w") as f:
+            f.write("gone")
+        self.manifest.record(other, self.manifest.check(other, "c", "e"), "c", "e", ["g"])
+
+        pending = PendingRecord(self.path, self.manifest.check(self.path, "c", "e"), "c", "e", ["a"])
+        # Nothing is visible until the caller commits (after saving its index).
+        self.assertIsNone(self.manifest.lookup(self.path))
+        self.manifest.commit([pending], forgotten=[other])
+        self.assertEqual(self.manifest.lookup(self.path).chunk_ids, ["a"])
+        self.assertEqual(self.manifest.paths(), [self.path])
+
+        broken = PendingRecord(os.path.join(self.tmp.name, "missing.txt"), FileCheck("new", 1, 1), "c", "e", [])
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.manifest.commit([broken], forgotten=[self.path])
+        self.assertEqual(self.manifest.paths(), [self.path])
+
+    def test_file_modified_before_commit_is_ingested_again(self):
+        check = self.manifest.check(self.path, "c", "e")
+        self.assertIsNotNone(check.content_hash)
+        # Edited while it was being loaded, split and embedded.
+        self.write("alpha, edited", mtime_ns=10 ** 18)
+        self.manifest.commit([PendingRecord(self.path, check, "c", "e", ["a"])])
+
+        self.assertEqual(self.manifest.lookup(self.path).content_hash, check.content_hash)
+        self.assertEqual(self.manifest.check(self.path, "c", "e").status, "changed")
+
+    def test_chunk_diff_only_embeds_new_chunks(self):
+        old_ids = chunk_ids("doc.txt", ["intro", "body", "body"])
+        new_ids = chunk_ids("doc.txt", ["intro", "body", "outro"])
+        self.assertEqual(len(set(old_ids)), 3)
+
+        check = self.manifest.check(self.path, "c", "e")
+        self.manifest.record(self.path, check, "c", "e", old_ids)
+        to_add, stale = diff_chunks(self.manifest.lookup(self.path), new_ids)
+        self.assertEqual(to_add, [2])
+        self.assertEqual(stale, [old_ids[2]])
+
+    def test_incremental_diff_matches_single_pass(self):
+        old_ids = chunk_ids("doc.txt", ["intro", "body", "body"])
+        new_texts = ["intro", "body", "body", "outro"]
+
+        check = self.manifest.check(self.path, "c", "e")
+        self.manifest.record(self.path, check, "c", "e", old_ids)
+        diff = IncrementalDiff("doc.txt", self.manifest.lookup(self.path))
+        self.assertEqual(diff.stale_before(), [])
+        first_ids, first_add = diff.add(new_texts[:2])
+        second_ids, second_add = diff.add(new_texts[2:])
+
+        self.assertEqual(first_ids + second_ids, chunk_ids("doc.txt", new_texts))
+        self.assertEqual((first_add, second_add), ([], [1]))
+        self.assertEqual(diff.stale_after(), [])
+
+        reembed = IncrementalDiff("doc.txt", self.manifest.lookup(self.path), reembed_all=True)
+        self.assertEqual(reembed.stale_before(), old_ids)
+        self.assertEqual(reembed.add(["intro"])[1], [0])
@@ -0,0 +1,212 @@
+from llm import llm_loader
+from llm.llm_loader import LLMGateway, _client_key
+from telemetry import telemetry
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "rag_mcp_tool"))
+
+
+class FakeRateLimit(Exception):
+    status_code = 429
+
+    class response:
+        status_code = 429
+        headers = {"retry-after": "0.01"}
+
+
+class FakeClient:
+    def __init__(self, answer, delay=0.0, fail_times=0, error=None):
+        self.answer = answer
+        self.delay = delay
+        self.fail_times = fail_times
+        self.error = error or FakeRateLimit("Too Many Requests")
+        self.prompts = []
+
+    async def ainvoke(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        await asyncio.sleep(self.delay)
+        if self.fail_times:
+            self.fail_times -= 1
+            raise self.error
+        return self.answer
+
+    async def astream(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        if self.fail_times:
+            self.fail_times -= 1
+            raise self.error
+        for part in self.answer:
+            yield part
+
+
+class RateLimitError(Exception):
+    """Stands in for an SDK rate-limit error that carries no status code."""
+
+    class response:
+        headers = {"retry-after": "0.01"}
+
+
+class Message:
+    def __init__(self, content, headers=None):
+        self.content = content
+        self.response_metadata = {"headers": headers} if headers else {}
+
+
+class TestLLMGateway(unittest.TestCase):
+    def setUp(self):
+        self.primary = {"provider": "fake", "model_name": "primary", "max_concurrency": 1}
+        self.secondary = {"provider": "fake", "model_name": "secondary"}
+
+    def tearDown(self):
+        llm_loader._client_pool.clear()
+
+    def register(self, llm_config, client):
+        llm_loader._client_pool[_client_key(llm_config)] = client
+        return client
+
+    def test_interactive_requests_jump_the_batch_queue(self):
+        client = self.register(self.primary, FakeClient("ok", delay=0.01))
+        gateway = LLMGateway()
+
+        async def run():
+            first = asyncio.ensure_future(gateway.ainvoke("first", self.primary))
+            await asyncio.sleep(0)
+            batch = asyncio.ensure_future(gateway.ainvoke("batch", self.primary, priority="batch"))
+            await asyncio.sleep(0)
+            interactive = asyncio.ensure_future(gateway.ainvoke("interactive", self.primary))
+            await asyncio.gather(first, batch, interactive)
+
+        asyncio.run(run())
+        self.assertEqual(client.prompts, ["first", "interactive", "batch"])
+
+    def test_rate_limit_is_retried_and_shrinks_concurrency(self):
+        config = dict(self.primary, max_concurrency=8)
+        self.register(config, FakeClient("ok", fail_times=1))
+        gateway = LLMGateway()
+
+        async def run():
+            lane = gateway._lane(config)
+            result = await gateway.ainvoke("q", config)
+            return result, lane
+
+        result, lane = asyncio.run(run())
+        self.assertEqual(result, "ok")
+        self.assertLess(lane.limit, 8)
+
+    def test_slow_primary_is_hedged_to_fallback(self):
+        config = dict(self.primary, hedge_after=0.01, fallback=self.secondary)
+        self.register(config, FakeClient("slow", delay=1.0))
+        self.register(self.secondary, FakeClient("fast"))
+
+        result = asyncio.run(LLMGateway().ainvoke("q", config))
+        self.assertEqual(result, "fast")
+
+    def test_rate_limit_headers_shrink_concurrency(self):
+        config = dict(self.primary, max_concurrency=8)
+        exhausted = {"X-RateLimit-Remaining-Requests": "0"}
+        gateway = LLMGateway()
+
+        self.register(config, FakeClient(Message("ok", exhausted)))
+        asyncio.run(gateway.ainvoke("q", config))
+        self.assertLess(gateway._lane(config).limit, 8)
+
+        gateway.reset_lane(config)
+        self.register(config, FakeClient([Message("o"), Message("k", exhausted)]))
+
+        async def stream():
+            return [chunk.content async for chunk in gateway.astream("q", config)]
+
+        self.assertEqual(asyncio.run(stream()), ["o", "k"])
+        self.assertLess(gateway._lane(config).limit, 8)
+
+    def test_cancelled_caller_cancels_primary_and_hedge(self):
+        config = dict(self.primary, max_concurrency=8, hedge_after=0.01, fallback=self.secondary)
+        self.register(config, FakeClient("slow", delay=10))
+        self.register(self.secondary, FakeClient("slower", delay=10))
+        gateway = LLMGateway()
+
+        async def run():
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(gateway.ainvoke("q", config), timeout=0.05)
+            await asyncio.sleep(0)  # let the cancelled calls unwind
+            return gateway._lane(config).in_flight, gateway._lane(self.secondary).in_flight
+
+        self.assertEqual(asyncio.run(run()), (0, 0))
+
+    def test_lanes_ignore_client_settings(self):
+        gateway = LLMGateway()
+        cold = dict(self.primary, temperature=0, request_timeout=5)
+        warm = dict(self.primary, temperature=0.7, request_timeout=60)
+        self.assertIs(gateway._lane(cold), gateway._lane(warm))
+        self.assertIsNot(gateway._lane(cold), gateway._lane(dict(cold, base_url="http://other")))
+
+    def test_rate_limit_is_detected_by_type_not_message(self):
+        self.assertIsNotNone(llm_loader._rate_limit_from_error(RateLimitError("slow down")))
+        self.assertIsNone(llm_loader._rate_limit_from_error(ValueError("order 429 not found")))
+
+    def test_stream_retries_rate_limit_before_first_chunk(self):
+        config = dict(self.primary, max_concurrency=8)
+        client = self.register(config, FakeClient(["a", "b"], fail_times=1, error=RateLimitError("429")))
+        gateway = LLMGateway()
+
+        async def run():
+            lane = gateway._lane(config)
+            parts = [part async for part in gateway.astream("q", config)]
+            return parts, lane
+
+        parts, lane = asyncio.run(run())
+        self.assertEqual(parts, ["a", "b"])
+        self.assertEqual(len(client.prompts), 2)
+        self.assertEqual(lane.in_flight, 0)
+
+
+class Chunk:
+    def __init__(self, content, usage_metadata=None):
+        self.content = content
+        self.usage_metadata = usage_metadata
+
+
+class TestAgentTokenUsage(unittest.TestCase):
+    def setUp(self):
+        import agent_graph
+
+        self.agent_graph = agent_graph
+        self.config = {"provider": "fake", "model_name": "agent"}
+        agent_graph.llm_config = self.config
+        telemetry.reset()
+        telemetry.enable()
+
+    def tearDown(self):
+        self.agent_graph.llm = self.agent_graph.llm_config = None
+        llm_loader._client_pool.clear()
+        telemetry.enable(False)
+        telemetry.reset()
+
+    def tokens(self, kind):
+        return telemetry._counters.get(telemetry._key("rag_tokens_total", {"kind": kind, "model": self.agent_graph.LLM_MODEL}))
+
+    def run_agent_call(self, chunks):
+        client = FakeClient(chunks)
+        llm_loader._client_pool[_client_key(self.config)] = client
+        self.agent_graph.llm = client
+        return asyncio.run(self.agent_graph.call_llm("What are the payment terms?"))
+
+    def test_reported_usage_is_recorded(self):
+        answer = self.run_agent_call([Chunk("Net"), Chunk(" 30."), Chunk("", {"input_tokens": 12, "output_tokens": 3})])
+        self.assertEqual(answer, "Net 30.")
+        self.assertEqual(self.tokens("prompt"), 12)
+        self.assertEqual(self.tokens("completion"), 3)
+
+    def test_tokenizer_counts_when_usage_is_missing(self):
+        self.agent_graph._tokenizer = None
+        self.agent_graph.LLM_TOKENIZER, tokenizer = "regex", self.agent_graph.LLM_TOKENIZER
+        try:
+            self.run_agent_call([Chunk("Net thirty"), Chunk(" days, from invoice")])
+        finally:
+            self.agent_graph.LLM_TOKENIZER = tokenizer
+            self.agent_graph._tokenizer = None
+        self.assertEqual(self.tokens("prompt"), 5)
+        self.assertEqual(self.tokens("completion"), 5)
@@ -0,0 +1,45 @@
+from ingest.loader_registry import LoaderRegistry, detect_file_type
+import os
+import tempfile
+import unittest
+import zipfile
+
+
+class TestDetectFileType(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_magic_bytes_win_over_extension(self):
+        self.assertEqual(detect_file_type(self.write("report.txt", b"%PDF-1.7\n...")), "pdf")
+
+        docx = os.path.join(self.tmp.name, "contract.bin")
+        with zipfile.ZipFile(docx, "w") as archive:
+            archive.writestr("word/document.xml", "<w:document/>")
+        self.assertEqual(detect_file_type(docx), "docx")
+
+    def test_extension_then_content_sniffing(self):
+        self.assertEqual(detect_file_type(self.write("rows.CSV", b"a,b\n1,2\n")), "csv")
+        self.assertEqual(detect_file_type(self.write("page", b"  <!DOCTYPE html><html></html>")), "html")
+        self.assertEqual(detect_file_type(self.write("README", "notes ü".encode("utf-8"))), "txt")
+        self.assertIsNone(detect_file_type(self.write("image.png", b"\x89PNG\r\n\x1a\n\0\0")))
+
+    def test_registry_limits(self):
+        limits = LoaderRegistry.concurrency_limits({"html": 3})
+        self.assertEqual(limits["html"], 3)
+        self.assertGreater(limits["txt"], limits["docx"])
+        self.assertIs(LoaderRegistry.get("txt"), LoaderRegistry.get("md"))
+        with self.assertRaises(ValueError):
+            LoaderRegistry.get("png")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import statistics
+import unittest
+
+from loadtest.driver import render, schedule
+from loadtest.latency import parse_latency
+from loadtest.report import ScenarioResult, compare, format_table, percentile
+
+
+class TestLatency(unittest.TestCase):
+    def test_specs(self):
+        self.assertEqual(parse_latency("0.25")(), 0.25)
+        self.assertEqual(parse_latency(0.1)(), 0.1)
+        uniform = [parse_latency("uniform:0.1,0.2", seed=0)() for _ in range(100)]
+        self.assertTrue(all(0.1 <= v <= 0.2 for v in uniform))
+
+        draw = parse_latency("lognormal:0.3,1.2", seed=0)
+        samples = sorted(draw() for _ in range(20000))
+        self.assertAlmostEqual(statistics.median(samples), 0.3, delta=0.02)
+        self.assertAlmostEqual(percentile(samples, 99), 1.2, delta=0.15)
+
+        with self.assertRaises(ValueError):
+            parse_latency("pareto:1,2")
+
+
+class TestDriver(unittest.TestCase):
+    def test_schedule_and_render(self):
+        self.assertEqual(schedule(4, 1), [0, 0.25, 0.5, 0.75])
+        poisson = schedule(200, 10, "poisson")
+        self.assertAlmostEqual(len(poisson), 2000, delta=150)
+        self.assertEqual(poisson, sorted(poisson))
+
+        body = {"query": "{query}", "parts": [{"text": "q: {query}"}], "n": 1}
+        self.assertEqual(render(body, "terms"), {"query": "terms", "parts": [{"text": "q: terms"}], "n": 1})
+
+
+class TestReport(unittest.TestCase):
+    def test_summary_and_compare(self):
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2.5)
+
+        result = ScenarioResult("query", target_rps=10, elapsed=2.0)
+        for i in range(1, 19):
+            result.record(i / 100, status=200)
+        result.record(0.5, status=503)
+        result.record(1.0, exception="TimeoutError")
+        summary = result.summary()
+        self.assertEqual((summary["requests"], summary["errors"], summary["error_rate"]), (20, 2, 0.1))
+        self.assertEqual((summary["throughput"], summary["statuses"]), (9.0, {"200": 18, "503": 1}))
+        self.assertEqual(summary["max"], 0.18)
+        self.assertIn("query", format_table([summary]))
+
+        self.assertEqual(compare([summary], [summary]), [])
+        slower = dict(summary, p99=summary["p99"] * 2, error_rate=0.2)
+        regressions = compare([slower], [summary])
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("query: p99"))
+
+
+if __name__ == "__main__":
+    unittest.main()
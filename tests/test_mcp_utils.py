@@ -0,0 +1,42 @@
+from rag_mcp_tool.mcp_utils import content_hash, context_text, create_mcp_context, encode
+import json
+import unittest
+
+
+class Doc:
+    def __init__(self, page_content, metadata=None):
+        self.page_content = page_content
+        self.metadata = metadata or {}
+
+
+class TestMCPContext(unittest.TestCase):
+    def setUp(self):
+        self.docs = [
+            (Doc("Payment is due net 30. " * 50, {"source": "a.pdf", "page": 3, "chunk_id": "c1", "x": 1}), 0.12),
+            (Doc("Late fees apply.", {"source": "b.txt"}), 0.4),
+        ]
+
+    def test_full_context_round_trips_as_json(self):
+        payload = json.loads(encode(create_mcp_context("payment terms?", self.docs)))
+        first, second = payload["context"]
+        self.assertEqual(payload["metadata"]["mode"], "full")
+        self.assertEqual(first["chunk_id"], "c1")
+        self.assertEqual(first["source"], {"source": "a.pdf", "page": 3})
+        self.assertAlmostEqual(first["score"], 0.12)
+        self.assertEqual(second["chunk_id"], content_hash("Late fees apply."))
+        self.assertEqual(context_text(payload), [d.page_content for d, _ in self.docs])
+        self.assertNotEqual(payload["metadata"]["retrieved_at"][:10], "2025-04-08")
+
+    def test_reference_mode_omits_text(self):
+        full = encode(create_mcp_context("q", self.docs))
+        reference = create_mcp_context("q", self.docs, mode="reference")
+        self.assertEqual(context_text(reference), [])
+        self.assertEqual(reference.context[0].content_hash, content_hash(self.docs[0][0].page_content))
+        self.assertLess(len(encode(reference)) * 3, len(full))
+
+        with self.assertRaises(ValueError):
+            create_mcp_context("q", self.docs, mode="summary")
+
+
+if __name__ == "__main__":
+    unittest.main()
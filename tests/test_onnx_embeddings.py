@@ -0,0 +1,65 @@
+import unittest
+
+try:
+    import numpy as np
+    from llm.onnx_embeddings import OnnxEmbeddings, length_sorted_batches, pad_batch
+except ImportError:
+    np = None
+
+
+class FakeEncoding:
+    def __init__(self, ids):
+        self.ids = ids
+
+
+class FakeTokenizer:
+    def encode(self, text):
+        return FakeEncoding([len(word) for word in text.split()])
+
+    def encode_batch(self, texts):
+        return [self.encode(t) for t in texts]
+
+
+class FakeInput:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeSession:
+    """Hidden state = token id in every dimension; records padded widths."""
+
+    def __init__(self):
+        self.widths = []
+
+    def get_inputs(self):
+        return [FakeInput("input_ids"), FakeInput("attention_mask")]
+
+    def run(self, outputs, feeds):
+        ids = feeds["input_ids"]
+        self.widths.append(ids.shape[1])
+        return [np.repeat(ids[..., None].astype(np.float32), 3, axis=2)]
+
+
+@unittest.skipIf(np is None, "numpy and langchain are required")
+class TestOnnxEmbeddings(unittest.TestCase):
+    def test_length_sorted_batches_and_dynamic_padding(self):
+        self.assertEqual(length_sorted_batches([5, 1, 3, 2], 2), [[1, 3], [2, 0]])
+        ids, mask = pad_batch([[7, 8], [9]])
+        self.assertEqual(ids.tolist(), [[7, 8], [9, 0]])
+        self.assertEqual(mask.tolist(), [[1, 1], [1, 0]])
+
+    def test_embeddings_keep_input_order_and_ignore_padding(self):
+        session = FakeSession()
+        embeddings = OnnxEmbeddings("unused", batch_size=2, workers=2, normalize=False,
+                                    session=session, tokenizer=FakeTokenizer())
+        texts = ["aaaa bb cccccc dd", "a", "bbb bbb", "cc cc cc"]
+        vectors = embeddings.embed_documents(texts)
+
+        # Mean of word lengths: padding zeros must not drag the mean down.
+        self.assertEqual([round(v[0], 3) for v in vectors], [3.5, 1.0, 3.0, 2.0])
+        self.assertEqual(sorted(session.widths), [2, 4])
+        self.assertEqual(embeddings.embed_query("aaaa bb")[0], 3.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
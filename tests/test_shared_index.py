@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "rag_mcp_tool"))
+
+try:
+    import faiss
+    import numpy as np
+    from langchain.schema import Document
+    from shared_index import attach_shared_index, export_shared_index
+except ImportError:
+    faiss = None
+
+
+class Store:
+    """The parts of a langchain FAISS store export_shared_index reads."""
+
+    def __init__(self, vectors, texts):
+        self.index = faiss.IndexFlatL2(vectors.shape[1])
+        self.index.add(vectors)
+        self.index_to_docstore_id = {i: f"doc{i}" for i in range(len(texts))}
+        self.docs = {f"doc{i}": Document(page_content=text, metadata={"row": i}) for i, text in enumerate(texts)}
+        self.docstore = self
+
+    def search(self, doc_id):
+        return self.docs[doc_id]
+
+
+@unittest.skipIf(faiss is None, "faiss and langchain are required")
+class TestSharedIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.vectors = rng.standard_normal((64, 8)).astype(np.float32)
+        self.texts = [f"chunk {i}" for i in range(64)]
+
+    def test_attached_index_searches_like_the_original(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            export_shared_index(Store(self.vectors, self.texts), tmp)
+            db = attach_shared_index(tmp)
+            doc, _ = db.similarity_search_with_score_by_vector(list(self.vectors[5]), k=1)[0]
+            self.assertEqual((doc.page_content, doc.metadata), ("chunk 5", {"row": 5}))
+
+    @unittest.skipUnless(faiss is not None and hasattr(faiss, "IO_FLAG_MMAP_IFC"), "faiss >= 1.8 required")
+    def test_flat_codes_are_mapped_not_copied(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            export_shared_index(Store(self.vectors, self.texts), tmp)
+            index = attach_shared_index(tmp).index
+            # A private copy would own its buffer; a mapping views the file's pages.
+            self.assertFalse(index.codes.is_owner)
+            self.assertEqual(index.ntotal, 64)
+
+
+if __name__ == "__main__":
+    unittest.main()
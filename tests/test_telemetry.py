@@ -0,0 +1,37 @@
+from telemetry import telemetry
+import unittest
+
+
+class TestTelemetry(unittest.TestCase):
+    def setUp(self):
+        telemetry.reset()
+
+    def tearDown(self):
+        telemetry.enable(False)
+        telemetry.reset()
+
+    def test_disabled_records_nothing(self):
+        telemetry.enable(False)
+        with telemetry.span("search"):
+            pass
+        telemetry.record_cache("sql", True)
+        self.assertEqual(telemetry.render_prometheus(), "\n")
+
+    def test_span_and_counters_render_as_prometheus(self):
+        telemetry.enable()
+        exported = []
+        telemetry.add_exporter(lambda stage, start, end, labels: exported.append(stage))
+        try:
+            with telemetry.span("search", backend="faiss"):
+                pass
+        finally:
+            telemetry._exporters.clear()
+        telemetry.record_cache("sql", hit=True)
+        telemetry.record_cache("sql", hit=False)
+
+        text = telemetry.render_prometheus()
+        self.assertEqual(exported, ["search"])
+        self.assertIn('rag_stage_seconds_count{stage="search",backend="faiss"} 1', text)
+        self.assertIn('rag_stage_seconds_bucket{stage="search",backend="faiss",le="+Inf"} 1', text)
+        self.assertIn('rag_cache_requests_total{cache="sql",result="hit"} 1', text)
+        self.assertIn('rag_cache_requests_total{cache="sql",result="miss"} 1', text)
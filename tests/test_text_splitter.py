@@ -0,0 +1,54 @@
+from ingest.text_splitter import TokenTextChunker, iter_blocks
+import io
+import os
+import tempfile
+import unittest
+
+
+TEXT = ("Payment is due within thirty days. Late fees apply. " * 30 + "\n\nNew section für Ünicode.\n") * 20
+
+
+class TestTokenTextChunker(unittest.TestCase):
+    def test_blocks_are_lossless_and_cut_before_whitespace(self):
+        blocks = list(iter_blocks(io.StringIO(TEXT), 64))
+        self.assertEqual("".join(blocks), TEXT)
+        self.assertTrue(all(b[-1:].strip() for b in blocks[:-1]))
+
+    def test_boundaries_are_deterministic_and_independent_of_block_size(self):
+        small = TokenTextChunker(60, 10, tokenizer="regex", block_chars=50)
+        large = TokenTextChunker(60, 10, tokenizer="regex", block_chars=1 << 16)
+        chunks = list(small.split_stream(io.StringIO(TEXT)))
+        self.assertEqual([c.text for c in chunks], large.split_text(TEXT))
+        self.assertEqual([c.text for c in chunks], small.split_text(TEXT))
+        for chunk in chunks:
+            self.assertEqual(TEXT[chunk.start:chunk.end], chunk.text)
+            self.assertLessEqual(len(small.tokenizer.pieces(chunk.text)), 60)
+        self.assertEqual(chunks[-1].end, len(TEXT))
+
+    def test_overlap_and_sentence_boundaries(self):
+        chunker = TokenTextChunker(60, 10, tokenizer="regex")
+        chunks = list(chunker.split_stream(io.StringIO(TEXT)))
+        for prev, chunk in zip(chunks, chunks[1:]):
+            self.assertLess(chunk.start, prev.end)
+            self.assertTrue(prev.text.rstrip().endswith("."))
+
+    def test_parallel_files_match_sequential(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for i in range(3):
+                paths.append(os.path.join(tmp, f"{i}.txt"))
+                with open(paths[-1], "w") as f:
+                    f.write(TEXT * (i + 1))
+            sequential = list(TokenTextChunker(60, 10, tokenizer="regex").split_files(paths))
+            with TokenTextChunker(60, 10, tokenizer="regex", workers=2) as chunker:
+                parallel = list(chunker.split_files(paths))
+                self.assertEqual(sequential, parallel)
+                # Later calls reuse the same worker processes.
+                pool = chunker._pool
+                self.assertEqual(list(chunker.split_files(paths)), sequential)
+                self.assertIs(chunker._pool, pool)
+            self.assertIsNone(chunker._pool)
+
+
+if __name__ == "__main__":
+    unittest.main()
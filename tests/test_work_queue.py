@@ -0,0 +1,91 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+from ingest.work_queue import WorkQueue
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "rag_mcp_tool"))
+
+try:
+    import faiss
+    import numpy as np
+except ImportError:
+    faiss = None
+
+
+class TestWorkQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = WorkQueue(os.path.join(self.tmp.name, "queue.sqlite"), max_attempts=2)
+
+    def tearDown(self):
+        self.queue.close()
+        self.tmp.cleanup()
+
+    def test_enqueue_is_idempotent_and_units_complete_once(self):
+        units = [("000000-a", {"files": ["a.txt"]}), ("000001-b", {"files": ["b.txt"]})]
+        self.assertEqual(self.queue.enqueue("job", units), 2)
+        self.assertEqual(self.queue.enqueue("job", units), 0)
+
+        first = self.queue.claim("job", "w1")
+        second = self.queue.claim("job", "w2")
+        self.assertEqual((first.unit_id, second.unit_id), ("000000-a", "000001-b"))
+        self.assertIsNone(self.queue.claim("job", "w3"))
+
+        self.assertTrue(self.queue.complete(first, "w1", {"segment": "s0"}))
+        self.assertFalse(self.queue.complete(first, "w1", {"segment": "again"}))
+        self.assertTrue(self.queue.complete(second, "w2", {"segment": "s1"}))
+        self.assertEqual(self.queue.results("job"), [("000000-a", {"segment": "s0"}), ("000001-b", {"segment": "s1"})])
+        self.assertEqual(self.queue.counts("job")["done"], 2)
+
+    def test_expired_lease_is_reclaimed_and_stale_worker_fenced(self):
+        self.queue.enqueue("job", [("u", {"files": []})])
+        crashed = self.queue.claim("job", "w1", lease_seconds=0.05)
+        time.sleep(0.1)
+        retry = self.queue.claim("job", "w2", lease_seconds=60)
+        self.assertEqual((retry.unit_id, retry.attempt), ("u", 2))
+
+        # The first worker comes back too late: its heartbeat and result are rejected.
+        self.assertFalse(self.queue.heartbeat(crashed, "w1"))
+        self.assertFalse(self.queue.complete(crashed, "w1", {"segment": "stale"}))
+        self.assertTrue(self.queue.complete(retry, "w2", {"segment": "fresh"}))
+        self.assertEqual(self.queue.results("job"), [("u", {"segment": "fresh"})])
+
+    def test_failures_retry_until_max_attempts(self):
+        self.queue.enqueue("job", [("u", {"files": []})])
+        for attempt in (1, 2):
+            unit = self.queue.claim("job", "w")
+            self.assertEqual(unit.attempt, attempt)
+            self.assertTrue(self.queue.fail(unit, "w", "boom"))
+        self.assertIsNone(self.queue.claim("job", "w"))
+        self.assertEqual(self.queue.counts("job")["failed"], 1)
+        self.assertEqual(self.queue.errors("job"), [("u", "boom", 2)])
+
+        self.assertEqual(self.queue.retry_failed("job"), 1)
+        self.assertEqual(self.queue.claim("job", "w").attempt, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+@unittest.skipIf(faiss is None, "faiss not installed")
+class TestTrainingSample(unittest.TestCase):
+    def test_sample_spans_every_segment(self):
+        from distributed_ingest import training_sample
+
+        with tempfile.TemporaryDirectory() as tmp:
+            segments = []
+            for n, (offset, count) in enumerate([(0.0, 300), (100.0, 100)]):
+                index = faiss.IndexFlatL2(4)
+                index.add(np.full((count, 4), offset, dtype=np.float32))
+                path = os.path.join(tmp, f"segment{n}")
+                os.makedirs(path)
+                faiss.write_index(index, os.path.join(path, "index.faiss"))
+                segments.append((path, count))
+
+            sample = training_sample(segments, size=40)
+        self.assertEqual(len(sample), 40)
+        self.assertEqual(int((sample[:, 0] == 100.0).sum()), 10)
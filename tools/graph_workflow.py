@@ -1,8 +1,18 @@
 # graph_workflow.py
+import operator
+import os
+
 from langgraph.graph import StateGraph, END
-from typing import TypedDict, Optional
+from typing import Annotated, List, TypedDict, Optional
+
+try:
+    from langgraph.types import Send
+except ImportError:  # langgraph < 0.2
+    from langgraph.constants import Send
 
 from rag.rag_tool import RAGTool
+from rag.rag_config import RAGConfig
+from vector_db.vector_db_config import VectorDBConfig
 
 
 # State type
@@ -13,14 +23,32 @@ class RAGState(TypedDict, total=False):
     ingest_result: str
 
 
-rag_tool_instance = RAGTool()
+# Fan-out state: list fields are merged across parallel branches.
+class BatchRAGState(TypedDict, total=False):
+    file_paths: List[str]
+    questions: List[str]
+    ingested: Annotated[List[str], operator.add]
+    ingest_results: Annotated[List[str], operator.add]
+    answers: Annotated[List[dict], operator.add]
+
+
+rag_tool_instance = None
+
+
+def get_rag_tool() -> RAGTool:
+    # Built on first use so importing the workflow stays cheap.
+    global rag_tool_instance
+    if rag_tool_instance is None:
+        rag_tool_instance = RAGTool(RAGConfig(), VectorDBConfig(db_type="faiss"))
+    return rag_tool_instance
+
 # Functions as LangGraph nodes
 def ingest_node(state: RAGState) -> RAGState:
-    result = rag_tool_instance.ingest_document(state["file_path"])
+    result = get_rag_tool().ingest_document(state["file_path"])
     return {"ingest_result": result}
 
 def query_node(state: RAGState) -> RAGState:
-    answer = rag_tool_instance.query(state["question"])
+    answer = get_rag_tool().query(state["question"])
     return {"answer": answer}
 
 
@@ -38,6 +66,75 @@ def build_rag_graph():
     return builder.compile()
 
 
+# Fan-out nodes: one branch per file, then one branch per question.
+def fan_out_ingest(state: BatchRAGState):
+    done = set(state.get("ingested", []))
+    sends = [Send("ingest_file", {"file_path": f}) for f in state.get("file_paths", []) if f not in done]
+    return sends or "barrier"
+
+def ingest_file_node(state: RAGState) -> BatchRAGState:
+    result = get_rag_tool().ingest_document(state["file_path"])
+    return {"ingested": [state["file_path"]], "ingest_results": [result]}
+
+def barrier_node(state: BatchRAGState) -> BatchRAGState:
+    # Runs once, after every ingest branch of the previous step has finished.
+    return {}
+
+def fan_out_questions(state: BatchRAGState):
+    answered = {a["question"] for a in state.get("answers", [])}
+    sends = [Send("answer_question", {"question": q}) for q in state.get("questions", []) if q not in answered]
+    return sends or END
+
+def answer_question_node(state: RAGState) -> BatchRAGState:
+    answer = get_rag_tool().query(state["question"])
+    return {"answers": [{"question": state["question"], "answer": answer}]}
+
+
+def build_batch_rag_graph(checkpointer=None):
+    """plan → ingest_file × N (parallel) → barrier → answer_question × M (parallel) → END"""
+    builder = StateGraph(BatchRAGState)
+
+    builder.add_node("plan", lambda state: {})
+    builder.add_node("ingest_file", ingest_file_node)
+    builder.add_node("barrier", barrier_node)
+    builder.add_node("answer_question", answer_question_node)
+
+    builder.set_entry_point("plan")
+    builder.add_conditional_edges("plan", fan_out_ingest, ["ingest_file", "barrier"])
+    builder.add_edge("ingest_file", "barrier")
+    builder.add_conditional_edges("barrier", fan_out_questions, ["answer_question", END])
+    builder.add_edge("answer_question", END)
+
+    return builder.compile(checkpointer=checkpointer)
+
+
+def default_checkpointer(path: str = "rag_checkpoints.sqlite"):
+    try:
+        import sqlite3
+        from langgraph.checkpoint.sqlite import SqliteSaver
+        return SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+    except ImportError:
+        # In-memory: resumes within this process only.
+        from langgraph.checkpoint.memory import MemorySaver
+        return MemorySaver()
+
+
+def run_batch_rag(file_paths: List[str], questions: List[str], thread_id: str,
+                  max_concurrency: int = 8, checkpointer=None) -> BatchRAGState:
+    """Runs (or resumes) a fan-out ingest + query job identified by ``thread_id``.
+
+    Completed branches are checkpointed, so rerunning a failed job with the
+    same ``thread_id`` continues from the failed step: files that were already
+    ingested are not ingested again.
+    """
+    app = build_batch_rag_graph(checkpointer or default_checkpointer())
+    config = {"configurable": {"thread_id": thread_id}, "max_concurrency": max_concurrency}
+
+    if app.get_state(config).next:
+        return app.invoke(None, config)
+    return app.invoke({"file_paths": file_paths, "questions": questions}, config)
+
+
 if __name__ == '__main__':
     from graph_workflow import build_rag_graph
 
@@ -50,3 +147,12 @@ if __name__ == '__main__':
 
     final_state = app.invoke(inputs)
     print("Final output:", final_state["answer"])
+
+    docs_dir = "docs"
+    batch_state = run_batch_rag(
+        file_paths=[os.path.join(docs_dir, f) for f in sorted(os.listdir(docs_dir))],
+        questions=["What is the summary of this document?", "What are the key payment terms?"],
+        thread_id="docs-batch",
+    )
+    for item in batch_state["answers"]:
+        print(item["question"], "->", item["answer"])
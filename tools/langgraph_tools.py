@@ -2,30 +2,48 @@
 from langchain_core.tools import tool
 
 from rag.rag_tool import RAGTool
+from rag.rag_config import RAGConfig
 from vector_db.vector_db_tool import VectorDBTool
+from vector_db.vector_db_config import VectorDBConfig
 
-rag_tool = RAGTool()
-vector_tool = VectorDBTool()
+# Tool backends are created on first call, not at import, so registering the
+# tools does not open vector stores or build embedding clients.
+_rag_tool = None
+_vector_tool = None
+
+
+def get_rag_tool() -> RAGTool:
+    global _rag_tool
+    if _rag_tool is None:
+        _rag_tool = RAGTool(RAGConfig(), VectorDBConfig(db_type="faiss"))
+    return _rag_tool
+
+
+def get_vector_tool() -> VectorDBTool:
+    global _vector_tool
+    if _vector_tool is None:
+        _vector_tool = VectorDBTool(VectorDBConfig(db_type="faiss"))
+    return _vector_tool
 
 @tool
 def ingest_rag_document(file_path: str) -> str:
-    return rag_tool.ingest_document(file_path)
+    return get_rag_tool().ingest_document(file_path)
 
 @tool
 def query_rag(question: str) -> str:
-    return rag_tool.query(question)
+    return get_rag_tool().query(question)
 
 @tool
 def add_to_vector_db(texts: list[str]) -> str:
-    return vector_tool.add_texts(texts)
+    return get_vector_tool().add_texts(texts)
 
 @tool
 def search_vector_db(query: str, k: int = 5) -> list[str]:
-    return vector_tool.search(query, k)
+    return get_vector_tool().search(query, k)
 
 @tool
 def clear_vector_db() -> str:
-    return vector_tool.clear()
+    return get_vector_tool().clear()
 
 
 from langgraph.graph import Graph
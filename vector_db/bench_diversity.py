@@ -0,0 +1,78 @@
+# bench_diversity.py
+"""Times diversity selection against plain top-k over the same candidates.
+
+    python -m vector_db.bench_diversity --queries 64 --fetch-k 50 --k 5 --dim 768
+
+Candidates are random unit vectors standing in for each query's fetch_k
+nearest hits. "top-k" is the argpartition a store does to pick its hits,
+"mmr"/"dpp" the batched selectors in vector_db.diversity, and "mmr (loop)"
+a per-query, per-candidate Python MMR like the one langchain runs after
+re-fetching embeddings.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from vector_db.diversity import select
+
+
+def loop_mmr(query, candidates, k, lambda_mult):
+    query = query / np.linalg.norm(query)
+    candidates = candidates / np.linalg.norm(candidates, axis=1, keepdims=True)
+    relevance = [float(c @ query) for c in candidates]
+    picked = []
+    while len(picked) < min(k, len(candidates)):
+        best, best_score = -1, -np.inf
+        for i, candidate in enumerate(candidates):
+            if i in picked:
+                continue
+            redundancy = max((float(candidate @ candidates[j]) for j in picked), default=0.0)
+            score = lambda_mult * relevance[i] - (1 - lambda_mult) * redundancy
+            if score > best_score:
+                best, best_score = i, score
+        picked.append(best)
+    return picked
+
+
+def timed(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument("--fetch-k", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--lambda-mult", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    candidates = rng.standard_normal((args.queries, args.fetch_k, args.dim)).astype(np.float32)
+
+    def top_k():
+        scores = np.einsum("qnd,qd->qn", candidates, queries)
+        return np.argpartition(-scores, args.k - 1, axis=1)[:, :args.k]
+
+    runs = [
+        ("top-k", top_k),
+        ("mmr", lambda: select(queries, candidates, args.k, "mmr", args.lambda_mult)),
+        ("dpp", lambda: select(queries, candidates, args.k, "dpp", args.lambda_mult)),
+        ("mmr (loop)", lambda: [loop_mmr(q, c, args.k, args.lambda_mult) for q, c in zip(queries, candidates)]),
+    ]
+    print(f"{args.queries} queries, fetch_k={args.fetch_k}, k={args.k}, dim={args.dim}")
+    print(f"{'method':<12}{'batch ms':>12}{'per query us':>16}")
+    for name, fn in runs:
+        seconds = timed(fn, 1 if name.endswith("(loop)") else args.repeat)
+        print(f"{name:<12}{seconds * 1e3:>12.2f}{seconds / args.queries * 1e6:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# bulk_writer.py
+"""Batched, pipelined upserts for remote vector stores.
+
+A large ``add_texts`` is cut into ``batch_size`` batches and up to
+``parallelism`` batches are embedded and upserted at once, so throughput is
+bounded by the server rather than by one round trip at a time. A batch that
+fails is retried on its own (exponential backoff) while the others continue;
+batches still failing after ``max_retries`` are reported together in a
+``BulkWriteError`` after everything else has been written. Upserts are keyed
+by ID, so retrying a batch that partly landed is safe.
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence
+
+from telemetry.telemetry import inc, span
+
+
+@dataclass
+class FailedBatch:
+    index: int
+    ids: List[str]
+    error: Exception
+
+
+@dataclass
+class BulkWriteResult:
+    written: int = 0
+    batches: int = 0
+    retries: int = 0
+    failed: List[FailedBatch] = field(default_factory=list)
+
+
+class BulkWriteError(Exception):
+    def __init__(self, result: BulkWriteResult):
+        self.result = result
+        failed_ids = sum(len(b.ids) for b in result.failed)
+        super().__init__(
+            f"{len(result.failed)} of {result.batches} batches failed ({failed_ids} items); "
+            f"{result.written} items written. First error: {result.failed[0].error!r}"
+        )
+
+    @property
+    def failed_ids(self) -> List[str]:
+        return [i for batch in self.result.failed for i in batch.ids]
+
+
+def bulk_write(write_batch: Callable[[List[str], Optional[List[dict]], List[str]], None],
+               texts: Sequence[str], metadatas: Optional[Sequence[dict]], ids: Sequence[str],
+               batch_size: int = 256, parallelism: int = 4, max_retries: int = 3,
+               backoff: float = 0.5, progress: Optional[Callable[[BulkWriteResult, int], None]] = None,
+               backend: str = "bulk") -> BulkWriteResult:
+    """Calls ``write_batch(texts, metadatas, ids)`` per batch, several in flight.
+
+    ``progress(result, total)`` is called after every finished batch. Raises
+    BulkWriteError if any batch still fails after its retries.
+    """
+    total = len(texts)
+    result = BulkWriteResult()
+
+    def run(index, start):
+        stop = min(start + batch_size, total)
+        batch_meta = list(metadatas[start:stop]) if metadatas is not None else None
+        batch_ids = list(ids[start:stop])
+        for attempt in range(max_retries + 1):
+            try:
+                with span("index_write", backend=backend, mode="bulk"):
+                    write_batch(list(texts[start:stop]), batch_meta, batch_ids)
+                return index, batch_ids, attempt, None
+            except Exception as e:
+                if attempt == max_retries:
+                    return index, batch_ids, attempt, e
+                time.sleep(backoff * 2 ** attempt)
+
+    starts = iter(enumerate(range(0, total, batch_size)))
+    with ThreadPoolExecutor(max(1, parallelism), thread_name_prefix=f"{backend}-upsert") as pool:
+        in_flight = set()
+        while True:
+            # Keep at most ``parallelism`` batches (and their texts) in flight.
+            for index, start in starts:
+                in_flight.add(pool.submit(run, index, start))
+                if len(in_flight) >= parallelism:
+                    break
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, batch_ids, retries, error = future.result()
+                result.batches += 1
+                result.retries += retries
+                if error is None:
+                    result.written += len(batch_ids)
+                    inc("rag_upsert_items_total", len(batch_ids), backend=backend)
+                else:
+                    result.failed.append(FailedBatch(index, batch_ids, error))
+                    inc("rag_upsert_failed_batches_total", 1, backend=backend)
+                if progress is not None:
+                    progress(result, total)
+
+    if result.failed:
+        result.failed.sort(key=lambda b: b.index)
+        raise BulkWriteError(result)
+    return result
+
+
+def print_progress(result: BulkWriteResult, total: int):
+    print(f"\rUpserted {result.written}/{total} ({len(result.failed)} failed batches)",
+          end="\n" if result.written + sum(len(b.ids) for b in result.failed) >= total else "")
@@ -0,0 +1,159 @@
+# client_pool.py
+"""Process-wide clients for the remote vector stores, and collection bootstrap.
+
+One Qdrant client per (url, transport), one ``pinecone.init`` per API key and
+environment and one Pinecone ``Index`` per index name, however many tools ask
+for a vector DB (embedding clients are pooled by llm.embedding_loader).
+``reconnect=True`` drops the cached client and builds a fresh one; the
+backends do this when a health check fails.
+
+Collections and indexes are created explicitly with the configured vector
+size, distance, HNSW parameters and quantization, and creation is idempotent:
+an existing collection with the same vector size is reused as is.
+"""
+import threading
+from concurrent.futures import Future
+from dataclasses import astuple
+
+_pool = {}
+_building = {}  # key -> Future of the client being built
+_lock = threading.Lock()
+# Collection creation talks to the server; it must not hold up pool lookups.
+_bootstrap_lock = threading.Lock()
+
+DISTANCES = {"cosine": "COSINE", "dot": "DOT", "euclid": "EUCLID"}
+
+
+def pooled(key: tuple, factory, reconnect: bool = False):
+    """The pooled client for ``key``, built with ``factory()`` on first use.
+
+    ``factory`` runs outside the pool lock, so a slow connect only holds up
+    callers of the same key; they wait for that one build instead of
+    starting their own.
+    """
+    old = None
+    with _lock:
+        if reconnect:
+            old = _pool.pop(key, None)
+        if key in _pool:
+            return _pool[key]
+        future = _building.get(key)
+        leader = future is None
+        if leader:
+            future = _building[key] = Future()
+
+    close = getattr(old, "close", None)
+    if close is not None:
+        try:
+            close()
+        except Exception:
+            pass
+    if not leader:
+        return future.result()
+
+    try:
+        client = factory()
+    except BaseException as e:
+        with _lock:
+            _building.pop(key, None)
+        future.set_exception(e)
+        raise
+    with _lock:
+        _pool[key] = client
+        _building.pop(key, None)
+    future.set_result(client)
+    return client
+
+
+def config_key(config) -> tuple:
+    return astuple(config)
+
+
+def reset():
+    with _lock:
+        _pool.clear()
+
+
+def shared_embeddings(config):
+    from llm.embedding_loader import load_embeddings
+
+    embedding_config = {"embedding_model": config.embedding_model}
+    if config.onnx_model_dir:
+        embedding_config["onnx_model_dir"] = config.onnx_model_dir
+    return load_embeddings(embedding_config)
+
+
+def qdrant_client(config, reconnect: bool = False):
+    def create():
+        from qdrant_client import QdrantClient
+        if config.qdrant_url == ":memory:":
+            return QdrantClient(location=":memory:")
+        return QdrantClient(url=config.qdrant_url, prefer_grpc=config.qdrant_prefer_grpc)
+
+    # Each ":memory:" client is its own database, so it is shared like any other.
+    return pooled(("qdrant", config.qdrant_url, config.qdrant_prefer_grpc), create, reconnect)
+
+
+def _qdrant_quantization(precision: str):
+    from qdrant_client import models
+
+    if precision == "int8":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, always_ram=True))
+    if precision == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def ensure_qdrant_collection(client, config):
+    """Creates ``config.qdrant_collection`` unless it already exists with the same size."""
+    from qdrant_client import models
+
+    name = config.qdrant_collection
+    with _bootstrap_lock:
+        try:
+            info = client.get_collection(name)
+        except Exception:
+            info = None
+        if info is not None:
+            vectors = info.config.params.vectors
+            size = getattr(vectors, "size", None)
+            if size is not None and size != config.vector_size:
+                raise ValueError(f"Qdrant collection {name} has vector size {size}, "
+                                 f"config expects {config.vector_size}")
+            return False
+
+        vector_params = {"size": config.vector_size,
+                         "distance": getattr(models.Distance, DISTANCES[config.distance])}
+        if config.storage_precision == "fp16":
+            vector_params["datatype"] = models.Datatype.FLOAT16
+        client.create_collection(
+            collection_name=name,
+            vectors_config=models.VectorParams(**vector_params),
+            hnsw_config=models.HnswConfigDiff(m=config.hnsw_m, ef_construct=config.hnsw_ef_construct),
+            quantization_config=_qdrant_quantization(config.storage_precision),
+        )
+        return True
+
+
+def pinecone_index(config, reconnect: bool = False):
+    import pinecone
+
+    # pinecone.init configures the module globally; do it once per account.
+    pooled(("pinecone_init", config.pinecone_api_key, config.pinecone_env),
+           lambda: pinecone.init(api_key=config.pinecone_api_key, environment=config.pinecone_env) or True)
+    ensure_pinecone_index(config)
+    return pooled(("pinecone_index", config.pinecone_api_key, config.pinecone_index),
+                  lambda: pinecone.Index(config.pinecone_index), reconnect)
+
+
+def ensure_pinecone_index(config):
+    import pinecone
+
+    def create():
+        if config.pinecone_index not in pinecone.list_indexes():
+            metric = {"euclid": "euclidean", "dot": "dotproduct"}.get(config.distance, config.distance)
+            pinecone.create_index(config.pinecone_index, dimension=config.vector_size, metric=metric)
+        return True
+
+    return pooled(("pinecone_bootstrap", config.pinecone_api_key, config.pinecone_index), create)
@@ -0,0 +1,199 @@
+# quantization.py
+"""Reduced-precision FAISS storage with optional full-precision rescoring.
+
+``storage_precision`` picks the code stored in the FAISS index:
+
+    fp32     IndexFlatL2, 4 bytes/dim (default, unchanged behaviour)
+    fp16     IndexScalarQuantizer QT_fp16, 2 bytes/dim (2x smaller)
+    int8     IndexScalarQuantizer QT_8bit, 1 byte/dim (4x smaller)
+    binary   IndexLSH sign bits, 1 bit/dim (32x smaller)
+
+The float32 vectors are also written next to the index (``vectors.f32``) and
+memory-mapped at query time. When ``rescore_candidates`` is larger than k, a
+search pulls that many candidates from the compact index and re-ranks them
+with exact L2 distances, so only the candidates' pages are ever read from the
+full-precision file.
+"""
+import os
+import time
+
+import faiss
+import numpy as np
+from langchain.docstore.in_memory import InMemoryDocstore
+from langchain.vectorstores import FAISS
+
+from telemetry.telemetry import span
+
+PRECISIONS = ("fp32", "fp16", "int8", "binary")
+FULL_VECTORS_FILE = "vectors.f32"
+
+
+def build_index(dim: int, precision: str):
+    if precision == "fp32":
+        return faiss.IndexFlatL2(dim)
+    if precision == "fp16":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2)
+    if precision == "int8":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+    if precision == "binary":
+        # One sign bit per dimension, compared by Hamming distance.
+        return faiss.IndexLSH(dim, dim, False, False)
+    raise ValueError(f"Unsupported storage precision: {precision}. Use one of {PRECISIONS}")
+
+
+def index_bytes_per_vector(index) -> int:
+    return index.sa_code_size()
+
+
+class QuantizedFAISS(FAISS):
+    """langchain FAISS store that keeps float32 vectors on the side for rescoring."""
+
+    full_vectors = None
+    rescore_candidates = 0
+    _pending = None
+
+    @classmethod
+    def create(cls, embedding, dim: int, precision: str = "fp32", rescore_candidates: int = 0):
+        store = cls(embedding, build_index(dim, precision), InMemoryDocstore(), {})
+        store.full_vectors = np.zeros((0, dim), dtype=np.float32)
+        store.rescore_candidates = rescore_candidates
+        return store
+
+    def _all_full_vectors(self):
+        # New batches are buffered and concatenated once, on first read.
+        if self._pending:
+            self.full_vectors = np.concatenate([np.asarray(self.full_vectors)] + self._pending)
+            self._pending = None
+        return self.full_vectors
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        vectors = self._embed_documents(texts)
+        return self.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids, **kwargs)
+
+    def add_embeddings(self, text_embeddings, metadatas=None, ids=None, **kwargs):
+        text_embeddings = list(text_embeddings)
+        vectors = np.asarray([v for _, v in text_embeddings], dtype=np.float32)
+        if len(vectors) and not self.index.is_trained:
+            # Scalar quantizers learn per-dimension ranges. Callers adding many
+            # batches should train on a sample of all of them first (see
+            # distributed_ingest.merge_segments); otherwise the first batch is used.
+            self.index.train(vectors)
+        result = super().add_embeddings(text_embeddings, metadatas=metadatas, ids=ids, **kwargs)
+        if self.full_vectors is not None and len(vectors):
+            self._pending = (self._pending or []) + [vectors]
+        return result
+
+    def delete(self, ids=None, **kwargs):
+        if self.full_vectors is not None and ids:
+            # FAISS compacts positions on removal; drop the same rows here.
+            targets = set(ids)
+            positions = [i for i, doc_id in self.index_to_docstore_id.items() if doc_id in targets]
+            full = np.delete(np.asarray(self._all_full_vectors()), positions, axis=0)
+        result = super().delete(ids, **kwargs)
+        if self.full_vectors is not None and ids:
+            self.full_vectors = full
+        return result
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, filter=None, fetch_k=20, **kwargs):
+        if filter is not None or self.full_vectors is None or self.rescore_candidates <= k:
+            return super().similarity_search_with_score_by_vector(
+                embedding, k=k, filter=filter, fetch_k=fetch_k, **kwargs
+            )
+
+        query = np.asarray([embedding], dtype=np.float32)
+        _, candidates = self.index.search(query, self.rescore_candidates)
+        candidates = candidates[0][candidates[0] >= 0]
+
+        with span("rerank", method="full_precision"):
+            distances, order = rescore(self._all_full_vectors(), query[0], candidates, k)
+
+        results = []
+        for i, distance in zip(order, distances):
+            doc = self.docstore.search(self.index_to_docstore_id[int(i)])
+            results.append((doc, float(distance)))
+        return results
+
+    def save_local(self, folder_path: str, index_name: str = "index"):
+        super().save_local(folder_path, index_name)
+        if self.full_vectors is not None:
+            path = os.path.join(folder_path, FULL_VECTORS_FILE)
+            np.asarray(self._all_full_vectors(), dtype=np.float32).tofile(path + ".tmp")
+            os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load_local(cls, folder_path: str, embeddings, index_name: str = "index",
+                   rescore_candidates: int = 0, **kwargs):
+        store = super().load_local(folder_path, embeddings, index_name=index_name, **kwargs)
+        path = os.path.join(folder_path, FULL_VECTORS_FILE)
+        if os.path.exists(path) and os.path.getsize(path):
+            store.full_vectors = np.memmap(path, dtype=np.float32, mode="r").reshape(-1, store.index.d)
+        elif os.path.exists(path):
+            store.full_vectors = np.zeros((0, store.index.d), dtype=np.float32)
+        store.rescore_candidates = rescore_candidates
+        return store
+
+
+def rescore(full_vectors, query, candidates, k):
+    """Re-ranks candidate ids by exact squared L2 distance; returns (distances, ids)."""
+    if len(candidates) == 0:
+        return np.zeros(0, dtype=np.float32), candidates
+    candidates = np.sort(candidates)  # sequential reads from the mmap
+    vectors = np.asarray(full_vectors[candidates])
+    distances = ((vectors - query) ** 2).sum(axis=1)
+    top = np.argsort(distances)[:k]
+    return distances[top], candidates[top]
+
+
+def quantization_report(store, k: int = 10, sample_size: int = 200, recall_floor: float = None, seed: int = 0):
+    """Compares the compact index against exact search on a sample of stored vectors.
+
+    Returns compression ratio and recall@k with and without full-precision
+    rescoring. Queries are stored vectors with small gaussian noise, so each
+    one has a realistic, non-trivial neighbourhood.
+    """
+    full = np.asarray(store._all_full_vectors(), dtype=np.float32)
+    n, dim = full.shape
+    if n == 0:
+        return {"vectors": 0}
+
+    rng = np.random.default_rng(seed)
+    sample = full[rng.choice(n, size=min(sample_size, n), replace=False)]
+    queries = sample + rng.normal(scale=0.01, size=sample.shape).astype(np.float32)
+    k = min(k, n)
+
+    exact = faiss.IndexFlatL2(dim)
+    exact.add(full)
+    _, truth = exact.search(queries, k)
+
+    start = time.perf_counter()
+    _, approx = store.index.search(queries, k)
+    approx_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    candidates = max(store.rescore_candidates, k)
+    _, pool = store.index.search(queries, candidates)
+    rescored = [rescore(full, q, ids[ids >= 0], k)[1] for q, ids in zip(queries, pool)]
+
+    def recall(results):
+        return float(np.mean([len(set(r) & set(t)) / k for r, t in zip(results, truth)]))
+
+    report = {
+        "vectors": n,
+        "dim": dim,
+        "bytes_per_vector": index_bytes_per_vector(store.index),
+        "compression": dim * 4 / index_bytes_per_vector(store.index),
+        f"recall@{k}": recall(approx),
+        f"recall@{k}_rescored": recall(rescored),
+        "rescore_candidates": candidates,
+        "search_ms_per_query": approx_ms,
+    }
+    if recall_floor is not None:
+        served = report[f"recall@{k}_rescored"] if store.rescore_candidates > k else report[f"recall@{k}"]
+        report["recall_floor"] = recall_floor
+        report["meets_floor"] = served >= recall_floor
+    return report
+
+
+def format_report(report: dict) -> str:
+    return "\n".join(f"  {key:<24} {value:.4f}" if isinstance(value, float) else f"  {key:<24} {value}"
+                     for key, value in report.items())
@@ -5,7 +5,24 @@ from dataclasses import dataclass
 class VectorDBConfig:
     db_type: str  # e.g., "faiss", "qdrant", "pinecone"
     persist_path: str = "index"
-    qdrant_url: str = None
+    qdrant_url: str = None  # ":memory:" runs an in-process Qdrant (tests, local dev)
+    qdrant_prefer_grpc: bool = False  # upserts over gRPC (port 6334) instead of REST
     pinecone_index: str = None
     pinecone_env: str = None
     pinecone_api_key: str = None
+    embedding_model: str = "openai"  # openai, huggingface, local_onnx
+    onnx_model_dir: str = None  # local_onnx: directory with model(_quantized).onnx + tokenizer.json
+    vector_size: int = 1536  # OpenAI text-embedding-ada-002 / -3-small; 384 for MiniLM
+    storage_precision: str = "fp32"  # fp32, fp16, int8, binary (FAISS index; Qdrant quantization)
+    rescore_candidates: int = 0  # >k re-ranks this many candidates at full precision
+    recall_floor: float = 0.9  # minimum recall@10 checked by FAISSDB.report()
+    # Qdrant/Pinecone add_texts: items per upsert, batches in flight, retries per batch
+    upsert_batch_size: int = 256
+    upsert_parallelism: int = 4
+    upsert_max_retries: int = 3
+    # Collection bootstrap (Qdrant collection / Pinecone index created if missing)
+    qdrant_collection: str = "rag_collection"
+    distance: str = "cosine"  # cosine, dot, euclid
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    health_check_interval: float = 30.0  # seconds between pings before an operation
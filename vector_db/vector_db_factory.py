@@ -1,78 +1,394 @@
 # vector_db_factory.py
-from langchain.embeddings import OpenAIEmbeddings
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
 from vector_db_interface import VectorDBInterface
 from vector_db_config import VectorDBConfig
+from telemetry.telemetry import span
+
+logger = logging.getLogger(__name__)
 
-# backends
-from langchain.vectorstores import FAISS, Qdrant, Pinecone
-from qdrant_client import QdrantClient
-import pinecone
+# Backend SDKs are imported inside each backend so a process only pays for
+# (and only needs installed) the one it actually uses.
 
 class FAISSDB(VectorDBInterface):
     def __init__(self, config: VectorDBConfig):
+        from langchain.vectorstores import FAISS
+        from client_pool import shared_embeddings
+
         self.config = config
-        self.embeddings = OpenAIEmbeddings()
+        self.embeddings = shared_embeddings(config)
+        self.last_report = None
+        # Parallel ingest branches embed concurrently but write one at a time.
+        self._write_lock = threading.Lock()
+        self._bulk_depth = 0
         try:
-            self.vectorstore = FAISS.load_local(config.persist_path, self.embeddings)
+            if self.quantized:
+                from quantization import QuantizedFAISS
+                self.vectorstore = QuantizedFAISS.load_local(
+                    config.persist_path, self.embeddings,
+                    rescore_candidates=config.rescore_candidates,
+                )
+            else:
+                self.vectorstore = FAISS.load_local(config.persist_path, self.embeddings)
         except:
-            self.vectorstore = FAISS.from_texts([], self.embeddings)
+            self.vectorstore = self._empty_store()
 
-    def add_texts(self, texts):
-        self.vectorstore.add_texts(texts)
-        self.save()
+    @property
+    def quantized(self):
+        return self.config.storage_precision != "fp32"
+
+    def _empty_store(self):
+        if self.quantized:
+            from quantization import QuantizedFAISS
+            return QuantizedFAISS.create(
+                self.embeddings, self.config.vector_size,
+                self.config.storage_precision, self.config.rescore_candidates,
+            )
+        from langchain.vectorstores import FAISS
+        return FAISS.from_texts([], self.embeddings)
+
+    def _stored(self, ids):
+        # langchain's FAISS uses the caller's ids as docstore keys.
+        stored = self.vectorstore.docstore._dict
+        return [doc_id for doc_id in ids if doc_id in stored]
+
+    def add_texts(self, texts, metadatas=None, ids=None):
+        if ids is not None:
+            # Ids already in the index (e.g. written by an ingest that failed
+            # before its manifest was recorded) are skipped, not re-added.
+            existing = set(self._stored(ids))
+            if existing:
+                keep = [i for i, doc_id in enumerate(ids) if doc_id not in existing]
+                texts = [texts[i] for i in keep]
+                metadatas = [metadatas[i] for i in keep] if metadatas is not None else None
+                ids = [ids[i] for i in keep]
+            if not ids:
+                return "Added 0 texts"
+        # Embed up front so embedding and index write are timed separately.
+        vectors = self.embeddings.embed_documents(texts)
+        with self._write_lock, span("index_write", backend="faiss"):
+            self.vectorstore.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+            if not self._bulk_depth:
+                self._save_locked()
         return f"Added {len(texts)} texts"
 
+    @contextmanager
+    def bulk(self):
+        """Writes inside the block are kept in memory; call ``save()`` after it."""
+        with self._write_lock:
+            self._bulk_depth += 1
+        try:
+            yield
+        finally:
+            with self._write_lock:
+                self._bulk_depth -= 1
+
+    def report(self):
+        """Compression and recall@10 of the quantized index vs exact search.
+
+        Copies the whole index into an exact one, so it is run on demand
+        (e.g. once after an ingest run), never per write.
+        """
+        from quantization import quantization_report, format_report
+
+        with self._write_lock:
+            self.last_report = quantization_report(self.vectorstore, recall_floor=self.config.recall_floor)
+        logger.info("FAISS %s index report:\n%s", self.config.storage_precision, format_report(self.last_report))
+        if not self.last_report.get("meets_floor", True):
+            logger.warning("Recall below floor %s; raise rescore_candidates or use a higher storage_precision",
+                           self.config.recall_floor)
+        return self.last_report
+
     def search(self, query, k=5):
-        return [doc.page_content for doc in self.vectorstore.similarity_search(query, k=k)]
+        with span("search", backend="faiss"):
+            return [doc.page_content for doc in self.vectorstore.similarity_search(query, k=k)]
+
+    def delete(self, ids):
+        # FAISS.delete raises on unknown ids; deleting twice must be harmless.
+        ids = self._stored(ids)
+        if not ids:
+            return "Deleted 0 texts"
+        with self._write_lock, span("index_write", backend="faiss", op="delete"):
+            self.vectorstore.delete(ids)
+            if not self._bulk_depth:
+                self._save_locked()
+        return f"Deleted {len(ids)} texts"
+
+    def search_by_vectors(self, vectors, k=5):
+        """One matrix search for many query vectors; shared hits are loaded once."""
+        import numpy as np
+
+        store = self.vectorstore
+        if getattr(store, "rescore_candidates", 0) > k:
+            return super().search_by_vectors(vectors, k)
+
+        with span("search", backend="faiss", mode="batch"):
+            _, ids = store.index.search(np.asarray(vectors, dtype=np.float32), k)
+            docs = {}
+            results = []
+            for row in ids:
+                hits = []
+                for i in row:
+                    if i < 0:
+                        continue
+                    if i not in docs:
+                        docs[i] = store.docstore.search(store.index_to_docstore_id[int(i)])
+                    hits.append(docs[i])
+                results.append(hits)
+        return results
+
+    def candidates_by_vectors(self, vectors, fetch_k=20):
+        """One matrix search; candidate vectors come from the float32 side file
+        of a quantized store, or are reconstructed from the index."""
+        import numpy as np
+
+        store = self.vectorstore
+        with span("search", backend="faiss", mode="diverse"):
+            _, ids = store.index.search(np.asarray(vectors, dtype=np.float32), fetch_k)
+            mask = ids >= 0
+            unique = np.unique(ids[mask])
+            if not len(unique):
+                return [[] for _ in ids], np.zeros((len(ids), fetch_k, 1), np.float32), mask
+            full = getattr(store, "full_vectors", None)
+            if full is not None:
+                stored = np.asarray(store._all_full_vectors()[unique], dtype=np.float32)
+            else:
+                stored = store.index.reconstruct_batch(unique)
+            # FAISS pads missing hits with -1 at the end; those rows are masked out.
+            candidates = stored[np.searchsorted(unique, np.where(mask, ids, unique[0]))]
+
+            docs = {}
+            results = []
+            for row in ids:
+                hits = []
+                for i in row[row >= 0]:
+                    if i not in docs:
+                        docs[i] = store.docstore.search(store.index_to_docstore_id[int(i)])
+                    hits.append(docs[i])
+                results.append(hits)
+        return results, candidates, mask
 
     def clear(self):
-        self.vectorstore = FAISS.from_texts([], self.embeddings)
+        self.vectorstore = self._empty_store()
         self.save()
         return "FAISS index cleared"
 
     def save(self):
+        with self._write_lock:
+            self._save_locked()
+
+    def _save_locked(self):
         self.vectorstore.save_local(self.config.persist_path)
 
     def get_vectorstore(self):
         return self.vectorstore
 
-class QdrantDB(VectorDBInterface):
+def _bulk_add(config, backend, write_batch, texts, metadatas, ids, progress):
+    import uuid
+    from bulk_writer import bulk_write
+
+    texts = list(texts)
+    # Fixed IDs make a retried batch overwrite, not duplicate, what already landed.
+    ids = list(ids) if ids is not None else [uuid.uuid4().hex for _ in texts]
+    result = bulk_write(
+        write_batch, texts, metadatas, ids,
+        batch_size=config.upsert_batch_size,
+        parallelism=config.upsert_parallelism,
+        max_retries=config.upsert_max_retries,
+        progress=progress,
+        backend=backend,
+    )
+    return f"Added {result.written} texts in {result.batches} batches ({result.retries} retries)"
+
+def _qdrant_ids(ids):
+    # Qdrant point IDs must be UUIDs or integers; chunk IDs are 32 hex chars.
+    if ids is None:
+        return None
+    import uuid
+    return [str(uuid.UUID(hex=i[:32])) for i in ids]
+
+class _HealthChecked:
+    """Pings the backend at most every ``health_check_interval`` seconds before
+    an operation, and reconnects through the client pool if the ping fails."""
+
+    _checked_at = 0.0
+
+    def _client_changed(self) -> bool:
+        raise NotImplementedError
+
+    def _ping(self):
+        raise NotImplementedError
+
+    def _connect(self, reconnect=False):
+        raise NotImplementedError
+
+    def health_check(self) -> bool:
+        if self._client_changed():
+            # Another instance already reconnected the shared client.
+            self._connect()
+        try:
+            self._ping()
+            healthy = True
+        except Exception:
+            self._connect(reconnect=True)
+            healthy = False
+        self._checked_at = time.monotonic()
+        return healthy
+
+    def _ensure_connected(self):
+        if time.monotonic() - self._checked_at > self.config.health_check_interval:
+            self.health_check()
+
+class QdrantDB(_HealthChecked, VectorDBInterface):
     def __init__(self, config: VectorDBConfig):
-        self.embeddings = OpenAIEmbeddings()
+        from client_pool import shared_embeddings
+
+        self.config = config
+        self.embeddings = shared_embeddings(config)
+        self._connect()
+
+    def _connect(self, reconnect=False):
+        from langchain.vectorstores import Qdrant
+        from client_pool import ensure_qdrant_collection, qdrant_client
+
+        client = qdrant_client(self.config, reconnect=reconnect)
+        ensure_qdrant_collection(client, self.config)
         self.qdrant = Qdrant(
-            client=QdrantClient(url=config.qdrant_url),
-            collection_name="rag_collection",
+            client=client,
+            collection_name=self.config.qdrant_collection,
             embeddings=self.embeddings,
         )
+        self._checked_at = time.monotonic()
 
-    def add_texts(self, texts):
-        self.qdrant.add_texts(texts)
-        return f"Added {len(texts)} texts"
+    def _client_changed(self):
+        from client_pool import qdrant_client
+        return qdrant_client(self.config) is not self.qdrant.client
+
+    def _ping(self):
+        self.qdrant.client.get_collection(self.config.qdrant_collection)
+
+    def add_texts(self, texts, metadatas=None, ids=None, progress=None):
+        """Embeds and upserts in ``upsert_batch_size`` batches, several in flight.
+
+        Raises bulk_writer.BulkWriteError listing the batches that still
+        failed after retries; all other batches are written.
+        """
+        self._ensure_connected()
+
+        def write_batch(batch, batch_metadatas, batch_ids):
+            self.qdrant.add_texts(batch, metadatas=batch_metadatas, ids=_qdrant_ids(batch_ids),
+                                  batch_size=len(batch))
+
+        return _bulk_add(self.config, "qdrant", write_batch, texts, metadatas, ids, progress)
+
+    def delete(self, ids):
+        self._ensure_connected()
+        with span("index_write", backend="qdrant", op="delete"):
+            self.qdrant.delete(_qdrant_ids(ids))
+        return f"Deleted {len(ids)} texts"
 
     def search(self, query, k=5):
-        return [doc.page_content for doc in self.qdrant.similarity_search(query, k=k)]
+        self._ensure_connected()
+        with span("search", backend="qdrant"):
+            return [doc.page_content for doc in self.qdrant.similarity_search(query, k=k)]
+
+    def candidates_by_vectors(self, vectors, fetch_k=20):
+        """All queries in one search_batch call, with stored vectors attached."""
+        from langchain.schema import Document
+        from qdrant_client import models
+        from diversity import pack_candidates
+
+        self._ensure_connected()
+        with span("search", backend="qdrant", mode="diverse"):
+            batches = self.qdrant.client.search_batch(
+                collection_name=self.config.qdrant_collection,
+                requests=[models.SearchRequest(vector=[float(x) for x in vector], limit=fetch_k,
+                                               with_payload=True, with_vector=True)
+                          for vector in vectors],
+            )
+        docs = [[Document(page_content=point.payload.get(self.qdrant.content_payload_key, ""),
+                          metadata=point.payload.get(self.qdrant.metadata_payload_key) or {})
+                 for point in points] for points in batches]
+        candidates, mask = pack_candidates([[point.vector for point in points] for points in batches], fetch_k)
+        return docs, candidates, mask
 
     def clear(self):
-        self.qdrant.delete_collection()
+        from client_pool import ensure_qdrant_collection
+
+        self._ensure_connected()
+        self.qdrant.client.delete_collection(self.config.qdrant_collection)
+        ensure_qdrant_collection(self.qdrant.client, self.config)
         return "Qdrant index cleared"
 
     def save(self): pass
     def get_vectorstore(self):
         return self.qdrant
 
-class PineconeDB(VectorDBInterface):
+class PineconeDB(_HealthChecked, VectorDBInterface):
     def __init__(self, config: VectorDBConfig):
-        self.embeddings = OpenAIEmbeddings()
-        pinecone.init(api_key=config.pinecone_api_key, environment=config.pinecone_env)
-        index = pinecone.Index(config.pinecone_index)
-        self.pinecone = Pinecone(index, self.embeddings.embed_query, "text")
+        from client_pool import shared_embeddings
 
-    def add_texts(self, texts):
-        self.pinecone.add_texts(texts)
-        return f"Added {len(texts)} texts"
+        self.config = config
+        self.embeddings = shared_embeddings(config)
+        self._connect()
+
+    def _connect(self, reconnect=False):
+        from langchain.vectorstores import Pinecone
+        from client_pool import pinecone_index
+
+        self.index = pinecone_index(self.config, reconnect=reconnect)
+        self.pinecone = Pinecone(self.index, self.embeddings.embed_query, "text")
+        self._checked_at = time.monotonic()
+
+    def _client_changed(self):
+        from client_pool import pinecone_index
+        return pinecone_index(self.config) is not self.index
+
+    def _ping(self):
+        self.index.describe_index_stats()
+
+    def add_texts(self, texts, metadatas=None, ids=None, progress=None):
+        """Same batching, parallelism and per-batch retries as QdrantDB.add_texts."""
+        self._ensure_connected()
+
+        def write_batch(batch, batch_metadatas, batch_ids):
+            self.pinecone.add_texts(batch, metadatas=batch_metadatas, ids=batch_ids, batch_size=len(batch))
+
+        return _bulk_add(self.config, "pinecone", write_batch, texts, metadatas, ids, progress)
+
+    def delete(self, ids):
+        self._ensure_connected()
+        with span("index_write", backend="pinecone", op="delete"):
+            self.pinecone.delete(ids=list(ids))
+        return f"Deleted {len(ids)} texts"
 
     def search(self, query, k=5):
-        return [doc.page_content for doc in self.pinecone.similarity_search(query, k=k)]
+        self._ensure_connected()
+        with span("search", backend="pinecone"):
+            return [doc.page_content for doc in self.pinecone.similarity_search(query, k=k)]
+
+    def candidates_by_vectors(self, vectors, fetch_k=20):
+        """Pinecone has no multi-vector query; one query per vector, values included."""
+        from langchain.schema import Document
+        from diversity import pack_candidates
+
+        self._ensure_connected()
+        docs, rows = [], []
+        with span("search", backend="pinecone", mode="diverse"):
+            for vector in vectors:
+                matches = self.index.query(vector=[float(x) for x in vector], top_k=fetch_k,
+                                           include_values=True, include_metadata=True)["matches"]
+                hits = []
+                for match in matches:
+                    metadata = dict(match.get("metadata") or {})
+                    hits.append(Document(page_content=metadata.pop("text", ""), metadata=metadata))
+                docs.append(hits)
+                rows.append([match["values"] for match in matches])
+        candidates, mask = pack_candidates(rows, fetch_k)
+        return docs, candidates, mask
 
     def clear(self):
         # NOTE: This clears the whole index; handle with care.
@@ -83,6 +399,9 @@ class PineconeDB(VectorDBInterface):
         return self.pinecone
 
 def get_vector_db(config: VectorDBConfig) -> VectorDBInterface:
+    """Returns the process-wide instance for ``config``; equal configs share one."""
+    from client_pool import config_key, pooled
+
     db_map = {
         "faiss": FAISSDB,
         "qdrant": QdrantDB,
@@ -90,4 +409,4 @@ def get_vector_db(config: VectorDBConfig) -> VectorDBInterface:
     }
     if config.db_type not in db_map:
         raise ValueError(f"Unsupported DB type: {config.db_type}")
-    return db_map[config.db_type](config)
+    return pooled(("vector_db",) + config_key(config), lambda: db_map[config.db_type](config))
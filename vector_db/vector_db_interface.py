@@ -1,9 +1,16 @@
 # vector_db_interface.py
-from typing import List
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from langchain.schema import BaseRetriever, Document
 from langchain.vectorstores.base import VectorStore
+from telemetry.telemetry import span
 
 class VectorDBInterface:
-    def add_texts(self, texts: List[str]) -> str:
+    def add_texts(self, texts: List[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None) -> str:
+        raise NotImplementedError
+
+    def delete(self, ids: List[str]) -> str:
         raise NotImplementedError
 
     def search(self, query: str, k: int = 5) -> List[str]:
@@ -17,3 +24,62 @@ class VectorDBInterface:
 
     def get_vectorstore(self) -> VectorStore:
         raise NotImplementedError
+
+    @contextmanager
+    def bulk(self):
+        """Groups writes: backends that persist to disk skip the per-call save
+        inside the block, and the caller calls ``save()`` once afterwards."""
+        yield
+
+    def search_by_vectors(self, vectors: List[List[float]], k: int = 5) -> List[List[Document]]:
+        # Backends with a native multi-query search override this.
+        store = self.get_vectorstore()
+        return [store.similarity_search_by_vector(vector, k=k) for vector in vectors]
+
+    def candidates_by_vectors(self, vectors: List[List[float]], fetch_k: int = 20):
+        """Top ``fetch_k`` hits per query together with their stored vectors.
+
+        Returns ``(docs, candidates, mask)``: per-query Document lists, a
+        (Q, fetch_k, d) array of the hits' vectors in the same order, and a
+        (Q, fetch_k) mask of real hits. Backends that can return stored
+        vectors with the search results override this.
+        """
+        raise NotImplementedError
+
+    def diverse_search_by_vectors(self, vectors: List[List[float]], k: int = 5, fetch_k: int = 20,
+                                  method: str = "mmr", lambda_mult: float = 0.5) -> List[List[Document]]:
+        """MMR or DPP selection of ``k`` of each query's ``fetch_k`` nearest hits."""
+        try:
+            docs, candidates, mask = self.candidates_by_vectors(vectors, fetch_k)
+        except NotImplementedError:
+            if method != "mmr":
+                raise
+            store = self.get_vectorstore()
+            return [store.max_marginal_relevance_search_by_vector(vector, k=k, fetch_k=fetch_k,
+                                                                  lambda_mult=lambda_mult)
+                    for vector in vectors]
+
+        from diversity import select
+
+        with span("rerank", method=method):
+            picks = select(vectors, candidates, k, method, lambda_mult, mask)
+        return [[docs[q][i] for i in row if i >= 0] for q, row in enumerate(picks)]
+
+    def diverse_search(self, query: str, k: int = 5, fetch_k: int = 20, method: str = "mmr",
+                       lambda_mult: float = 0.5) -> List[Document]:
+        vector = self.embeddings.embed_query(query)
+        return self.diverse_search_by_vectors([vector], k, fetch_k, method, lambda_mult)[0]
+
+
+class DiverseRetriever(BaseRetriever):
+    """Retriever over ``VectorDBInterface.diverse_search`` for langchain chains."""
+
+    vector_db: Any
+    method: str = "mmr"
+    search_kwargs: Dict = {}
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return self.vector_db.diverse_search(query, method=self.method, **self.search_kwargs)